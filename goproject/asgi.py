@@ -3,6 +3,10 @@ ASGI config for goproject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through this entry point (e.g. ``uvicorn goproject.asgi:application``)
+keeps the live booking status stream (users.views.booking_events_view) open;
+under WSGI that stream falls back to EventSource reconnect polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
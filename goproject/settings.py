@@ -40,11 +40,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.instrumentation.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.actor.ActorMiddleware",
+    "main.db_router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -53,7 +56,8 @@ ROOT_URLCONF = "goproject.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates with per-request render timing (main/instrumentation.py)
+        "BACKEND": "main.instrumentation.TimedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -76,6 +80,26 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # File-backed test database so concurrency tests can open one
+        # connection per thread (shared-cache :memory: fails fast on locks)
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+        # Take the write lock at BEGIN, where busy_timeout can wait for it
+        # (see main/sqlite.py)
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Catalog fragments and querysets (main/cache.py) are cached here. Use a
+# shared backend (Redis/Memcached) when running several workers so version
+# bumps and hit/miss counters are seen by all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "goservice",
     }
 }
 
@@ -127,3 +151,155 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Auth fast path (users/actor.py): the session's user row and the linked
+# Customer/ServiceProvider id come from the cache, and sessions are read
+# from the cache with writes going through to the database. With more than
+# one worker process, point CACHES at a shared backend (Redis/Memcached) so
+# a logout or profile change is seen by every worker.
+
+AUTHENTICATION_BACKENDS = ["users.actor.CachedModelBackend"]
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+
+# Request timing instrumentation (main/instrumentation.py)
+# One JSON line per request: route, queries, DB/template/total ms, duplicate
+# queries and any budget overrun. `python manage.py route_timings` prints
+# p50/p95/p99 per route from this file.
+
+REQUEST_TIMING_LOG = BASE_DIR / "request_timings.jsonl"
+
+# Test runs log to a temporary directory instead (main/test_runner.py)
+TEST_RUNNER = "main.test_runner.TestRunner"
+
+# Per-route budgets keyed by URL name; "*" overrides the default for all routes
+REQUEST_BUDGETS = {
+    "*": {"queries": 20, "total_ms": 500},
+    "home": {"queries": 2, "total_ms": 100},
+    "customer_services": {"queries": 4, "total_ms": 150},
+    "customer_providers_by_service": {"queries": 6, "total_ms": 200},
+    "provider_view_bookings": {"queries": 6, "total_ms": 200},
+    "admin_dashboard": {"queries": 5, "total_ms": 150},
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "jsonl": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "request_timings": {
+            "class": "logging.FileHandler",
+            "filename": REQUEST_TIMING_LOG,
+            "formatter": "jsonl",
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "goservice.timings": {
+            "handlers": ["request_timings"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+
+# Live booking status stream (users.views.booking_events_view)
+# Serve it through goproject/asgi.py (e.g. `uvicorn goproject.asgi:application`).
+# Each open stream re-reads its bookings this often so status changes made by
+# other worker processes still arrive; 0 disables polling (single worker).
+
+BOOKING_EVENTS_POLL_SECONDS = 10
+
+
+# Offline gazetteer used to place addresses on the map (users.geo):
+# CSV of name, latitude, longitude. No network geocoding.
+
+GAZETTEER_FILE = BASE_DIR / "users" / "data" / "gazetteer.csv"
+
+
+# Background jobs (main/jobs.py), run by `python manage.py runworker`.
+# A failed job is retried after this many seconds, doubling per attempt.
+
+JOB_RETRY_BACKOFF_SECONDS = 10
+
+
+# Hot/cold booking archive (users/archive.py)
+# `python manage.py archive_bookings` moves completed/cancelled/rejected
+# bookings older than this into users_archivedbooking. History pages only
+# read the archive once they page back past this many days.
+
+BOOKING_ARCHIVE_DAYS = 90
+
+
+# Static bundles (main/staticfiles.py)
+# `python manage.py collectstatic` writes content-hashed copies of every
+# static file plus .gz/.br variants to STATIC_ROOT. With DEBUG off, Django
+# serves them with a one-year immutable Cache-Control (or point the front-end
+# server at STATIC_ROOT instead). Without a manifest {% static %} raises
+# ImproperlyConfigured unless DEBUG is on (override: STATICFILES_MANIFEST_REQUIRED).
+
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "main.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+
+
+# Password hashing pool (users/passwords.py)
+# The async login/signup views run PBKDF2 on this many threads; at most
+# PASSWORD_HASH_QUEUE_LIMIT hashes wait or run at once, beyond that the views
+# answer 503 with Retry-After. Size the pool to the cores left over for
+# serving pages. PASSWORD_HASH_OFFLOAD = False hashes inline (for comparison).
+
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_QUEUE_LIMIT = 64
+PASSWORD_HASH_OFFLOAD = True
+
+
+# Read replica (main/db_router.py)
+# Directory, catalogue and admin list pages read from the "replica" alias
+# when one is configured; writes and every other page use "default". After a
+# write the session reads from the primary for REPLICA_STICKY_SECONDS. Locally,
+# GOSERVICE_REPLICA_DB names a second SQLite file that stands in for the
+# replica; `python manage.py sync_replica` copies the primary into it.
+
+REPLICA_DATABASE = os.environ.get("GOSERVICE_REPLICA_DB")
+if REPLICA_DATABASE:
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": REPLICA_DATABASE,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["main.db_router.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = 15
+
+
+# SQLite production mode (main/sqlite.py)
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# writer; busy_timeout (ms) makes writers wait for the lock instead of
+# failing. Write views retry a locked transaction up to SQLITE_WRITE_ATTEMPTS
+# times with jittered exponential backoff from SQLITE_RETRY_BASE_DELAY seconds.
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "busy_timeout": 5000,
+    "synchronous": "normal",
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -16000,  # KiB
+}
+SQLITE_WRITE_ATTEMPTS = 5
+SQLITE_RETRY_BASE_DELAY = 0.02
+
+
+# Idempotency keys (users/idempotency.py)
+# Booking creation and payment confirmation run once per Idempotency-Key;
+# repeats within IDEMPOTENCY_KEY_TTL seconds get the stored response. A claim
+# whose request never finished frees the key after IDEMPOTENCY_LOCK_SECONDS.
+# Expired keys: `python manage.py purge_idempotency_keys`.
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_SECONDS = 60
@@ -4,3 +4,6 @@ from django.apps import AppConfig # type: ignore
 class MainConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "main"
+
+    def ready(self):
+        from . import instrumentation, signals, sqlite  # noqa: F401
@@ -0,0 +1,112 @@
+import time
+
+from django.apps import apps # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import transaction # type: ignore
+
+# -------------------------------
+# Versioned catalog cache
+# -------------------------------
+# Every cached value is keyed by a name plus the current version stamp of each
+# model it was built from. post_save/post_delete signals bump the stamp when
+# the write commits, so stale entries are never read again and simply age out. Hits and misses are
+# counted per name in the same cache, so a shared backend aggregates them
+# across workers.
+
+CATALOG_CACHE_TIMEOUT = 600
+STATS_NAMES_KEY = 'catalog:stats:names'
+
+
+def _label(model):
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    return model._meta.label_lower
+
+
+def _fresh_version():
+    # Seeded from the clock rather than 1, so a restarted or cleared cache
+    # never hands out a stamp (or ETag) that once described different data
+    return time.time_ns() // 1000
+
+
+def model_version(model):
+    return cache.get_or_set(f'catalog:version:{_label(model)}', _fresh_version, timeout=None)
+
+
+def model_modified(model):
+    # Unix time of the model's last bump (first use counts as a change)
+    return cache.get_or_set(f'catalog:modified:{_label(model)}', time.time, timeout=None)
+
+
+def _bump(label):
+    key = f'catalog:version:{label}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not set yet (or evicted): any fresh value invalidates old keys
+        cache.set(key, _fresh_version(), timeout=None)
+    cache.set(f'catalog:modified:{label}', time.time(), timeout=None)
+
+
+def bump_version(model, using=None):
+    """
+    Invalidate everything cached from ``model`` once the current transaction
+    commits (immediately when not in one). Bumping earlier would let a
+    reader cache the pre-commit rows under the new stamp.
+    """
+    label = _label(model)
+    transaction.on_commit(lambda: _bump(label), using=using)
+
+
+def versioned_key(name, models):
+    versions = ':'.join(f'{_label(m)}={model_version(m)}' for m in models)
+    return f'catalog:{name}:{versions}'
+
+
+def _count(name, outcome):
+    key = f'catalog:stats:{name}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+    names = cache.get(STATS_NAMES_KEY, set())
+    if name not in names:
+        cache.set(STATS_NAMES_KEY, names | {name}, timeout=None)
+
+
+def get_cached(name, models):
+    # Returns the cached value or None, counting the hit/miss
+    value = cache.get(versioned_key(name, models))
+    _count(name, 'miss' if value is None else 'hit')
+    return value
+
+
+def set_cached(name, models, value, timeout=CATALOG_CACHE_TIMEOUT):
+    cache.set(versioned_key(name, models), value, timeout)
+
+
+def cached_query(name, models, builder, timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    Return ``builder()`` (e.g. a list() of a queryset) from the cache,
+    rebuilding it only when one of ``models`` has changed.
+    """
+    value = get_cached(name, models)
+    if value is None:
+        value = builder()
+        set_cached(name, models, value, timeout)
+    return value
+
+
+def cache_stats():
+    stats = {}
+    for name in sorted(cache.get(STATS_NAMES_KEY, set())):
+        hits = cache.get(f'catalog:stats:{name}:hit', 0)
+        misses = cache.get(f'catalog:stats:{name}:miss', 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else 0.0,
+        }
+    return stats
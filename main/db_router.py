@@ -0,0 +1,124 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async # type: ignore
+from django.conf import settings # type: ignore
+from django.core.signals import request_finished # type: ignore
+from django.db import DEFAULT_DB_ALIAS, connections # type: ignore
+
+REPLICA_ALIAS = 'replica'
+# Session key: reads stay on the primary until this timestamp
+STICKY_SESSION_KEY = '_db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Read on the primary even inside replica views: sessions and auth (a login
+# must see its own user row), and the job queue
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes'}
+PRIMARY_ONLY_MODELS = {'users.customuser', 'main.job'}
+
+_read_alias = ContextVar('db_read_alias', default=None)
+
+
+# -------------------------------
+# Primary/replica routing
+# -------------------------------
+# Writes always go to the primary ("default"). Views marked @replica_reads
+# (directory, catalogue and admin list pages) read from the "replica" alias
+# when it is configured, for GET/HEAD only. Every other view reads from the
+# primary. After a successful write request (a booking, a status change, a
+# profile save) the session sticks to the primary for REPLICA_STICKY_SECONDS,
+# so the user reads their own writes even while the replica lags behind.
+
+def replica_configured():
+    return REPLICA_ALIAS in connections
+
+
+def replica_reads(view):
+    # Mark a read-only view whose queries may be served by the replica
+    view.replica_reads = True
+    return view
+
+
+def current_read_alias():
+    return _read_alias.get()
+
+
+def clear_read_alias(**kwargs):
+    _read_alias.set(None)
+
+
+# Streaming responses keep reading after the middleware returns: reset when
+# the response is closed instead
+request_finished.connect(clear_read_alias, dispatch_uid='main.db_router.clear_read_alias')
+
+
+def is_sticky(request):
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+
+def stick_to_primary(request):
+    request.session[STICKY_SESSION_KEY] = time.time() + getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None:
+            return None
+        meta = model._meta
+        if meta.app_label in PRIMARY_ONLY_APPS or meta.label_lower in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db == DEFAULT_DB_ALIAS
+
+
+def _wrote(request, response):
+    return (
+        request.method not in SAFE_METHODS and response.status_code < 400
+        and replica_configured() and hasattr(request, 'session')
+    )
+
+
+class ReplicaRoutingMiddleware:
+    # Goes after SessionMiddleware and AuthenticationMiddleware
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _read_alias.set(None)
+        response = self.get_response(request)
+        if _wrote(request, response):
+            stick_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        _read_alias.set(None)
+        response = await self.get_response(request)
+        if _wrote(request, response):
+            # May load the session from the database
+            await sync_to_async(stick_to_primary)(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            getattr(view_func, 'replica_reads', False) and request.method in SAFE_METHODS
+            and replica_configured() and not is_sticky(request)
+        ):
+            _read_alias.set(REPLICA_ALIAS)
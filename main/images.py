@@ -0,0 +1,119 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile # type: ignore
+from PIL import Image, ImageOps, UnidentifiedImageError # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Image Derivatives
+# -------------------------------
+# Avatars and service cards are shown at 60px, so each upload gets square
+# 1x/2x thumbnails stored next to the original, as WebP plus a JPEG fallback.
+# The name keeps the original's extension, so ajay.jpg and ajay.png never
+# share derivatives:
+#   profile_pics/ajay.jpg -> profile_pics/ajay.jpg_60.webp, profile_pics/ajay.jpg_60.jpg, ...
+
+THUMBNAIL_SIZES = (60, 120)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_name(name, size, ext):
+    return f"{name}_{size}.{ext}"
+
+
+def legacy_derivative_name(name, size, ext):
+    # Earlier scheme without the original's extension (ajay_60.webp)
+    stem, _ = os.path.splitext(name)
+    return f"{stem}_{size}.{ext}"
+
+
+def has_derivatives(fieldfile):
+    return fieldfile.storage.exists(derivative_name(fieldfile.name, THUMBNAIL_SIZES[0], 'webp'))
+
+
+def generate_derivatives(fieldfile, force=False):
+    """
+    Write every thumbnail size/format for an ImageField file. Returns the
+    number of files written (0 if they already existed or the file is not a
+    readable image).
+    """
+    if not fieldfile or (not force and has_derivatives(fieldfile)):
+        return 0
+
+    storage = fieldfile.storage
+    try:
+        with storage.open(fieldfile.name, 'rb') as original:
+            image = ImageOps.exif_transpose(Image.open(original))
+            image.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as e:
+        logger.warning(f'Skipping derivatives for {fieldfile.name}: {e}')
+        return 0
+
+    written = 0
+    for size in THUMBNAIL_SIZES:
+        thumb = ImageOps.fit(image.convert('RGB'), (size, size), Image.LANCZOS)
+        for ext, (pil_format, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            thumb.save(buffer, pil_format, **options)
+            name = derivative_name(fieldfile.name, size, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+            written += 1
+    return written
+
+
+def derivative_url(fieldfile, size, ext, available=None):
+    """
+    URL of one derivative, falling back to the original until it is
+    backfilled. Pass ``available`` (has_derivatives()) when the caller
+    already checked, to skip another storage lookup.
+    """
+    if available is None:
+        available = has_derivatives(fieldfile)
+    if not available:
+        return fieldfile.url
+    return fieldfile.storage.url(derivative_name(fieldfile.name, size, ext))
+
+
+def derivative_srcset(fieldfile, ext, available=None):
+    # "<url_60> 1x, <url_120> 2x" for a <source>/<img> srcset attribute
+    if available is None:
+        available = has_derivatives(fieldfile)
+    if not available:
+        return fieldfile.url
+    base = THUMBNAIL_SIZES[0]
+    return ', '.join(
+        f"{fieldfile.storage.url(derivative_name(fieldfile.name, size, ext))} {size // base}x"
+        for size in THUMBNAIL_SIZES
+    )
+
+
+def delete_derivatives(fieldfile):
+    for size in THUMBNAIL_SIZES:
+        for ext in DERIVATIVE_FORMATS:
+            name = derivative_name(fieldfile.name, size, ext)
+            if fieldfile.storage.exists(name):
+                fieldfile.storage.delete(name)
+
+
+def delete_legacy_derivatives(fieldfile, originals):
+    """
+    Remove derivatives written under the earlier naming scheme, except names
+    in ``originals`` (uploads that merely look like one). Returns the number
+    of files deleted.
+    """
+    deleted = 0
+    for size in THUMBNAIL_SIZES:
+        for ext in DERIVATIVE_FORMATS:
+            name = legacy_derivative_name(fieldfile.name, size, ext)
+            if name not in originals and fieldfile.storage.exists(name):
+                fieldfile.storage.delete(name)
+                deleted += 1
+    return deleted
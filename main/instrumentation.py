@@ -0,0 +1,169 @@
+import json
+import logging
+import math
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction # type: ignore
+from django.conf import settings # type: ignore
+from django.db.backends.signals import connection_created # type: ignore
+from django.dispatch import receiver # type: ignore
+from django.template.backends.django import DjangoTemplates, Template # type: ignore
+from django.utils import timezone # type: ignore
+
+logger = logging.getLogger('goservice.timings')
+
+# -------------------------------
+# Per-request timing instrumentation
+# -------------------------------
+# RequestTimingMiddleware records, per request: route name, query count, DB
+# time, template render time and wall time. Repeated identical SQL (the N+1
+# signature) is flagged, and each request is compared against the budget for
+# its route in settings.REQUEST_BUDGETS. One JSON line per request goes to the
+# "goservice.timings" logger (WARNING when over budget); see the
+# route_timings command for p50/p95/p99 per route.
+#
+# The current request's QueryRecorder lives in a ContextVar rather than in
+# per-connection execute_wrapper() blocks: under ASGI the view's queries run
+# on sync_to_async threads (each with its own connections), which inherit
+# the request's context but not the middleware thread's connections.
+
+_recorder = ContextVar('request_recorder', default=None)
+
+DEFAULT_BUDGET = {'queries': 20, 'total_ms': 500}
+# Same SQL this many times in one request is reported as a likely N+1
+DUPLICATE_THRESHOLD = 3
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            recorder = _recorder.get()
+            if recorder is not None:
+                recorder.template_seconds += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates backend whose top-level renders are timed. {% include %}
+    and {% extends %} run inside the outer render, so nothing is counted twice.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.template_seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        return {sql: n for sql, n in self.statements.items() if n >= DUPLICATE_THRESHOLD}
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created, dispatch_uid='main.instrumentation.record_queries')
+def record_queries(sender, connection, **kwargs):
+    # First in the list: execute_wrapper() blocks open at connect time pop their own
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def budget_for(route):
+    budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+    return {**DEFAULT_BUDGET, **budgets.get('*', {}), **budgets.get(route, {})}
+
+
+class RequestTimingMiddleware:
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    def report(self, request, response, recorder, total):
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.view_name) if match else None
+        record = {
+            'ts': timezone.now().isoformat(),
+            'route': route or request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.seconds * 1000, 2),
+            'template_ms': round(recorder.template_seconds * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+
+        duplicates = recorder.duplicates()
+        if duplicates:
+            record['duplicate_queries'] = sum(n - 1 for n in duplicates.values())
+            record['top_duplicate'] = max(duplicates, key=duplicates.get)[:200]
+
+        budget = budget_for(record['route'])
+        over = [metric for metric, limit in budget.items() if record.get(metric, 0) > limit]
+        if over:
+            record['over_budget'] = over
+
+        logger.log(logging.WARNING if over or duplicates else logging.INFO, json.dumps(record))
+        response['Server-Timing'] = (
+            f"db;dur={record['db_ms']}, tpl;dur={record['template_ms']}, total;dur={record['total_ms']}"
+        )
+        return response
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
@@ -0,0 +1,218 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings # type: ignore
+from django.db import connections # type: ignore
+from django.db.models import F, Q # type: ignore
+from django.utils import timezone # type: ignore
+from django.utils.module_loading import import_string # type: ignore
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Background job queue
+# -------------------------------
+# Jobs are rows in main_job, so no broker is needed. enqueue() inserts a row
+# (inside the caller's transaction: a rolled-back request never runs its
+# jobs). `python manage.py runworker` claims ready rows with a conditional
+# UPDATE, which works without SELECT ... FOR UPDATE on SQLite, and runs them
+# on a thread or process pool. A claimed job holds a lease until
+# locked_until; if the worker dies the lease expires and another worker picks
+# the job up again. Failures are retried with exponential backoff until
+# max_attempts, then left as 'failed' with the traceback in last_error.
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_TIMEOUT = 300  # seconds a claim stays invisible to other workers
+BACKOFF_CAP = 3600
+
+
+def job(max_attempts=DEFAULT_MAX_ATTEMPTS, timeout=DEFAULT_TIMEOUT):
+    """
+    Mark a module-level function as runnable by the worker. Arguments must be
+    JSON-serializable (pass ids, not model instances).
+    """
+    def decorate(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.job_max_attempts = max_attempts
+        func.job_timeout = timeout
+        return func
+    return decorate
+
+
+def enqueue(func, *args, delay=0, **kwargs):
+    if not hasattr(func, 'job_name'):
+        raise ValueError(f'{func!r} is not decorated with @job')
+    return Job.objects.create(
+        task=func.job_name, args=list(args), kwargs=kwargs, max_attempts=func.job_max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def retry_delay(attempts):
+    # 10s, 20s, 40s ... with +-20% jitter so retries of a burst spread out
+    base = getattr(settings, 'JOB_RETRY_BACKOFF_SECONDS', 10)
+    delay = min(base * 2 ** (attempts - 1), BACKOFF_CAP)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _ready(now):
+    # Due queued jobs, plus running jobs whose worker lost its lease
+    return Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def claim(worker_id, limit=1):
+    """
+    Take up to ``limit`` ready jobs for ``worker_id``. Each row is claimed
+    with an UPDATE guarded by the same readiness condition, so two workers
+    racing for a row cannot both win it. Returns the claimed Job rows.
+    """
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(_ready(now)).order_by('run_at', 'id').values_list('id', 'task')[:limit * 4]
+    )
+    claimed = []
+    for job_id, task in candidates:
+        if len(claimed) >= limit:
+            break
+        try:
+            timeout = import_string(task).job_timeout
+        except (ImportError, AttributeError):
+            timeout = DEFAULT_TIMEOUT
+        won = Job.objects.filter(_ready(now), id=job_id).update(
+            status='running', locked_by=worker_id, attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=timeout),
+        )
+        if won:
+            claimed.append(job_id)
+    return list(Job.objects.filter(id__in=claimed).order_by('run_at', 'id'))
+
+
+def execute(job_id, worker_id):
+    """
+    Run one claimed job and record the outcome. Returns the final status.
+    Only the worker still holding the lease may record it.
+    """
+    job_row = Job.objects.get(id=job_id)
+    owned = Job.objects.filter(id=job_id, status='running', locked_by=worker_id)
+
+    if job_row.attempts > job_row.max_attempts:
+        # Lease expired on the last attempt (worker crashed or hung)
+        owned.update(status='failed', locked_until=None, finished_at=timezone.now(),
+                     last_error=job_row.last_error or 'Visibility timeout expired on the final attempt.')
+        return 'failed'
+
+    try:
+        func = import_string(job_row.task)
+        if not hasattr(func, 'job_name'):
+            raise ImportError(f'{job_row.task} is not a @job function')
+        func(*job_row.args, **job_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job_row.attempts >= job_row.max_attempts:
+            owned.update(status='failed', locked_until=None, finished_at=timezone.now(), last_error=error)
+            logger.error(f'Job {job_id} {job_row.task} failed for good: {error.splitlines()[-1]}')
+            return 'failed'
+        owned.update(
+            status='queued', locked_until=None, last_error=error,
+            run_at=timezone.now() + timedelta(seconds=retry_delay(job_row.attempts)),
+        )
+        logger.warning(f'Job {job_id} {job_row.task} failed (attempt {job_row.attempts}), retrying')
+        return 'queued'
+
+    owned.update(status='done', locked_until=None, finished_at=timezone.now(), last_error='')
+    return 'done'
+
+
+def _execute_in_pool(job_id, worker_id):
+    try:
+        return execute(job_id, worker_id)
+    finally:
+        # Pool threads/processes outlive the job: do not hold connections open
+        connections.close_all()
+
+
+def run_pending(worker_id='inline', limit=None):
+    """
+    Run every ready job in this thread until none are left (or ``limit`` ran).
+    Used by tests and `runworker --once`. Returns the number of jobs run.
+    """
+    ran = 0
+    while limit is None or ran < limit:
+        jobs = claim(worker_id)
+        if not jobs:
+            return ran
+        execute(jobs[0].id, worker_id)
+        ran += 1
+    return ran
+
+
+def purge_finished(older_than_days=7):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def _setup_process():
+    # Needed under the spawn start method; a no-op after fork
+    import django # type: ignore
+    django.setup()
+
+
+class Worker:
+    """
+    Claims jobs and runs them on a pool of ``concurrency`` threads (or
+    processes). stop() lets running jobs finish and exits the loop.
+    """
+
+    def __init__(self, concurrency=4, use_processes=False, poll_interval=1.0):
+        self.concurrency = concurrency
+        self.use_processes = use_processes
+        self.poll_interval = poll_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{id(self):x}'
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self, once=False):
+        """
+        Loop until stop() (or, with ``once``, until no job is ready and all
+        claimed jobs finished). Returns the number of jobs run.
+        """
+        if self.use_processes:
+            # Children must open their own connections, not share the parent's
+            connections.close_all()
+            pool = ProcessPoolExecutor(self.concurrency, initializer=_setup_process)
+        else:
+            pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='job')
+        running = set()
+        ran = 0
+        try:
+            while not self._stopping.is_set():
+                free = self.concurrency - len(running)
+                claimed = claim(self.worker_id, free) if free else []
+                for job_row in claimed:
+                    running.add(pool.submit(_execute_in_pool, job_row.id, self.worker_id))
+
+                if not running:
+                    if once:
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ran += 1
+                    if future.exception():
+                        logger.error(f'Worker pool error: {future.exception()}')
+        finally:
+            pool.shutdown(wait=True)
+            connections.close_all()
+        return ran
@@ -0,0 +1,227 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection # type: ignore
+from django.test import Client # type: ignore
+from django.urls import get_resolver, reverse # type: ignore
+
+from main.instrumentation import percentile
+from main.models import Service
+from users.models import Booking, CustomUser
+
+# -------------------------------
+# In-process load driver
+# -------------------------------
+# Logs in once per role and replays every named route from users/urls.py and
+# main/urls.py from a thread pool through Django's test Client (no server or
+# network). Routes that delete data or end the session are listed in
+# UNSAFE_ROUTES and reported as skipped.
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+# Routes whose POST body is JSON rather than form data
+JSON_ROUTES = {'update_booking_status', 'batch_update_booking_status'}
+
+UNSAFE_ROUTES = {
+    'admin_delete_provider': 'deletes a provider',
+    'admin_delete_customer': 'deletes a customer',
+    'logout': 'ends the session',
+}
+
+
+def route_plan(sample):
+    """
+    route name -> (role, method, url kwargs, POST data, extra headers).
+    ``sample`` holds a profession name and a booking owned by the sampled
+    customer/provider.
+    """
+    booking = sample['booking']
+    profession = {'profession_name': sample['profession']}
+    return {
+        # Public
+        'home': ('anon', 'get', {}, None, {}),
+        'signup_customer': ('anon', 'get', {}, None, {}),
+        'login_customer': ('anon', 'get', {}, None, {}),
+        'signup_provider': ('anon', 'get', {}, None, {}),
+        'login_provider': ('anon', 'get', {}, None, {}),
+        'login_admin': ('anon', 'get', {}, None, {}),
+        # Customer
+        'customer_dashboard': ('customer', 'get', {}, None, {}),
+        'customer_profile': ('customer', 'get', {}, None, {}),
+        'customer_services': ('customer', 'get', {}, None, {}),
+        'customer_providers_by_service': ('customer', 'get', profession, lambda rng: rng.choice([{}, {'sort': 'nearest'}, {'sort': 'rated', 'min_rating': 4}]), {}),
+        'provider_search': ('customer', 'get', {}, lambda rng: {'q': rng.choice([sample['profession'], 'mg road', 'seed'])}, {}),
+        'customer_bookings': ('customer', 'get', {}, None, {}),
+        'customer_review': ('customer', 'get', {}, None, {}),
+        'payment': ('customer', 'get', {'booking_id': booking.id}, None, {}),
+        'payment_success': ('customer', 'get', {'booking_id': booking.id}, None, {}),
+        'cod_confirmation': ('customer', 'get', {'booking_id': booking.id}, None, {}),
+        'create_booking': ('customer', 'post', {}, lambda rng: {
+            'service_id': booking.service_id, 'provider_id': booking.provider_id,
+            'schedule_date': f'2030-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'timing': rng.choice(list(Booking.TIMING_SLOTS)),
+        }, AJAX),
+        # Unknown id: exercises the lookup without cancelling real bookings
+        'cancel_booking': ('customer', 'post', {}, lambda rng: {'booking_id': 0}, {}),
+        # Test Client is WSGI: the stream sends its snapshot and closes
+        'booking_events': ('customer', 'get', {}, None, {}),
+        # JSON API
+        'api_services': ('anon', 'get', {}, None, {}),
+        'api_providers': ('anon', 'get', profession, lambda rng: rng.choice([{}, {'sort': 'rated'}]), {}),
+        'api_bookings': ('customer', 'get', {}, None, {}),
+        'api_reviews': ('customer', 'get', {}, None, {}),
+        # Provider
+        'provider_dashboard': ('provider', 'get', {}, None, {}),
+        'provider_view_bookings': ('provider', 'get', {}, None, {}),
+        'provider_profile': ('provider', 'get', {}, None, {}),
+        'list_service': ('provider', 'get', {}, None, {}),
+        'update_booking_status': ('provider', 'post', {'booking_id': booking.id}, lambda rng: {
+            'status': rng.choice(['confirmed', 'arriving', 'arrived']),
+        }, {}),
+        'batch_update_booking_status': ('provider', 'post', {}, lambda rng: {'updates': [
+            {'booking_id': booking_id, 'status': rng.choice(['confirmed', 'arriving', 'arrived'])}
+            for booking_id in sample['provider_booking_ids']
+        ]}, {}),
+        # Admin
+        'admin_dashboard': ('admin', 'get', {}, None, {}),
+        'admin_view_providers': ('admin', 'get', {}, None, {}),
+        'admin_view_customers': ('admin', 'get', {}, None, {}),
+        'admin_export_bookings': ('admin', 'get', {}, lambda rng: {'status': rng.choice(['', 'completed']), 'format': rng.choice(['csv', 'jsonl'])}, {}),
+        'admin_export_earnings': ('admin', 'get', {}, lambda rng: {'profession': sample['profession']}, {}),
+        'add_service': ('admin', 'get', {}, None, {}),
+        'view_services': ('admin', 'get', {}, None, {}),
+        'providers_by_profession': ('admin', 'get', profession, None, {}),
+        'cache_stats': ('admin', 'get', {}, None, {}),
+        # GET only redirects; deletion needs POST
+        'delete_service': ('admin', 'get', {'service_id': sample['service_id']}, None, {}),
+    }
+
+
+def named_routes():
+    names = set()
+    for app in ('users.urls', 'main.urls'):
+        for pattern in get_resolver(app).url_patterns:
+            if pattern.name:
+                names.add(pattern.name)
+    return names
+
+
+def pick_sample():
+    booking = Booking.objects.select_related('service__service_type', 'customer__user', 'provider__user').order_by('-id').first()
+    admin = CustomUser.objects.filter(role='admin').first() or CustomUser.objects.filter(is_superuser=True).first()
+    if booking is None or admin is None:
+        raise ValueError('Need at least one booking and one admin user; run seed_data and createsuperuser first.')
+    return {
+        'booking': booking,
+        'profession': booking.service.service_type.profession_name,
+        'service_id': Service.objects.order_by('id').values_list('id', flat=True).first(),
+        'provider_booking_ids': list(
+            Booking.objects.filter(provider_id=booking.provider_id).exclude(status__in=['completed', 'cancelled'])
+            .order_by('-id').values_list('id', flat=True)[:10]
+        ),
+        'users': {
+            'customer': booking.customer.user,
+            'provider': booking.provider.user,
+            'admin': admin,
+        },
+    }
+
+
+def run_load(iterations=20, concurrency=8, seed=0):
+    """
+    Hit every planned route ``iterations`` times from ``concurrency`` threads.
+    Returns a report dict with per-route latency percentiles and throughput.
+    """
+    sample = pick_sample()
+    plan = route_plan(sample)
+    skipped = {name: UNSAFE_ROUTES.get(name, 'no plan') for name in named_routes() - set(plan)}
+
+    rng = random.Random(seed)
+    jobs = [name for name in plan for _ in range(iterations)]
+    rng.shuffle(jobs)
+
+    local = threading.local()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def client_for(role):
+        # One logged-in Client per role per thread
+        clients = getattr(local, 'clients', None)
+        if clients is None:
+            clients = local.clients = {}
+        if role not in clients:
+            client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+            if role != 'anon':
+                client.force_login(sample['users'][role])
+            clients[role] = client
+        return clients[role]
+
+    def hit(name):
+        role, method, kwargs, data, headers = plan[name]
+        payload = data(rng) if callable(data) else data
+        if name in JSON_ROUTES:
+            call = lambda c: c.post(reverse(name, kwargs=kwargs), json.dumps(payload), content_type='application/json')
+        else:
+            call = lambda c: getattr(c, method)(reverse(name, kwargs=kwargs), payload, **headers)
+        start = time.perf_counter()
+        try:
+            response = call(client_for(role))
+            if response.streaming:
+                # Exports and event streams do their work while streaming
+                b''.join(response.streaming_content)
+            status = response.status_code
+        except Exception:
+            status = 500
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies[name].append(elapsed)
+            if status >= 500:
+                errors[name] += 1
+
+    def worker(names):
+        try:
+            for name in names:
+                hit(name)
+        finally:
+            connection.close()
+
+    chunks = [jobs[i::concurrency] for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, chunks))
+    wall = time.perf_counter() - started
+
+    routes = {}
+    for name, values in latencies.items():
+        values.sort()
+        routes[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'p50_ms': round(percentile(values, 50), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2),
+        }
+    return {
+        'concurrency': concurrency,
+        'requests': len(jobs),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(jobs) / wall, 1) if wall else 0.0,
+        'routes': routes,
+        'skipped': skipped,
+    }
+
+
+def compare(report, baseline):
+    # route -> (baseline p95, current p95, % change); positive is slower
+    changes = {}
+    for name, current in report['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if before and before['p95_ms']:
+            delta = (current['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            changes[name] = (before['p95_ms'], current['p95_ms'], round(delta, 1))
+    return changes
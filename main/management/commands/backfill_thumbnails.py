@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand # type: ignore
+from main.images import delete_legacy_derivatives, generate_derivatives
+from main.models import Service
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate thumbnail and WebP derivatives for existing profile pictures and service images, '
+        'and remove derivatives left under the old naming scheme.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that already exist.')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        images = 0
+        files = 0
+        removed = 0
+
+        # Never delete an upload whose name happens to match the old derivative scheme
+        originals = set(CustomUser.objects.exclude(profile_pic='').values_list('profile_pic', flat=True))
+        originals.update(Service.objects.exclude(image='').values_list('image', flat=True))
+
+        sources = (
+            (user.profile_pic for user in CustomUser.objects.exclude(profile_pic='').only('profile_pic').iterator()),
+            (service.image for service in Service.objects.exclude(image='').only('image').iterator()),
+        )
+        for source in sources:
+            for fieldfile in source:
+                written = generate_derivatives(fieldfile, force=force)
+                if written:
+                    images += 1
+                    files += written
+                removed += delete_legacy_derivatives(fieldfile, originals)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {images} image(s), {files} derivative file(s) written, {removed} old-style file(s) removed.'
+        ))
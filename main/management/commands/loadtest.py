@@ -0,0 +1,52 @@
+import json
+
+from django.conf import settings # type: ignore
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from main.loadtest import compare, run_load
+
+
+class Command(BaseCommand):
+    help = 'Replay every named GoService route concurrently in-process and report throughput and latency percentiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per route.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Worker threads.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'loadtest_baseline.json'),
+                            help='Baseline JSON file to compare against (and write with --save-baseline).')
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline.')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_load(options['iterations'], options['concurrency'], options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        try:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = None
+
+        changes = compare(report, baseline) if baseline else {}
+        header = f"{'route':<32}{'reqs':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'vs base':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in sorted(report['routes'].items()):
+            delta = f"{changes[name][2]:+.1f}%" if name in changes else '-'
+            self.stdout.write(
+                f"{name[:31]:<32}{row['requests']:>6}{row['errors']:>5}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{delta:>10}"
+            )
+        for name, reason in sorted(report['skipped'].items()):
+            self.stdout.write(f'skipped {name}: {reason}')
+
+        summary = f"{report['requests']} requests in {report['wall_seconds']}s = {report['throughput_rps']} req/s"
+        if baseline:
+            summary += f" (baseline {baseline['throughput_rps']} req/s)"
+        self.stdout.write(self.style.SUCCESS(summary))
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
@@ -0,0 +1,45 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings # type: ignore
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from main.instrumentation import percentile
+
+
+class Command(BaseCommand):
+    help = 'Print p50/p95/p99 latency, query counts and budget overruns per route from the request timing log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=str(settings.REQUEST_TIMING_LOG), help='JSON-lines timing log to read.')
+        parser.add_argument('--route', help='Only report this route name.')
+
+    def handle(self, *args, **options):
+        routes = defaultdict(list)
+        try:
+            with open(options['log']) as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if options['route'] and record.get('route') != options['route']:
+                        continue
+                    routes[record.get('route')].append(record)
+        except FileNotFoundError:
+            raise CommandError(f"No timing log at {options['log']}")
+
+        header = f"{'route':<32}{'reqs':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'avg q':>8}{'avg db':>9}{'avg tpl':>9}{'n+1':>6}{'over':>6}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for route, records in sorted(routes.items(), key=lambda item: -len(item[1])):
+            totals = sorted(r['total_ms'] for r in records)
+            n = len(records)
+            self.stdout.write(
+                f"{str(route)[:31]:<32}{n:>7}"
+                f"{percentile(totals, 50):>10.1f}{percentile(totals, 95):>10.1f}{percentile(totals, 99):>10.1f}"
+                f"{sum(r['queries'] for r in records) / n:>8.1f}"
+                f"{sum(r['db_ms'] for r in records) / n:>9.1f}"
+                f"{sum(r['template_ms'] for r in records) / n:>9.1f}"
+                f"{sum(1 for r in records if r.get('duplicate_queries')):>6}"
+                f"{sum(1 for r in records if r.get('over_budget')):>6}"
+            )
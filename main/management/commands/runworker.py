@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand # type: ignore
+from main.jobs import Worker, purge_finished
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue (no external broker).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs run at the same time.')
+        parser.add_argument('--processes', action='store_true', help='Use a process pool instead of threads (CPU-bound jobs).')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between queue polls when idle.')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is ready.')
+        parser.add_argument('--purge-days', type=int, default=7, help='Delete finished jobs older than this on start.')
+
+    def handle(self, *args, **options):
+        purged = purge_finished(options['purge_days'])
+        worker = Worker(options['concurrency'], options['processes'], options['poll'])
+
+        # Finish running jobs on Ctrl+C / SIGTERM instead of abandoning their leases
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        pool = 'processes' if options['processes'] else 'threads'
+        self.stdout.write(f"Worker {worker.worker_id}: {options['concurrency']} {pool}, purged {purged} old jobs")
+        ran = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped after {ran} jobs.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from django.db import DEFAULT_DB_ALIAS, connections # type: ignore
+from main.db_router import REPLICA_ALIAS, replica_configured
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the local replica file (GOSERVICE_REPLICA_DB), '
+        'standing in for replication when testing the primary/replica router.'
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica database configured; set GOSERVICE_REPLICA_DB.')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[REPLICA_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('sync_replica only copies SQLite databases; use real replication elsewhere.')
+
+        # The online backup API copies a consistent snapshot while the primary stays writable
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+        self.stdout.write(self.style.SUCCESS(f'Copied {primary.settings_dict["NAME"]} to {replica.settings_dict["NAME"]}.'))
@@ -4,8 +4,48 @@ class Service(models.Model):
     profession_name = models.CharField(max_length=100)
     image = models.ImageField(upload_to='services/')
 
+    class Meta:
+        indexes = [
+            # Directory and API look services up by name
+            models.Index(fields=['profession_name'], name='service_profession_idx'),
+        ]
+
     def __str__(self):
         return self.profession_name
 
 
 
+
+# -------------------------------
+# Background jobs (main/jobs.py)
+# -------------------------------
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not picked up before this time (retries are pushed back with backoff)
+    run_at = models.DateTimeField()
+    # Visibility timeout: a running job whose lease expired is handed out again
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save # type: ignore
+from django.dispatch import receiver # type: ignore
+from .cache import bump_version
+from .images import delete_derivatives
+from .jobs import enqueue
+from .models import Service
+from .tasks import build_derivatives
+
+
+# -------------------------------
+# Service image thumbnails
+# -------------------------------
+@receiver(post_save, sender=Service)
+def service_image_derivatives(sender, instance, **kwargs):
+    # Resizing is slow: leave it to the worker
+    if instance.image:
+        enqueue(build_derivatives, 'main.Service', instance.pk, 'image')
+
+
+@receiver(post_delete, sender=Service)
+def service_image_cleanup(sender, instance, **kwargs):
+    if instance.image:
+        delete_derivatives(instance.image)
+
+
+# -------------------------------
+# Catalog cache invalidation
+# -------------------------------
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_catalog_changed(sender, using, **kwargs):
+    bump_version(Service, using=using)
@@ -0,0 +1,90 @@
+import random
+import threading
+import time
+
+from django.conf import settings # type: ignore
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction # type: ignore
+from django.db.backends.signals import connection_created # type: ignore
+from django.dispatch import receiver # type: ignore
+
+# Used when settings.SQLITE_PRAGMAS is not set
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': 5000,
+    'synchronous': 'normal',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16000,
+}
+
+
+# -------------------------------
+# SQLite production mode
+# -------------------------------
+# SQLite allows one writer at a time. In rollback-journal mode that writer
+# also blocks every reader, and a transaction that reads first and writes
+# later can fail with "database is locked" without waiting at all when two
+# of them try to upgrade at once. Three settings together fix this:
+#   * SQLITE_PRAGMAS, applied to every new connection below: WAL (readers
+#     never wait for the writer), busy_timeout (writers queue instead of
+#     failing), synchronous=NORMAL (safe with WAL, one fsync per checkpoint
+#     instead of per commit), and a larger page cache plus mmap for reads.
+#   * OPTIONS["transaction_mode"] = "IMMEDIATE": atomic() takes the write
+#     lock at BEGIN, where busy_timeout applies, not halfway through.
+#   * retry_write() around the hot write transactions, for the locks that
+#     still time out under a burst: it retries with jittered backoff.
+
+@receiver(connection_created, dispatch_uid='main.sqlite.apply_pragmas')
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked_error(error):
+    message = str(error).lower()
+    return isinstance(error, OperationalError) and ('locked' in message or 'busy' in message)
+
+
+_lock = threading.Lock()
+_stats = {'transactions': 0, 'retries': 0, 'gave_up': 0}
+
+
+def retry_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def _count(**deltas):
+    with _lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def retry_write(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` in its own transaction and return its
+    result. If the database is locked, the transaction is rolled back and
+    run again after a random delay, up to SQLITE_WRITE_ATTEMPTS times. Inside
+    an outer transaction a retry is impossible, so ``func`` runs once.
+    ``func`` must be safe to run again after a rollback.
+    """
+    attempts = getattr(settings, 'SQLITE_WRITE_ATTEMPTS', 5)
+    if connections[using].in_atomic_block:
+        attempts = 1
+    base_delay = getattr(settings, 'SQLITE_RETRY_BASE_DELAY', 0.02)
+    _count(transactions=1)
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_locked_error(e) or attempt == attempts - 1:
+                if is_locked_error(e):
+                    _count(gave_up=1)
+                raise
+        _count(retries=1)
+        # Full jitter: spreads out writers that collided at the same moment
+        time.sleep(random.uniform(0, base_delay * 2 ** attempt))
@@ -0,0 +1,131 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings # type: ignore
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage # type: ignore
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation # type: ignore
+from django.http import FileResponse, Http404, HttpResponseNotModified # type: ignore
+from django.utils._os import safe_join # type: ignore
+from django.utils.cache import patch_vary_headers # type: ignore
+from django.utils.http import http_date # type: ignore
+from django.views.static import was_modified_since # type: ignore
+
+try:
+    import brotli # type: ignore
+except ImportError:
+    brotli = None
+
+# -------------------------------
+# Static bundles
+# -------------------------------
+# Page CSS/JS lives in <app>/static/<app>/css|js instead of inline blocks, so
+# browsers cache it across pages. `python manage.py collectstatic` copies it
+# to STATIC_ROOT under content-hashed names (index.3f2a9c1b7d4e.css, listed in
+# staticfiles.json) and writes .gz (and .br when the optional `brotli`
+# package is installed) next to every text file. serve_static() answers with
+# the pre-compressed variant the client accepts; a front-end server can serve
+# STATIC_ROOT the same way (nginx gzip_static / brotli_static).
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+# Smaller files gain nothing once headers are counted
+MIN_COMPRESS_SIZE = 256
+# Hashed names never change content: cache for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_MAX_AGE = 60
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+def encodings():
+    # (Accept-Encoding token, file suffix, compressor), preferred first
+    available = []
+    if brotli is not None:
+        available.append(('br', '.br', lambda data: brotli.compress(data, quality=11)))
+    available.append(('gzip', '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)))
+    return available
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes pre-compressed variants of
+    the hashed files. Until the first collectstatic has written a manifest,
+    {% static %} falls back to plain names while developing; with DEBUG off
+    (STATICFILES_MANIFEST_REQUIRED) a missing manifest is an error instead
+    of silently serving uncompressed, unhashed files.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            if getattr(settings, 'STATICFILES_MANIFEST_REQUIRED', not settings.DEBUG):
+                raise ImproperlyConfigured(
+                    f'No staticfiles manifest in {self.location}; run `python manage.py collectstatic`.'
+                )
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        # Returns the variant names written
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return []
+        path = self.path(name)
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+        written = []
+        for _, suffix, compressor in encodings():
+            compressed = compressor(data)
+            if len(compressed) >= len(data):
+                continue
+            with open(path + suffix, 'wb') as handle:
+                handle.write(compressed)
+            written.append(name + suffix)
+        return written
+
+
+def serve_static(request, path):
+    """
+    Serve a collected file from STATIC_ROOT, picking a pre-compressed
+    variant from Accept-Encoding. Hashed names get a one-year immutable
+    Cache-Control.
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found.')
+    if not os.path.isfile(fullpath) or fullpath.endswith(('.gz', '.br')):
+        raise Http404('Not found.')
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    accepted = {token.split(';')[0].strip() for token in request.headers.get('Accept-Encoding', '').split(',')}
+    served, encoding = fullpath, None
+    for token, suffix, _ in encodings():
+        if token in accepted and os.path.isfile(fullpath + suffix):
+            served, encoding = fullpath + suffix, token
+            break
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = FileResponse(
+        open(served, 'rb'), content_type=content_type or 'application/octet-stream',
+        filename=os.path.basename(fullpath),
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_NAME.search(path):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,15 @@
+from django.apps import apps # type: ignore
+from .images import generate_derivatives
+from .jobs import job
+
+
+# -------------------------------
+# Background tasks (run by `python manage.py runworker`)
+# -------------------------------
+@job(max_attempts=3, timeout=120)
+def build_derivatives(model_label, pk, field_name):
+    # Thumbnails/WebP for one ImageField; the row may be gone by now
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only(field_name).first()
+    if instance is not None:
+        generate_derivatives(getattr(instance, field_name))
@@ -0,0 +1,43 @@
+from django import template # type: ignore
+from main.cache import get_cached, set_cached
+
+register = template.Library()
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, name, models):
+        self.nodelist = nodelist
+        self.name = name
+        self.models = models
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        models = [model.resolve(context) for model in self.models]
+        html = get_cached(name, models)
+        if html is None:
+            html = self.nodelist.render(context)
+            set_cached(name, models, html)
+        return html
+
+
+@register.tag('versioned_cache')
+def do_versioned_cache(parser, token):
+    """
+    Cache a rendered fragment until one of the listed models changes:
+
+        {% versioned_cache "customer_services_grid" "main.Service" %}
+            ...
+        {% endversioned_cache %}
+
+    Only wrap markup that is identical for every user (no csrf_token).
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name and at least one model label.")
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    return VersionedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -0,0 +1,37 @@
+from django import template # type: ignore
+from django.utils.html import format_html # type: ignore
+from main.images import THUMBNAIL_SIZES, derivative_srcset, derivative_url, has_derivatives
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(fieldfile, size=THUMBNAIL_SIZES[0]):
+    # {{ user.profile_pic|thumbnail }} -> URL of the 60px JPEG derivative
+    return derivative_url(fieldfile, int(size), 'jpg')
+
+
+@register.filter
+def srcset(fieldfile, ext='webp'):
+    # {{ user.profile_pic|srcset:"webp" }} -> "....jpg_60.webp 1x, ....jpg_120.webp 2x"
+    return derivative_srcset(fieldfile, ext)
+
+
+@register.simple_tag
+def picture(fieldfile, alt='', css_class='', size=THUMBNAIL_SIZES[0]):
+    """
+    {% picture user.profile_pic alt="Profile" css_class="rounded-circle" %}
+    renders a <picture> with a WebP source and a JPEG fallback thumbnail.
+    Storage is checked once per tag, not once per URL.
+    """
+    available = has_derivatives(fieldfile)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}" alt="{}" class="{}" width="{}" height="{}" loading="lazy">'
+        '</picture>',
+        derivative_srcset(fieldfile, 'webp', available),
+        derivative_url(fieldfile, size, 'jpg', available),
+        derivative_srcset(fieldfile, 'jpg', available),
+        alt, css_class, size, size,
+    )
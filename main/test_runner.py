@@ -0,0 +1,41 @@
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test.runner import DiscoverRunner # type: ignore
+from django.test.utils import override_settings # type: ignore
+
+
+# -------------------------------
+# Test runner
+# -------------------------------
+# Every request made by the suite goes through RequestTimingMiddleware. The
+# run's timing lines go to a temporary directory (removed afterwards) rather
+# than appending to the REQUEST_TIMING_LOG of the checkout. Tests run with
+# DEBUG off but without collectstatic, so plain static names are allowed.
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.timing_dir = tempfile.mkdtemp(prefix='goservice-timings-')
+        self.test_settings = override_settings(
+            REQUEST_TIMING_LOG=Path(self.timing_dir) / 'request_timings.jsonl',
+            STATICFILES_MANIFEST_REQUIRED=False,
+        )
+        self.test_settings.enable()
+        self.timing_handlers = {}
+        for handler in logging.getLogger('goservice.timings').handlers:
+            if isinstance(handler, logging.FileHandler):
+                # Delayed handlers reopen baseFilename on the next record
+                handler.close()
+                self.timing_handlers[handler] = handler.baseFilename
+                handler.baseFilename = str(Path(self.timing_dir) / 'request_timings.jsonl')
+
+    def teardown_test_environment(self, **kwargs):
+        for handler, filename in self.timing_handlers.items():
+            handler.close()
+            handler.baseFilename = filename
+        self.test_settings.disable()
+        shutil.rmtree(self.timing_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,601 @@
-from django.test import TestCase
+import gzip
+import json
+import logging
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction # type: ignore
+from django.conf import settings # type: ignore
+from django.contrib.messages import get_messages # type: ignore
+from django.contrib.staticfiles.storage import staticfiles_storage # type: ignore
+from django.core.files.uploadedfile import SimpleUploadedFile # type: ignore
+from django.core.management import call_command # type: ignore
+from django.core.cache import cache # type: ignore
+from django.core.exceptions import ImproperlyConfigured # type: ignore
+from django.db import connection, connections # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from django.http import Http404, HttpResponse # type: ignore
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings # type: ignore
+from django.urls import reverse # type: ignore
+from django.utils import timezone # type: ignore
+from PIL import Image # type: ignore
+
+from users.forms import ProviderServiceForm
+from users.models import Booking, CustomUser, Review
+from users.stats import read_counters
+from users.actor import ActorMiddleware
+from users.tests import make_customer, make_provider, make_listing, make_service
+from .cache import cache_stats, model_version
+from .db_router import REPLICA_ALIAS, STICKY_SESSION_KEY, ReplicaRoutingMiddleware
+from .loadtest import UNSAFE_ROUTES, compare, named_routes, run_load
+from .instrumentation import RequestTimingMiddleware
+from .images import THUMBNAIL_SIZES, derivative_name, derivative_srcset
+from .jobs import Worker, claim, enqueue, execute, job, run_pending
+from .models import Job, Service
+from .staticfiles import CompressedManifestStaticFilesStorage, serve_static
+from .templatetags.thumbnails import picture
+
+
+class ProvidersByProfessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username='site_admin', role='admin')
+        electrical = make_service('Electrical')
+        for i in range(25):
+            provider = make_provider(f'electrician{i}')
+            make_listing(provider, electrical)
+            make_listing(provider, electrical)
+
+    def test_admin_directory_is_deduplicated_and_paged(self):
+        self.client.force_login(self.admin)
+        url = reverse('providers_by_profession', args=['Electrical'])
+        first = self.client.get(url)
+        second = self.client.get(url, {'cursor': first.context['next_cursor']})
+
+        self.assertEqual(len(first.context['providers']), 20)
+        self.assertEqual(len(second.context['providers']), 5)
+        self.assertIsNone(second.context['next_cursor'])
+        ids = [e['provider'].id for e in first.context['providers']] + \
+              [e['provider'].id for e in second.context['providers']]
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+# -------------------------------
+# Image derivatives
+# -------------------------------
+def png_upload(name='photo.png', size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TempMediaMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class ImageDerivativeTests(TempMediaMixin, TestCase):
+
+    def test_upload_creates_thumbnails_and_webp(self):
+        service = Service.objects.create(profession_name='Cleaning', image=png_upload())
+        storage = service.image.storage
+        # Resizing is left to the worker
+        self.assertFalse(storage.exists(derivative_name(service.image.name, THUMBNAIL_SIZES[0], 'webp')))
+        self.assertEqual(run_pending(), 1)
+        for size in THUMBNAIL_SIZES:
+            for ext in ('webp', 'jpg'):
+                name = derivative_name(service.image.name, size, ext)
+                self.assertTrue(storage.exists(name))
+                with storage.open(name) as f:
+                    self.assertEqual(Image.open(f).size, (size, size))
+
+    def test_srcset_falls_back_to_original_until_backfilled(self):
+        user = CustomUser.objects.create(username='legacy_user', role='customer')
+        name = user.profile_pic.storage.save('profile_pics/legacy.png', png_upload())
+        CustomUser.objects.filter(pk=user.pk).update(profile_pic=name)
+        user.refresh_from_db()
+        self.assertEqual(derivative_srcset(user.profile_pic, 'webp'), user.profile_pic.url)
+
+        call_command('backfill_thumbnails', stdout=StringIO())
+        self.assertIn('legacy.png_60.webp 1x', derivative_srcset(user.profile_pic, 'webp'))
+        self.assertIn('legacy.png_120.webp 2x', derivative_srcset(user.profile_pic, 'webp'))
+
+    def test_same_stem_different_extension_get_own_derivatives(self):
+        storage = Service._meta.get_field('image').storage
+        first = Service.objects.create(profession_name='Cleaning', image=png_upload('card.png'))
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300), 'blue').save(buffer, 'JPEG')
+        second = Service.objects.create(
+            profession_name='Painting', image=SimpleUploadedFile('card.jpg', buffer.getvalue(), content_type='image/jpeg'),
+        )
+        self.assertEqual(run_pending(), 2)
+        names = {derivative_name(service.image.name, THUMBNAIL_SIZES[0], 'jpg') for service in (first, second)}
+        self.assertEqual(len(names), 2)
+        self.assertTrue(all(storage.exists(name) for name in names))
+
+    def test_backfill_replaces_old_style_derivatives(self):
+        user = CustomUser.objects.create(username='old_style', role='customer')
+        storage = user.profile_pic.storage
+        name = storage.save('profile_pics/old.png', png_upload())
+        stale = storage.save('profile_pics/old_60.webp', png_upload())
+        CustomUser.objects.filter(pk=user.pk).update(profile_pic=name)
+        user.refresh_from_db()
+
+        call_command('backfill_thumbnails', stdout=StringIO())
+        self.assertTrue(storage.exists(derivative_name(name, THUMBNAIL_SIZES[0], 'webp')))
+        self.assertFalse(storage.exists(stale))
+
+    def test_picture_tag_checks_storage_once(self):
+        service = Service.objects.create(profession_name='Cleaning', image=png_upload())
+        run_pending()
+        storage = service.image.storage
+        with patch.object(storage, 'exists', wraps=storage.exists) as exists:
+            html = picture(service.image)
+        self.assertEqual(exists.call_count, 1)
+        self.assertIn(derivative_name(service.image.name, THUMBNAIL_SIZES[0], 'webp'), html)
+
+    def test_replaced_and_deleted_avatars_lose_their_derivatives(self):
+        user = CustomUser.objects.create(username='avatar_user', role='customer', profile_pic=png_upload('first.png'))
+        run_pending()
+        storage = user.profile_pic.storage
+        first = derivative_name(user.profile_pic.name, THUMBNAIL_SIZES[0], 'webp')
+        self.assertTrue(storage.exists(first))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile_pic = png_upload('second.png')
+            user.save()
+        run_pending()
+        second = derivative_name(user.profile_pic.name, THUMBNAIL_SIZES[0], 'webp')
+        self.assertFalse(storage.exists(first))
+        self.assertTrue(storage.exists(second))
+
+        user.delete()
+        self.assertFalse(storage.exists(second))
+
+    def test_delete_removes_derivatives(self):
+        service = Service.objects.create(profession_name='Painting', image=png_upload())
+        run_pending()
+        thumb = derivative_name(service.image.name, THUMBNAIL_SIZES[0], 'webp')
+        self.assertTrue(service.image.storage.exists(thumb))
+        service.delete()
+        self.assertFalse(service.image.storage.exists(thumb))
+
+
+# -------------------------------
+# Catalog cache
+# -------------------------------
+class CatalogCacheTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.customer = make_customer('catalog_customer')
+        Service.objects.create(profession_name='Plumbing', image=png_upload())
+
+    def test_services_grid_skips_database_when_warm(self):
+        self.client.force_login(self.customer.user)
+        url = reverse('customer_services')
+        self.client.get(url)
+        # Grid, session and user all come from the cache
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Plumbing')
+
+    def test_service_save_invalidates_grid(self):
+        self.client.force_login(self.customer.user)
+        url = reverse('customer_services')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(profession_name='Carpentry', image=png_upload())
+        self.assertContains(self.client.get(url), 'Carpentry')
+
+    def test_home_reviews_invalidated_by_new_review(self):
+        self.customer.user.profile_pic = png_upload('reviewer.png')
+        self.customer.user.save()
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(customer=self.customer, content='Quick and tidy work')
+        self.assertContains(self.client.get(reverse('home')), 'Quick and tidy work')
+
+    def test_home_reviews_invalidated_by_reviewer_rename(self):
+        self.customer.user.profile_pic = png_upload('reviewer.png')
+        self.customer.user.save()
+        Review.objects.create(customer=self.customer, content='Quick and tidy work')
+        self.client.get(reverse('home'))
+        self.customer.user.username = 'renamed_reviewer'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.user.save()
+        self.assertContains(self.client.get(reverse('home')), 'renamed_reviewer')
+
+    def test_version_moves_only_when_the_write_commits(self):
+        before = model_version(Service)
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(profession_name='Carpentry', image=png_upload())
+            # Readers still see the old rows: they must keep the old stamp
+            self.assertEqual(model_version(Service), before)
+        self.assertNotEqual(model_version(Service), before)
+
+    def test_form_choices_come_from_cache_and_stats_count(self):
+        ProviderServiceForm()
+        with self.assertNumQueries(0):
+            form = ProviderServiceForm()
+        self.assertEqual([label for _, label in form.fields['service_type'].widget.choices], ['Plumbing'])
+        stats = cache_stats()['service_type_choices']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+# -------------------------------
+# Request timing instrumentation
+# -------------------------------
+class RequestTimingTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def timed_get(self, url):
+        with self.assertLogs('goservice.timings', level='INFO') as logs:
+            response = self.client.get(url)
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_records_route_queries_and_timings(self):
+        response, record = self.timed_get(reverse('home'))
+        self.assertEqual(record['route'], 'home')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 1)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['template_ms'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_flags_n_plus_one_and_budget(self):
+        admin = CustomUser.objects.create(username='timing_admin', role='admin')
+        self.client.force_login(admin)
+        for i in range(5):
+            make_customer(f'listed{i}')
+        with override_settings(REQUEST_BUDGETS={'admin_view_customers': {'queries': 3}}):
+            _, record = self.timed_get(reverse('admin_view_customers'))
+        # customer.user is read lazily per row
+        self.assertGreaterEqual(record['duplicate_queries'], 4)
+        self.assertIn('queries', record['over_budget'])
+
+    def test_suite_logs_outside_the_checkout(self):
+        self.assertFalse(Path(settings.REQUEST_TIMING_LOG).is_relative_to(settings.BASE_DIR))
+        handler = logging.getLogger('goservice.timings').handlers[0]
+        self.assertEqual(handler.baseFilename, str(settings.REQUEST_TIMING_LOG))
+
+    def test_route_timings_report(self):
+        log = Path(tempfile.mkdtemp()) / 'timings.jsonl'
+        self.addCleanup(shutil.rmtree, log.parent)
+        log.write_text(''.join(
+            json.dumps({'route': 'home', 'queries': 1, 'db_ms': 1.0, 'template_ms': 2.0, 'total_ms': float(ms)}) + '\n'
+            for ms in range(1, 101)
+        ))
+        out = StringIO()
+        call_command('route_timings', log=str(log), stdout=out)
+        row = out.getvalue().splitlines()[-1].split()
+        self.assertEqual(row[:5], ['home', '100', '50.0', '95.0', '99.0'])
+
+    def test_custom_middleware_stays_async_under_asgi(self):
+        async def view(request):
+            return HttpResponse()
+
+        for middleware in (RequestTimingMiddleware, ActorMiddleware, ReplicaRoutingMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware(view)), middleware.__name__)
+            self.assertFalse(iscoroutinefunction(middleware(lambda request: HttpResponse())), middleware.__name__)
+
+    async def test_records_queries_run_on_async_requests(self):
+        with self.assertLogs('goservice.timings', level='INFO') as logs:
+            response = await self.async_client.get(reverse('home'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['route'], 'home')
+        self.assertEqual(record['queries'], 1)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+
+# -------------------------------
+# Seed data + load driver
+# -------------------------------
+class SeedAndLoadTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_then_load_every_route(self):
+        call_command(
+            'seed_data', customers=20, providers=5, listings=4, bookings=60, reviews=10, stdout=StringIO(),
+        )
+        self.assertEqual(Booking.objects.count(), 60)
+        self.assertEqual(read_counters()['customers'], 20)
+
+        CustomUser.objects.create(username='load_admin', role='admin')
+        report = run_load(iterations=2, concurrency=2)
+
+        self.assertEqual(set(report['routes']) | set(report['skipped']), named_routes())
+        self.assertEqual(set(report['skipped']), set(UNSAFE_ROUTES))
+        failing = {name: row['errors'] for name, row in report['routes'].items() if row['errors']}
+        self.assertEqual(failing, {})
+        self.assertGreater(report['throughput_rps'], 0)
+        self.assertEqual(compare(report, report)['home'][2], 0.0)
+
+
+# -------------------------------
+# Background job queue
+# -------------------------------
+CALLS = []
+
+
+@job(max_attempts=3)
+def record_call(value):
+    CALLS.append(value)
+
+
+@job(max_attempts=2)
+def always_fails():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_runs_with_arguments_and_marks_done(self):
+        queued = enqueue(record_call, 'hello')
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ['hello'])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('done', 1))
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_delayed_job_waits(self):
+        enqueue(record_call, 'later', delay=60)
+        self.assertEqual(run_pending(), 0)
+
+    def test_retries_with_backoff_then_fails(self):
+        queued = enqueue(always_fails)
+        with self.assertLogs('main.jobs', 'WARNING'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('queued', 1))
+        self.assertIn('RuntimeError: boom', queued.last_error)
+        self.assertGreater(queued.run_at, timezone.now() + timedelta(seconds=5))
+
+        # Not due yet; make it due and run the last attempt
+        self.assertEqual(run_pending(), 0)
+        Job.objects.filter(id=queued.id).update(run_at=timezone.now())
+        with self.assertLogs('main.jobs', 'ERROR'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_expired_lease_is_handed_out_again(self):
+        queued = enqueue(record_call, 'again')
+        [claimed] = claim('crashed-worker')
+        self.assertEqual(claim('other-worker'), [])
+        Job.objects.filter(id=claimed.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        [reclaimed] = claim('other-worker')
+        # The crashed worker can no longer record an outcome
+        execute(reclaimed.id, 'crashed-worker')
+        self.assertEqual(CALLS, ['again'])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by, queued.attempts), ('running', 'other-worker', 2))
+        execute(reclaimed.id, 'other-worker')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'done')
+
+    def test_rejects_undecorated_functions(self):
+        with self.assertRaises(ValueError):
+            enqueue(print, 'nope')
+
+    def test_admin_delete_locks_account_and_defers_cascade(self):
+        admin = CustomUser.objects.create(username='jobs_admin', role='admin')
+        provider = make_provider('retiring_provider')
+        providers = read_counters()['providers']
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin_delete_provider', args=[provider.id]))
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            ['Provider retiring_provider deactivated; deletion scheduled.'],
+        )
+
+        user = CustomUser.objects.get(id=provider.user_id)
+        self.assertFalse(user.is_active)
+        # The dashboard still counts the provider until the row is really gone
+        self.assertEqual(read_counters()['providers'], providers)
+        run_pending()
+        self.assertFalse(CustomUser.objects.filter(id=provider.user_id).exists())
+        self.assertEqual(read_counters()['providers'], providers - 1)
+
+
+class JobWorkerConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_parallel_claims_never_share_a_job(self):
+        for i in range(40):
+            enqueue(record_call, i)
+
+        def grab(worker_id):
+            try:
+                return [row.id for row in claim(worker_id, limit=5)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(8) as pool:
+            batches = list(pool.map(grab, [f'w{i}' for i in range(8)]))
+        claimed = [job_id for batch in batches for job_id in batch]
+        self.assertEqual(len(claimed), len(set(claimed)))
+        self.assertEqual(Job.objects.filter(status='running').count(), len(claimed))
+
+    def test_thread_pool_worker_drains_queue(self):
+        for i in range(20):
+            enqueue(record_call, i)
+        ran = Worker(concurrency=4, poll_interval=0.05).run(once=True)
+        self.assertEqual(ran, 20)
+        self.assertEqual(sorted(CALLS), list(range(20)))
+        self.assertEqual(Job.objects.filter(status='done').count(), 20)
+
+
+class StaticBundleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.override = override_settings(STATIC_ROOT=cls.static_root)
+        cls.override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def test_pages_link_hashed_bundles_instead_of_inline_blocks(self):
+        response = self.client.get(reverse('login_customer'))
+        html = response.content.decode()
+        self.assertNotIn('<style>', html)
+        self.assertNotIn('<script>', html)
+        self.assertRegex(html, r'/static/users/css/auth\.[0-9a-f]{12}\.css')
+        self.assertRegex(html, r'/static/users/js/auth\.[0-9a-f]{12}\.js')
+
+    def test_collectstatic_writes_compressed_variants_and_rewrites_urls(self):
+        hashed = staticfiles_storage.stored_name('users/css/admin_dashboard.css')
+        path = Path(self.static_root) / hashed
+        self.assertTrue(Path(f'{path}.gz').exists())
+        self.assertEqual(gzip.decompress(Path(f'{path}.gz').read_bytes()), path.read_bytes())
+        self.assertIn(staticfiles_storage.stored_name('main/welcome.png').split('/')[-1], path.read_text())
+
+    def test_serve_negotiates_encoding_and_caches_hashed_names(self):
+        hashed = staticfiles_storage.stored_name('users/css/customer_dashboard.css')
+        request = RequestFactory().get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = serve_static(request, hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body, (Path(self.static_root) / hashed).read_bytes())
+
+        plain = serve_static(RequestFactory().get('/static/users/css/customer_dashboard.css'), 'users/css/customer_dashboard.css')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertNotIn('immutable', plain['Cache-Control'])
+
+        with self.assertRaises(Http404):
+            serve_static(request, '../manage.py')
+
+    def test_missing_manifest_is_an_error_with_debug_off(self):
+        storage = CompressedManifestStaticFilesStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, storage.location)
+        with override_settings(STATICFILES_MANIFEST_REQUIRED=True):
+            with self.assertRaises(ImproperlyConfigured):
+                storage.stored_name('users/css/auth.css')
+        with override_settings(DEBUG=True):
+            del settings.STATICFILES_MANIFEST_REQUIRED
+            self.assertEqual(storage.stored_name('users/css/auth.css'), 'users/css/auth.css')
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    A second SQLite file stands in for the replica: it is refreshed with
+    sync_replica, so rows written afterwards exist only on the primary.
+    """
+    @classmethod
+    def setUpClass(cls):
+        # Declared here rather than on the class so the test runner does not
+        # try to create (or check) a test database for the alias
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings[REPLICA_ALIAS] = {
+            **connections['default'].settings_dict, 'NAME': str(Path(cls.replica_dir) / 'replica.sqlite3'),
+        }
+        cls.databases = {'default', REPLICA_ALIAS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create(username='replica_admin', role='admin')
+        self.customer = make_customer('synced_customer')
+        self.provider = make_provider('replica_provider')
+        self.listing = make_listing(self.provider, make_service('Plumbing'))
+        call_command('sync_replica', stdout=StringIO())
+        # Only on the primary from here on
+        make_customer('unsynced_customer')
+        make_listing(make_provider('unsynced_provider'), self.listing.service_type)
+
+    def get(self, name, *args):
+        cache.clear()
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.get(reverse(name, args=args))
+        self.assertEqual(response.status_code, 200)
+        return response, len(replica_queries)
+
+    def test_replica_view_reads_the_replica(self):
+        self.client.force_login(self.admin)
+        response, replica_queries = self.get('admin_view_customers')
+        self.assertGreater(replica_queries, 0)
+        self.assertContains(response, 'synced_customer')
+        self.assertNotContains(response, 'unsynced_customer')
+
+    def test_deleted_account_leaves_the_list_at_once(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('admin_delete_customer', args=[self.customer.id])).status_code, 405)
+        response = self.client.post(reverse('admin_delete_customer', args=[self.customer.id]), follow=True)
+        # The replica still has the account active; the list is read from the primary
+        self.assertEqual(response.redirect_chain, [(reverse('admin_view_customers'), 302)])
+        self.assertContains(response, 'unsynced_customer')
+        self.assertNotContains(response, '<td>synced_customer</td>')
+
+    def test_search_reads_the_replica(self):
+        self.client.force_login(self.customer.user)
+        cache.clear()
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.get(reverse('provider_search'), {'q': 'provider'})
+        self.assertTrue(any('users_providersearch' in query['sql'] for query in replica_queries))
+        self.assertContains(response, 'replica_provider')
+        self.assertNotContains(response, 'unsynced_provider')
+
+    def test_other_views_read_the_primary(self):
+        self.client.force_login(self.admin)
+        _, replica_queries = self.get('admin_dashboard')
+        self.assertEqual(replica_queries, 0)
+
+    def test_booking_sticks_session_to_primary(self):
+        self.client.force_login(self.customer.user)
+        response, _ = self.get('customer_providers_by_service', 'Plumbing')
+        self.assertNotContains(response, 'unsynced_provider')
+
+        result = self.client.post(reverse('create_booking'), {
+            'service_id': self.listing.id, 'provider_id': self.provider.id,
+            'schedule_date': '2025-11-01', 'timing': '9AM-11AM',
+        }, headers={'x-requested-with': 'XMLHttpRequest'}).json()
+        self.assertEqual(result['status'], 'success')
+        self.assertIn(STICKY_SESSION_KEY, self.client.session)
+
+        response, replica_queries = self.get('customer_providers_by_service', 'Plumbing')
+        self.assertEqual(replica_queries, 0)
+        self.assertContains(response, 'unsynced_provider')
+
+        # Once the window has passed the replica serves reads again
+        session = self.client.session
+        session[STICKY_SESSION_KEY] = 0
+        session.save()
+        _, replica_queries = self.get('customer_providers_by_service', 'Plumbing')
+        self.assertGreater(replica_queries, 0)
@@ -7,6 +7,9 @@ urlpatterns = [
     path('dashboard/view-services/', views.view_services_view, name='view_services'),
     path('dashboard/view-services/<str:profession_name>/', views.providers_by_profession_view, name='providers_by_profession'),
 
+    # Catalog cache hit/miss counters
+    path('dashboard/cache-stats/', views.cache_stats_view, name='cache_stats'),
+
     # Delete Service Route
     path('dashboard/delete-service/<int:service_id>/', views.delete_service_view, name='delete_service'),
 
@@ -4,11 +4,21 @@ from users.views import is_admin  # reuse admin check
 from django.contrib.auth.decorators import user_passes_test # type: ignore
 from .forms import ServiceForm
 from .models import Service
+from .cache import cached_query, cache_stats
+from .db_router import replica_reads
+from .sqlite import retry_stats
+from django.http import JsonResponse # type: ignore
 from users.models import Review
-from users.models import ProviderService, ServiceProvider
+from users.directory import directory_page
+from users.passwords import password_pool
+import logging
 
+logger = logging.getLogger(__name__)
 
+
+@replica_reads
 def home(request):
+    # Lazy: only evaluated when the cached carousel fragment is stale
     reviews = Review.objects.select_related('customer__user').order_by('-created_at')[:10]  
     return render(request, 'main/index.html', {'reviews': reviews})
 
@@ -29,37 +39,29 @@ def add_service_view(request):
     return render(request, 'main/add_service.html', context)
 
 
+@replica_reads
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
 def view_services_view(request):
-    services = Service.objects.all()
+    # Cards carry a per-user csrf token, so cache the rows rather than the HTML
+    services = cached_query('services', [Service], lambda: list(Service.objects.all()))
     context = {'services': services}
     return render(request, 'main/view_services.html', context)
 
 
 
+@replica_reads
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
 def providers_by_profession_view(request, profession_name):
-    # Filter ProviderService by service_type's profession_name
-    services = ProviderService.objects.filter(service_type__profession_name=profession_name)
-
-    # Keep only unique providers
-    providers_dict = {}
-    for service in services:
-        provider = service.provider
-        if provider.id not in providers_dict:
-            providers_dict[provider.id] = {
-                'provider': provider,
-                'service_type': service.service_type.profession_name,
-                'experience': service.experience,
-                'address': service.address,
-                'phone': service.phone,
-            }
+    # Latest listing per provider, picked in SQL and paged by keyset cursor
+    providers, next_cursor = directory_page(profession_name, request.GET.get('cursor'))
 
     context = {
         'profession_name': profession_name,
-        'providers': providers_dict.values(),
+        'providers': providers,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
     }
     return render(request, 'main/providers_by_profession.html', context)
 
@@ -69,17 +71,22 @@ def providers_by_profession_view(request, profession_name):
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
 def delete_service_view(request, service_id):
-    print(" Delete request received for service ID:", service_id)
     service = get_object_or_404(Service, id=service_id)
     
     if request.method == 'POST':
-        print(" POST request confirmed — deleting service...")
         if service.image:
             service.image.delete(save=False)
         service.delete()
-        print(" Deleted successfully.")
+        logger.info(f'Service {service_id} deleted')
         return redirect('view_services')
 
-    print(" Not a POST request — redirecting.")
     return redirect('view_services')
 
+
+
+@login_required(login_url='login_admin')
+@user_passes_test(is_admin, login_url='login_admin')
+def cache_stats_view(request):
+    return JsonResponse({
+        'catalog_cache': cache_stats(), 'password_pool': password_pool.stats(), 'sqlite_writes': retry_stats(),
+    })
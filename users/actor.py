@@ -0,0 +1,114 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction # type: ignore
+from django.contrib.auth.backends import ModelBackend # type: ignore
+from django.core.cache import cache # type: ignore
+from django.db import DEFAULT_DB_ALIAS # type: ignore
+from django.http import Http404 # type: ignore
+from django.utils.functional import SimpleLazyObject # type: ignore
+from .models import Customer, ServiceProvider
+
+# Upper bound on staleness for rows changed behind the signals' back (update())
+ACTOR_CACHE_TIMEOUT = 300
+
+
+# -------------------------------
+# Request actor
+# -------------------------------
+# request.actor answers "who is this and which Customer/ServiceProvider row
+# is theirs" without a query per view. The user row is cached by
+# CachedModelBackend and the profile ids by resolve_actor; the signals in
+# signals.py drop both when the user or their profile rows change.
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def actor_cache_key(user_id):
+    return f'auth:actor:{user_id}'
+
+
+def forget_actor(user_id):
+    cache.delete_many([user_cache_key(user_id), actor_cache_key(user_id)])
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose per-request user lookup (the session's user id ->
+    CustomUser) is served from the cache.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, ACTOR_CACHE_TIMEOUT)
+        return user
+
+
+class Actor:
+    def __init__(self, user, customer_id=None, provider_id=None):
+        self.user = user
+        self.customer_id = customer_id
+        self.provider_id = provider_id
+
+    @property
+    def role(self):
+        return self.user.role if self.user.is_authenticated else None
+
+    @property
+    def is_admin(self):
+        return self.user.is_authenticated and (self.user.role == 'admin' or self.user.is_superuser)
+
+    @property
+    def is_customer(self):
+        return self.customer_id is not None
+
+    @property
+    def is_provider(self):
+        return self.provider_id is not None
+
+    def provider(self):
+        # The ServiceProvider row is just (id, user): rebuild it without a query
+        if self.provider_id is None:
+            raise Http404('Service provider not found.')
+        provider = ServiceProvider.from_db(DEFAULT_DB_ALIAS, ['id', 'user_id'], [self.provider_id, self.user.id])
+        provider.user = self.user
+        return provider
+
+    def customer(self):
+        # Phone and address live on the row, so this is one primary-key lookup
+        if self.customer_id is None:
+            raise Customer.DoesNotExist('Customer not found.')
+        customer = Customer.objects.get(id=self.customer_id)
+        customer.user = self.user
+        return customer
+
+
+def resolve_actor(user):
+    if not user.is_authenticated:
+        return Actor(user)
+    key = actor_cache_key(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = {'customer_id': None, 'provider_id': None}
+        if user.role == 'customer':
+            ids['customer_id'] = Customer.objects.filter(user_id=user.id).values_list('id', flat=True).first()
+        elif user.role == 'provider':
+            ids['provider_id'] = ServiceProvider.objects.filter(user_id=user.id).values_list('id', flat=True).first()
+        cache.set(key, ids, ACTOR_CACHE_TIMEOUT)
+    return Actor(user, **ids)
+
+
+class ActorMiddleware:
+    # Goes after AuthenticationMiddleware; resolved on first use only
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.actor = SimpleLazyObject(lambda: resolve_actor(request.user))
+        return self.get_response(request)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Customer, ServiceProvider, AdminService, ProviderService, Review
+from .models import CustomUser, Customer, ServiceProvider, AdminService, ProviderService, Review, EarningEntry
 
 # Register CustomUser with default UserAdmin
 @admin.register(CustomUser)
@@ -17,3 +17,4 @@ admin.site.register(ServiceProvider)
 admin.site.register(AdminService)
 admin.site.register(ProviderService)
 admin.site.register(Review)
+admin.site.register(EarningEntry)
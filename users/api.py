@@ -0,0 +1,169 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings # type: ignore
+from django.db.models import F # type: ignore
+from django.http import JsonResponse # type: ignore
+from django.utils.cache import patch_cache_control, patch_vary_headers # type: ignore
+from django.views.decorators.http import condition, require_safe # type: ignore
+from main.cache import model_modified, versioned_key
+from main.db_router import replica_reads
+from main.models import Service
+from .archive import history_page
+from .directory import RELIABLE_CANCELLATION_RATE, latest_listings, rated_listing_ids
+from .models import ArchivedBooking, Booking, CustomUser, ProviderService, ProviderStats, Review
+from .pagination import keyset_page
+
+API_VERSION = 'v1'
+API_PAGE_SIZE = 20
+
+
+# -------------------------------
+# Read-only JSON API (v1)
+# -------------------------------
+# Every resource declares the tables it is built from. Its strong ETag is a
+# hash of those tables' version stamps (main.cache, bumped as writes commit),
+# the requesting customer for private resources and the full request path.
+# Django's condition() compares it with If-None-Match before the view runs,
+# so an unchanged resource answers 304 without querying or serializing.
+# Rows are serialized straight from .values() dicts.
+
+LISTING_FIELDS = ('id', 'provider_id', 'experience', 'price', 'address', 'phone', 'latitude', 'longitude')
+LISTING_RELATED = {
+    'provider_name': F('provider__user__username'),
+    'profession': F('service_type__profession_name'),
+    'rating': F('provider__stats__rating_avg'),
+    'rating_count': F('provider__stats__rating_count'),
+}
+
+BOOKING_FIELDS = ('id', 'status', 'schedule_date', 'timing', 'created_at', 'provider_id', 'service_id')
+BOOKING_RELATED = {
+    'provider_name': F('provider__user__username'),
+    'profession': F('service__service_type__profession_name'),
+    'price': F('service__price'),
+}
+
+
+def api_error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_customer_required(view):
+    # JSON 401/403 instead of the HTML login redirect
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_error('Authentication required.', 401)
+        if not request.actor.is_customer:
+            return api_error('Customer account required.', 403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def conditional(name, models, private=False):
+    """
+    Serve GET/HEAD with a strong ETag and Last-Modified computed from the
+    version stamps of ``models``; matching If-None-Match /
+    If-Modified-Since requests get 304 before the view runs.
+    """
+    def etag(request, *args, **kwargs):
+        scope = request.actor.customer_id if private else ''
+        raw = f'{API_VERSION}:{versioned_key(name, models)}:{scope}:{request.get_full_path()}'
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    def last_modified(request, *args, **kwargs):
+        return datetime.fromtimestamp(max(model_modified(model) for model in models), tz=dt_timezone.utc)
+
+    def decorate(view):
+        conditional_view = require_safe(condition(etag_func=etag, last_modified_func=last_modified)(view))
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Clients may keep a copy but must revalidate it with the ETag
+            if private:
+                patch_cache_control(response, no_cache=True, private=True)
+                patch_vary_headers(response, ['Cookie'])
+            else:
+                patch_cache_control(response, no_cache=True, public=True)
+            return response
+        return wrapper
+    return decorate
+
+
+def page_number(request):
+    try:
+        return max(int(request.GET.get('cursor') or 1), 1)
+    except ValueError:
+        return 1
+
+
+# -------------------------------
+# Resources
+# -------------------------------
+@replica_reads
+@conditional('api:services', [Service])
+def services_api(request):
+    services = list(Service.objects.order_by('profession_name').values('id', 'profession_name', 'image'))
+    for service in services:
+        service['image'] = f"{settings.MEDIA_URL}{service['image']}" if service['image'] else None
+    return JsonResponse({'results': services})
+
+
+@replica_reads
+@conditional('api:providers', [Service, ProviderService, CustomUser, ProviderStats])
+def providers_api(request, profession_name):
+    """
+    One entry per provider (their latest listing) for a profession. ``sort``
+    is ``latest`` (keyset cursor) or ``rated`` (page-number cursor, with
+    optional ``min_rating`` and ``reliable=1`` filters).
+    """
+    service_id = Service.objects.filter(profession_name=profession_name).values_list('id', flat=True).first()
+    if service_id is None:
+        return api_error('Unknown service.', 404)
+
+    if request.GET.get('sort') == 'rated':
+        try:
+            min_rating = min(max(int(request.GET.get('min_rating') or 0), 0), 5)
+        except ValueError:
+            min_rating = 0
+        max_cancellation = RELIABLE_CANCELLATION_RATE if request.GET.get('reliable') == '1' else None
+        page = page_number(request)
+        offset = (page - 1) * API_PAGE_SIZE
+        ids = list(rated_listing_ids(service_id, min_rating, max_cancellation)[offset:offset + API_PAGE_SIZE + 1])
+        next_cursor = str(page + 1) if len(ids) > API_PAGE_SIZE else None
+        ids = ids[:API_PAGE_SIZE]
+        listings = ProviderService.objects.filter(id__in=ids).values(*LISTING_FIELDS, **LISTING_RELATED)
+        rows = {row['id']: row for row in listings}
+        results = [rows[i] for i in ids if i in rows]
+    else:
+        listings = latest_listings(profession_name).values(*LISTING_FIELDS, 'created_at', **LISTING_RELATED)
+        results, next_cursor = keyset_page(listings, request.GET.get('cursor'), API_PAGE_SIZE)
+        for row in results:
+            del row['created_at']
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
+
+
+@api_customer_required
+@conditional('api:bookings', [Booking, ArchivedBooking, ProviderService, CustomUser], private=True)
+def bookings_api(request):
+    # The customer's bookings, newest first; deep pages include archived ones
+    customer_id = request.actor.customer_id
+    results, next_cursor = history_page(
+        Booking.objects.filter(customer_id=customer_id).values(*BOOKING_FIELDS, **BOOKING_RELATED),
+        ArchivedBooking.objects.filter(customer_id=customer_id).values(*BOOKING_FIELDS, **BOOKING_RELATED),
+        request.GET.get('cursor'), API_PAGE_SIZE,
+    )
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
+
+
+@api_customer_required
+@conditional('api:reviews', [Review, CustomUser], private=True)
+def reviews_api(request):
+    reviews = Review.objects.filter(customer_id=request.actor.customer_id).values(
+        'id', 'booking_id', 'provider_id', 'rating', 'content', 'created_at',
+        provider_name=F('provider__user__username'),
+    )
+    results, next_cursor = keyset_page(reviews, request.GET.get('cursor'), API_PAGE_SIZE)
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from django.conf import settings # type: ignore
+from django.db import connection, models, transaction # type: ignore
+from django.utils import timezone # type: ignore
+from main.cache import bump_version
+from .models import ArchivedBooking, Booking
+from .pagination import after_cursor, decode_cursor, encode_cursor, row_value
+
+ARCHIVE_CHUNK_SIZE = 1000
+
+
+# -------------------------------
+# Hot/cold booking archive
+# -------------------------------
+# Finished bookings (completed/cancelled/rejected) whose service date and
+# creation are both older than settings.BOOKING_ARCHIVE_DAYS are moved from
+# Booking into ArchivedBooking, keeping their ids. Current bookings, inboxes
+# and counters only ever read the small hot table.
+#
+# Every archived row is older than archive_cutoff() on both created_at and
+# schedule_date, and the cutoff only moves forward. History pages use that as
+# a watermark: while a page (plus its look-ahead row) is entirely newer than
+# the cutoff, nothing in the archive can belong on it and the archive is not
+# queried. Only pages that reach back past the cutoff merge in archived rows.
+
+def archive_days():
+    return getattr(settings, 'BOOKING_ARCHIVE_DAYS', 90)
+
+
+def archive_cutoff(days=None):
+    return timezone.now() - timedelta(days=archive_days() if days is None else days)
+
+
+def archivable(cutoff):
+    return Booking.objects.filter(
+        status__in=Booking.FINISHED_STATUSES,
+        schedule_date__lt=timezone.localdate(cutoff),
+        created_at__lt=cutoff,
+    )
+
+
+def _columns():
+    return ', '.join(connection.ops.quote_name(f.column) for f in Booking._meta.concrete_fields)
+
+
+def archive_chunk(cutoff, after_id=0, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Move the next ``chunk_size`` archivable bookings with id > ``after_id``
+    in one transaction. Returns the moved ids (empty when done).
+    """
+    with transaction.atomic():
+        ids = list(
+            archivable(cutoff).filter(id__gt=after_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return []
+        columns = _columns()
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {ArchivedBooking._meta.db_table} ({columns}) '
+                f'SELECT {columns} FROM {Booking._meta.db_table} WHERE id IN ({placeholders})',
+                ids,
+            )
+        # Raw delete: no signals (the dashboard still counts archived bookings)
+        # and no cascade (ledger entries keep pointing at the same id)
+        Booking.objects.filter(id__in=ids)._raw_delete(connection.alias)
+    bump_version(Booking)
+    bump_version(ArchivedBooking)
+    return ids
+
+
+def archive_bookings(days=None, chunk_size=ARCHIVE_CHUNK_SIZE, max_chunks=None):
+    """
+    Archive in chunks, each committed on its own, so the run can be stopped
+    at any point and simply started again. Yields the ids moved per chunk.
+    """
+    if days is not None and days < archive_days():
+        # History pages assume nothing newer than the configured cutoff is archived
+        raise ValueError(f'Cannot archive bookings newer than BOOKING_ARCHIVE_DAYS ({archive_days()} days).')
+    cutoff = archive_cutoff(days)
+    after_id = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        ids = archive_chunk(cutoff, after_id, chunk_size)
+        if not ids:
+            return
+        after_id = ids[-1]
+        chunks += 1
+        yield ids
+
+
+def history_page(hot, archived, cursor, page_size, field='created_at', pk_field='id'):
+    """
+    Keyset page over ``hot`` (a Booking queryset) and, only when the page
+    reaches past the archive cutoff, ``archived`` (the matching
+    ArchivedBooking queryset, or None when the filter cannot match archived
+    rows). Returns (rows, next_cursor) like keyset_page.
+    """
+    ordering = (f'-{field}', f'-{pk_field}')
+    position = decode_cursor(cursor)
+    rows = list(after_cursor(hot, position, field, pk_field).order_by(*ordering)[:page_size + 1])
+
+    watermark = archive_cutoff()
+    if not isinstance(Booking._meta.get_field(field), models.DateTimeField):
+        watermark = timezone.localdate(watermark)
+    hot_covers_page = len(rows) > page_size and row_value(rows[-1], field) >= watermark
+    if archived is not None and not hot_covers_page:
+        rows += after_cursor(archived, position, field, pk_field).order_by(*ordering)[:page_size + 1]
+        rows.sort(key=lambda row: (row_value(row, field), row_value(row, pk_field)), reverse=True)
+        rows = rows[:page_size + 1]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(row_value(rows[-1], field), row_value(rows[-1], pk_field))
+    return rows, next_cursor
@@ -0,0 +1,136 @@
+from django.db.models import OuterRef, Subquery # type: ignore
+from main.models import Service
+from .geo import covering_cells, distance_km, geohash_filter
+from .models import ProviderService, ProviderStats
+from .pagination import keyset_page
+
+DIRECTORY_PAGE_SIZE = 20
+NEAREST_RADIUS_KM = 10
+MAX_RADIUS_KM = 50
+# "Reliable" filter: at most this share of finished bookings cancelled/rejected
+RELIABLE_CANCELLATION_RATE = 0.1
+# Everything directory_entry() reads, joined into the page query
+DIRECTORY_RELATED = ('provider__user', 'provider__stats', 'service_type')
+
+
+# -------------------------------
+# Provider Directory (one listing per provider)
+# -------------------------------
+def latest_listings(profession_name):
+    """
+    One ProviderService per provider for a profession: the provider's latest
+    listing, picked in SQL by a correlated subquery on
+    (service_type, provider, created_at).
+    """
+    latest_for_provider = ProviderService.objects.filter(
+        service_type=OuterRef('service_type'),
+        provider=OuterRef('provider'),
+    ).order_by('-created_at', '-id').values('id')[:1]
+
+    return ProviderService.objects.filter(
+        service_type__profession_name=profession_name,
+        id=Subquery(latest_for_provider),
+    ).select_related(*DIRECTORY_RELATED)
+
+
+def directory_page(profession_name, cursor=None, page_size=DIRECTORY_PAGE_SIZE):
+    """
+    Return (entries, next_cursor) for one page of the directory. Each entry is
+    the dict shape the directory templates expect.
+    """
+    listings, next_cursor = keyset_page(latest_listings(profession_name), cursor, page_size)
+    return [directory_entry(service) for service in listings], next_cursor
+
+
+def directory_entry(service):
+    # ProviderService (with DIRECTORY_RELATED loaded) -> template row
+    stats = getattr(service.provider, 'stats', None)
+    return {
+        'provider': service.provider,
+        'service': service,
+        'service_type': service.service_type.profession_name,
+        'experience': service.experience,
+        'price': service.price,
+        'address': service.address,
+        'phone': service.phone,
+        'rating': round(stats.rating_avg, 1) if stats and stats.rating_count else None,
+        'rating_count': stats.rating_count if stats else 0,
+        'cancellation_rate': stats.cancellation_rate if stats else 0.0,
+    }
+
+
+# -------------------------------
+# Top rated
+# -------------------------------
+def rated_listing_ids(service_id, min_rating=0, max_cancellation=None):
+    # Latest listing id per provider in the profession, in rating order
+    latest_for_provider = ProviderService.objects.filter(
+        service_type_id=service_id, provider_id=OuterRef('provider_id'),
+    ).order_by('-created_at', '-id').values('id')[:1]
+
+    ranked = ProviderStats.objects.annotate(listing_id=Subquery(latest_for_provider)).filter(listing_id__isnull=False)
+    if min_rating:
+        ranked = ranked.filter(rating_avg__gte=min_rating)
+    if max_cancellation is not None:
+        ranked = ranked.filter(cancellation_rate__lte=max_cancellation)
+    return ranked.order_by('-rating_avg', '-rating_count', '-provider_id').values_list('listing_id', flat=True)
+
+
+def rated_page(profession_name, min_rating=0, max_cancellation=None, page=1, page_size=DIRECTORY_PAGE_SIZE):
+    """
+    Return (entries, has_next): providers of a profession, best average
+    rating first, each with their latest listing. The walk goes down
+    ProviderStats' rating index and probes each provider's listings through
+    the directory index, so nothing is aggregated per request.
+    """
+    service_id = Service.objects.filter(profession_name=profession_name).values_list('id', flat=True).first()
+    if service_id is None:
+        return [], False
+    offset = (max(page, 1) - 1) * page_size
+    ids = list(rated_listing_ids(service_id, min_rating, max_cancellation)[offset:offset + page_size + 1])
+    has_next = len(ids) > page_size
+    ids = ids[:page_size]
+    rows = ProviderService.objects.select_related(*DIRECTORY_RELATED).in_bulk(ids)
+    return [directory_entry(rows[i]) for i in ids if i in rows], has_next
+
+
+# -------------------------------
+# Nearest first
+# -------------------------------
+def nearby_listings(service_id, latitude, longitude, radius_km):
+    # Listings in the geohash cells covering the circle (a superset of it)
+    cells = covering_cells(latitude, longitude, radius_km)
+    return ProviderService.objects.filter(geohash_filter(cells, service_type_id=service_id))
+
+
+def nearest_page(profession_name, latitude, longitude, radius_km=NEAREST_RADIUS_KM, page=1, page_size=DIRECTORY_PAGE_SIZE):
+    """
+    Return (entries, has_next): providers of a profession within ``radius_km``
+    of the point, nearest first, each with its closest listing and a
+    ``distance_km``. Only listings in the covering geohash cells are read.
+    """
+    service_id = Service.objects.filter(profession_name=profession_name).values_list('id', flat=True).first()
+    if service_id is None:
+        return [], False
+    candidates = nearby_listings(service_id, latitude, longitude, radius_km).values_list(
+        'id', 'provider_id', 'latitude', 'longitude',
+    )
+
+    closest = {}  # provider_id -> (distance, listing id)
+    for listing_id, provider_id, lat, lon in candidates:
+        distance = distance_km(latitude, longitude, lat, lon)
+        if distance <= radius_km and (provider_id not in closest or distance < closest[provider_id][0]):
+            closest[provider_id] = (distance, listing_id)
+
+    ranked = sorted(closest.values())
+    offset = (max(page, 1) - 1) * page_size
+    window = ranked[offset:offset + page_size]
+    rows = ProviderService.objects.select_related(*DIRECTORY_RELATED).in_bulk(
+        [listing_id for _, listing_id in window]
+    )
+    entries = []
+    for distance, listing_id in window:
+        entry = directory_entry(rows[listing_id])
+        entry['distance_km'] = round(distance, 1)
+        entries.append(entry)
+    return entries, len(ranked) > offset + page_size
@@ -0,0 +1,140 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction # type: ignore
+from django.db.models import F, Sum # type: ignore
+from .models import EarningEntry, ProviderEarning
+from .stats import bump
+
+
+# -------------------------------
+# Provider Earnings Ledger
+# -------------------------------
+# Every credit/refund is appended to EarningEntry, keyed by (booking, kind),
+# and ProviderEarning.total_earnings is moved with a database-side
+# ``UPDATE ... SET total = total + x``. The unique constraint makes a
+# repeated credit a no-op, and the F() update never loses a concurrent write.
+
+def _record(booking, kind, amount):
+    with transaction.atomic():
+        try:
+            # Inner savepoint so a duplicate does not poison the outer transaction
+            with transaction.atomic():
+                EarningEntry.objects.create(
+                    provider_id=booking.provider_id, booking=booking, kind=kind, amount=amount,
+                )
+        except IntegrityError:
+            return False
+
+        ProviderEarning.objects.get_or_create(provider_id=booking.provider_id)
+        ProviderEarning.objects.filter(provider_id=booking.provider_id).update(
+            total_earnings=F('total_earnings') + amount
+        )
+        bump('gross_earnings', amount)
+    return True
+
+
+def credit_booking(booking, amount=None):
+    """
+    Credit the booking's price to its provider. Returns False if the booking
+    was already credited.
+    """
+    if amount is None:
+        amount = booking.service.price
+    return _record(booking, 'credit', Decimal(str(amount or '0.00')))
+
+
+def refund_booking(booking):
+    """
+    Reverse a previous credit. Returns False if the booking was never
+    credited or has already been refunded.
+    """
+    credit = EarningEntry.objects.filter(booking=booking, kind='credit').values_list('amount', flat=True).first()
+    if credit is None:
+        return False
+    return _record(booking, 'refund', -credit)
+
+
+def _record_many(provider_id, kind, amounts):
+    """
+    Append one ledger row per booking id in ``amounts`` that has no ``kind``
+    row yet, then move the provider total and gross counter once for the
+    whole batch. Returns the set of booking ids actually recorded.
+    """
+    if not amounts:
+        return set()
+    with transaction.atomic():
+        done = set(EarningEntry.objects.filter(booking_id__in=amounts, kind=kind).values_list('booking_id', flat=True))
+        todo = {booking_id: amount for booking_id, amount in amounts.items() if booking_id not in done}
+        try:
+            with transaction.atomic():
+                EarningEntry.objects.bulk_create([
+                    EarningEntry(provider_id=provider_id, booking_id=booking_id, kind=kind, amount=amount)
+                    for booking_id, amount in todo.items()
+                ])
+        except IntegrityError:
+            # A concurrent worker recorded some of them first: fall back to one row at a time
+            recorded = set()
+            for booking_id, amount in todo.items():
+                try:
+                    with transaction.atomic():
+                        EarningEntry.objects.create(
+                            provider_id=provider_id, booking_id=booking_id, kind=kind, amount=amount,
+                        )
+                    recorded.add(booking_id)
+                except IntegrityError:
+                    pass
+            todo = {booking_id: todo[booking_id] for booking_id in recorded}
+
+        total = sum(todo.values(), Decimal('0.00'))
+        if total:
+            ProviderEarning.objects.get_or_create(provider_id=provider_id)
+            ProviderEarning.objects.filter(provider_id=provider_id).update(
+                total_earnings=F('total_earnings') + total
+            )
+            bump('gross_earnings', total)
+    return set(todo)
+
+
+def credit_bookings(provider_id, prices):
+    """
+    Batch credit: ``prices`` maps booking id -> price for one provider.
+    Already-credited bookings are skipped. Returns the credited ids.
+    """
+    return _record_many(provider_id, 'credit', {
+        booking_id: Decimal(str(price or '0.00')) for booking_id, price in prices.items()
+    })
+
+
+def refund_bookings(provider_id, booking_ids):
+    # Batch refund of every credited, not yet refunded booking in booking_ids
+    if not booking_ids:
+        return set()
+    credits = dict(
+        EarningEntry.objects.filter(booking_id__in=booking_ids, kind='credit').values_list('booking_id', 'amount')
+    )
+    return _record_many(provider_id, 'refund', {booking_id: -amount for booking_id, amount in credits.items()})
+
+
+def rollup_earnings():
+    """
+    Rebuild every ProviderEarning total from the ledger. Returns the number
+    of providers whose stored total had drifted.
+    """
+    ledger_totals = dict(
+        EarningEntry.objects.values('provider_id')
+        .annotate(total=Sum('amount'))
+        .values_list('provider_id', 'total')
+    )
+    drifted = 0
+    with transaction.atomic():
+        for earning in ProviderEarning.objects.select_for_update():
+            total = ledger_totals.pop(earning.provider_id, Decimal('0.00'))
+            if earning.total_earnings != total:
+                earning.total_earnings = total
+                earning.save(update_fields=['total_earnings'])
+                drifted += 1
+        # Providers with ledger rows but no ProviderEarning yet
+        ProviderEarning.objects.bulk_create([
+            ProviderEarning(provider_id=provider_id, total_earnings=total)
+            for provider_id, total in ledger_totals.items()
+        ])
+    return drifted + len(ledger_totals)
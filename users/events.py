@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+
+from django.db import transaction # type: ignore
+
+# -------------------------------
+# Booking status events (in-process pub/sub)
+# -------------------------------
+# Status changes are published per customer after the writing transaction
+# commits. Each open SSE stream owns an asyncio.Queue on the ASGI event loop;
+# publishers may run in sync views on worker threads, so delivery goes
+# through loop.call_soon_threadsafe. Streams in other worker processes do not
+# see these events and fall back to polling the database (see
+# booking_events_view).
+
+class BookingEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # customer_id -> {queue: loop}
+
+    def subscribe(self, customer_id):
+        queue = asyncio.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.setdefault(customer_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, customer_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(customer_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(customer_id, None)
+
+    def subscriber_count(self, customer_id=None):
+        with self._lock:
+            if customer_id is not None:
+                return len(self._subscribers.get(customer_id, {}))
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, customer_id, event):
+        with self._lock:
+            targets = list(self._subscribers.get(customer_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Loop already closed: the stream is gone
+                self.unsubscribe(customer_id, queue)
+
+
+def _offer(queue, event):
+    # A slow client only loses events; the polling pass re-syncs it
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+broker = BookingEventBroker()
+
+
+def publish_status(booking_id, customer_id, status):
+    """
+    Tell the booking's customer about a status change once the current
+    transaction commits (immediately when not in one).
+    """
+    event = {'booking_id': booking_id, 'status': status}
+    transaction.on_commit(lambda: broker.publish(customer_id, event))
+
+
+def format_event(event):
+    return f"event: booking\nid: {event['booking_id']}\ndata: {json.dumps(event)}\n\n"
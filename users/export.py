@@ -0,0 +1,162 @@
+import csv
+import heapq
+from datetime import datetime, time, timedelta
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder # type: ignore
+from django.db.models import Q # type: ignore
+from django.utils import timezone # type: ignore
+from .models import ArchivedBooking, Booking, EarningEntry
+
+EXPORT_CHUNK_SIZE = 2000
+# Rows joined into one write; keeps the per-yield overhead down
+ROWS_PER_WRITE = 500
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson'}
+
+
+# -------------------------------
+# Streaming exports
+# -------------------------------
+# Finance dumps of bookings (hot and archived) and ledger entries. Rows are
+# read with values_list(...).iterator(chunk_size=...) over a fixed column
+# projection and written out as they arrive, so memory does not grow with
+# the size of the export. The admin views wrap the lines in a
+# StreamingHttpResponse; `python manage.py export_data` writes them to a
+# file or stdout.
+
+# (header, lookup); the first column must be the id
+BOOKING_COLUMNS = (
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('schedule_date', 'schedule_date'),
+    ('timing', 'timing'),
+    ('status', 'status'),
+    ('customer', 'customer__user__username'),
+    ('customer_phone', 'customer__phone'),
+    ('provider', 'provider__user__username'),
+    ('profession', 'service__service_type__profession_name'),
+    ('price', 'service__price'),
+)
+BOOKING_HEADERS = [header for header, _ in BOOKING_COLUMNS] + ['archived']
+
+EARNING_COLUMNS = (
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('kind', 'kind'),
+    ('amount', 'amount'),
+    ('booking_id', 'booking_id'),
+    ('provider', 'provider__user__username'),
+)
+EARNING_HEADERS = [header for header, _ in EARNING_COLUMNS]
+
+
+def created_between(date_from=None, date_to=None):
+    # Whole local days as a created_at range (an index-friendly comparison)
+    lookups = {}
+    if date_from:
+        lookups['created_at__gte'] = timezone.make_aware(datetime.combine(date_from, time.min))
+    if date_to:
+        lookups['created_at__lt'] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return lookups
+
+
+def _booking_filter(date_from=None, date_to=None, status=None, profession=None):
+    lookups = created_between(date_from, date_to)
+    if status:
+        lookups['status'] = status
+    if profession:
+        lookups['service__service_type__profession_name'] = profession
+    return lookups
+
+
+def booking_rows(date_from=None, date_to=None, status=None, profession=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Matching bookings from both the hot and the archive table as tuples in
+    BOOKING_HEADERS order, by id. Each table is read with one streaming
+    query.
+    """
+    lookups = _booking_filter(date_from, date_to, status, profession)
+    fields = [lookup for _, lookup in BOOKING_COLUMNS]
+
+    def rows(model, archived):
+        queryset = model.objects.filter(**lookups).order_by('id').values_list(*fields)
+        for row in queryset.iterator(chunk_size=chunk_size):
+            yield row + (archived,)
+
+    return heapq.merge(rows(Booking, False), rows(ArchivedBooking, True), key=itemgetter(0))
+
+
+def earning_rows(date_from=None, date_to=None, kind=None, profession=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Ledger entries as tuples in EARNING_HEADERS order, by id
+    lookups = created_between(date_from, date_to)
+    if kind:
+        lookups['kind'] = kind
+    queryset = EarningEntry.objects.filter(**lookups)
+    if profession:
+        # The entry's booking may be in either table (no join on booking)
+        match = {'service__service_type__profession_name': profession}
+        queryset = queryset.filter(
+            Q(booking_id__in=Booking.objects.filter(**match).values('id'))
+            | Q(booking_id__in=ArchivedBooking.objects.filter(**match).values('id'))
+        )
+    fields = [lookup for _, lookup in EARNING_COLUMNS]
+    return queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    # File-like object whose write() hands the line back to the caller
+    def write(self, value):
+        return value
+
+
+def _encode(headers, rows, export_format):
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def export_lines(headers, rows, export_format='csv'):
+    """
+    Encode ``rows`` as CSV (with a header line) or JSON Lines, yielding
+    strings of up to ROWS_PER_WRITE rows each.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format {export_format!r}; use one of {", ".join(EXPORT_FORMATS)}.')
+    batch = []
+    for line in _encode(headers, rows, export_format):
+        batch.append(line)
+        if len(batch) >= ROWS_PER_WRITE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def export_filename(dataset, export_format, date_from=None, date_to=None):
+    span = '_'.join(str(day) for day in (date_from, date_to) if day) or 'all'
+    return f'{dataset}-{span}.{export_format}'
+
+
+EXPORTS = {
+    'bookings': (BOOKING_HEADERS, booking_rows, 'status'),
+    'earnings': (EARNING_HEADERS, earning_rows, 'kind'),
+}
+
+
+def export_rows(dataset, filters, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    (headers, rows) for ``dataset`` filtered by the cleaned data of an
+    ExportFilterForm.
+    """
+    headers, rows, own_filter = EXPORTS[dataset]
+    return headers, rows(
+        date_from=filters.get('date_from'), date_to=filters.get('date_to'), profession=filters.get('profession'),
+        chunk_size=chunk_size, **{own_filter: filters.get(own_filter)},
+    )
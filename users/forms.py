@@ -1,14 +1,38 @@
 from django import forms # type: ignore
 from django.contrib.auth.forms import UserCreationForm # type: ignore
-from .models import CustomUser, Customer, ServiceProvider, ProviderService, Booking
+from .models import CustomUser, Customer, ServiceProvider, ProviderService, Booking, EarningEntry
 from main.models import Service
+from main.cache import cached_query
+from django.db.models.functions import Lower # type: ignore
 import re
 
 
+def email_registered(email):
+    # Case-insensitive; LOWER(email) = ... is served by user_email_lower_idx
+    return CustomUser.objects.alias(email_lower=Lower('email')).filter(email_lower=email.lower()).exists()
+
+
+# ------------------------------
+# Pre-hashed signup passwords
+# ------------------------------
+class PrehashedPasswordMixin:
+    # The async signup views hash password1 on the password pool
+    # (users/passwords.py) and set password_hash before save()
+    password_hash = None
+
+    def set_password_and_save(self, user, password_field_name='password1', commit=True):
+        if self.password_hash is None:
+            return super().set_password_and_save(user, password_field_name, commit)
+        user.password = self.password_hash
+        if commit:
+            user.save()
+        return user
+
+
 # ------------------------------
 # Customer Signup Form
 # ------------------------------
-class CustomerSignupForm(UserCreationForm):
+class CustomerSignupForm(PrehashedPasswordMixin, UserCreationForm):
     email = forms.EmailField(
         required=True,
         help_text="Required. Enter a valid email address.",
@@ -28,7 +52,7 @@ class CustomerSignupForm(UserCreationForm):
     # --- Ensure email is unique
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if CustomUser.objects.filter(email=email).exists():
+        if email_registered(email):
             raise forms.ValidationError("Email is already registered.")
         return email
 
@@ -71,7 +95,7 @@ class CustomerSignupForm(UserCreationForm):
 # ------------------------------
 # Service Provider Signup Form
 # ------------------------------
-class ProviderSignupForm(UserCreationForm):
+class ProviderSignupForm(PrehashedPasswordMixin, UserCreationForm):
     email = forms.EmailField(
         required=True,
         help_text="Required. Enter a valid email address.",
@@ -91,7 +115,7 @@ class ProviderSignupForm(UserCreationForm):
     # --- Ensure email is unique
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if CustomUser.objects.filter(email=email).exists():
+        if email_registered(email):
             raise forms.ValidationError("Email is already registered.")
         return email
 
@@ -184,6 +208,14 @@ class ProviderServiceForm(forms.ModelForm):
         model = ProviderService
         fields = ['service_type', 'address', 'phone', 'experience', 'price']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Render the dropdown from the catalog cache; validation still uses the queryset
+        self.fields['service_type'].widget.choices = cached_query(
+            'service_type_choices', [Service],
+            lambda: list(Service.objects.values_list('id', 'profession_name')),
+        )
+
     # --- Custom phone number validation ---
     def clean_phone(self):
         phone = self.cleaned_data.get('phone')
@@ -203,3 +235,29 @@ class BookingForm(forms.ModelForm):
             'schedule_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'timing': forms.Select(attrs={'class': 'form-select'}),
         }
+
+
+# ------------------------------
+# Admin Export Filter Form
+# ------------------------------
+class ExportFilterForm(forms.Form):
+    FORMAT_CHOICES = [('csv', 'CSV'), ('jsonl', 'JSON Lines')]
+
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    # Bookings only; earnings filter on kind
+    status = forms.ChoiceField(
+        required=False,
+        choices=[('', 'Any status')] + Booking.STATUS_CHOICES + [('rejected', 'Rejected')],
+    )
+    kind = forms.ChoiceField(required=False, choices=[('', 'Credits and refunds')] + EarningEntry.KIND_CHOICES)
+    profession = forms.CharField(required=False, max_length=100)
+    format = forms.ChoiceField(required=False, choices=FORMAT_CHOICES)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("The start date must not be after the end date.")
+        cleaned_data['format'] = cleaned_data.get('format') or 'csv'
+        return cleaned_data
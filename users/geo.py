@@ -0,0 +1,135 @@
+import csv
+import math
+import re
+from functools import lru_cache
+from django.conf import settings # type: ignore
+from django.db.models import Q # type: ignore
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Stored precision: ~150 m cells
+GEOHASH_PRECISION = 7
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+# -------------------------------
+# Geohash
+# -------------------------------
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate longitude, latitude
+        span, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    # (latitude span, longitude span) of one cell, in degrees
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision - lon_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells cover every point within ``radius_km``: the
+    finest precision whose cells are at least ``radius_km`` across, so the
+    centre cell plus its eight neighbours contain the whole circle.
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_span, lon_span = cell_size(candidate)
+        if min(lat_span * KM_PER_DEGREE, lon_span * KM_PER_DEGREE * cos_lat) >= radius_km:
+            precision = candidate
+            break
+
+    lat_span, lon_span = cell_size(precision)
+    cells = set()
+    for d_lat in (-lat_span, 0, lat_span):
+        for d_lon in (-lon_span, 0, lon_span):
+            lat = min(max(latitude + d_lat, -89.999999), 89.999999)
+            lon = (longitude + d_lon + 180) % 360 - 180
+            cells.add(geohash_encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def geohash_filter(cells, field='geohash', **scope):
+    """
+    Prefix match as index-friendly ranges ('{' sorts right after 'z'). The
+    ``scope`` lookups are repeated inside every range so each OR branch can
+    seek a composite (scope..., geohash) index on its own.
+    """
+    query = Q()
+    for cell in cells:
+        query |= Q(**scope, **{f'{field}__gte': cell, f'{field}__lt': cell + '{'})
+    return query
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    # Haversine great-circle distance
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# -------------------------------
+# Offline gazetteer
+# -------------------------------
+# settings.GAZETTEER_FILE is a CSV of (name, latitude, longitude) for known
+# localities and cities. An address is placed at the longest gazetteer name
+# it contains, so "12 Koramangala, Bengaluru" lands on Koramangala rather
+# than the city centre. No network lookups.
+
+def _normalize(text):
+    return ' ' + re.sub(r'[^a-z0-9]+', ' ', (text or '').lower()).strip() + ' '
+
+
+@lru_cache(maxsize=4)
+def load_gazetteer(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        places = [
+            (_normalize(row['name']), float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(handle)
+        ]
+    # Most specific (longest) names first
+    return sorted(places, key=lambda place: len(place[0]), reverse=True)
+
+
+def gazetteer():
+    return load_gazetteer(str(settings.GAZETTEER_FILE))
+
+
+def geocode(address):
+    # (latitude, longitude) of the best gazetteer match, or None
+    text = _normalize(address)
+    for name, latitude, longitude in gazetteer():
+        if name in text:
+            return latitude, longitude
+    return None
+
+
+def locate(instance):
+    """
+    Fill latitude/longitude on a ProviderService or Customer from its address,
+    and the geohash where the model has one.
+    """
+    point = geocode(instance.address)
+    instance.latitude, instance.longitude = point if point else (None, None)
+    if hasattr(instance, 'geohash'):
+        instance.geohash = geohash_encode(*point) if point else ''
@@ -0,0 +1,143 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings # type: ignore
+from django.db import IntegrityError, transaction # type: ignore
+from django.http import HttpResponse, JsonResponse # type: ignore
+from django.utils import timezone # type: ignore
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 64
+PURGE_BATCH_SIZE = 1000
+
+
+# -------------------------------
+# Idempotency keys
+# -------------------------------
+# Clients on flaky networks resend the same request. A view decorated with
+# @idempotent() runs once per (user, Idempotency-Key): the first request
+# claims the key, runs the view and stores the response. A repeat within
+# IDEMPOTENCY_KEY_TTL gets the stored response back (Idempotent-Replayed:
+# true) without running the view again. A repeat that arrives while the
+# first is still running gets 409. Reusing a key for a different request
+# gets 422. Failures (an exception or a 5xx) release the key so the client
+# can retry. A claim whose request died holds the key for
+# IDEMPOTENCY_LOCK_SECONDS only. Expired rows are removed in batches by
+# `python manage.py purge_idempotency_keys`.
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def lock_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60))
+
+
+def request_fingerprint(request):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (request.method.encode(), request.get_full_path().encode(), request.body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _error(message, status):
+    return JsonResponse({'status': 'error', 'message': message}, status=status)
+
+
+def _replay(record):
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type)
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(user, key, fingerprint):
+    """
+    Returns (claimed record, None), or (None, existing record) when the key
+    is already taken. The existing record is None if it vanished meanwhile.
+    """
+    now = timezone.now()
+    existing = IdempotencyKey.objects.filter(user=user, key=key, expires_at__gt=now).first()
+    if existing is not None:
+        return None, existing
+    # An expired row (or an abandoned claim) would block the insert
+    IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint, expires_at=now + lock_ttl(),
+            ), None
+    except IntegrityError:
+        # A concurrent request claimed it first
+        return None, IdempotencyKey.objects.filter(user=user, key=key).first()
+
+
+def _store(record, response):
+    record.status_code = response.status_code
+    record.content_type = response.get('Content-Type', '')
+    record.location = response.get('Location', '')[:255]
+    record.body = response.content
+    record.expires_at = timezone.now() + key_ttl()
+    record.save(update_fields=['status_code', 'content_type', 'location', 'body', 'expires_at'])
+
+
+def idempotent(default_key=None):
+    """
+    Decorator for views that must run at most once per Idempotency-Key.
+    ``default_key(request, *args, **kwargs)`` supplies a key when the
+    request has no header (e.g. reloads of a confirmation page); without
+    one, such requests run the view as usual. Goes after @login_required.
+    """
+    def decorate(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None and default_key is not None:
+                key = default_key(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+                return _error(f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} printable characters.', 400)
+
+            fingerprint = request_fingerprint(request)
+            record, existing = _claim(request.user, key, fingerprint)
+            if record is None:
+                if existing is not None and existing.fingerprint != fingerprint:
+                    return _error(f'This {IDEMPOTENCY_HEADER} was already used for a different request.', 422)
+                if existing is None or existing.status_code is None:
+                    response = _error('The original request is still in progress.', 409)
+                    response['Retry-After'] = '1'
+                    return response
+                return _replay(existing)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                record.delete()
+                raise
+            if response.streaming or response.status_code >= 500:
+                record.delete()
+            else:
+                _store(record, response)
+            return response
+        return wrapper
+    return decorate
+
+
+def purge_expired_keys(batch_size=PURGE_BATCH_SIZE):
+    """
+    Delete expired keys ``batch_size`` rows per statement, so each write
+    holds the database briefly. Returns the number deleted.
+    """
+    now = timezone.now()
+    purged = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        deleted, _ = IdempotencyKey.objects.filter(id__in=ids).delete()
+        purged += deleted
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from users.archive import ARCHIVE_CHUNK_SIZE, archive_bookings, archive_days
+
+
+class Command(BaseCommand):
+    help = (
+        'Move finished bookings older than BOOKING_ARCHIVE_DAYS into the archive table. '
+        'Each chunk commits on its own; an interrupted run can simply be started again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive bookings older than this many days (at least BOOKING_ARCHIVE_DAYS).')
+        parser.add_argument('--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE, help='Bookings moved per transaction.')
+        parser.add_argument('--max-chunks', type=int, default=None, help='Stop after this many chunks.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between chunks so request writers get the database.')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else archive_days()
+        moved = 0
+        try:
+            for ids in archive_bookings(days, options['chunk_size'], options['max_chunks']):
+                moved += len(ids)
+                self.stdout.write(f'Archived {len(ids)} bookings (up to id {ids[-1]}), {moved} so far')
+                if options['pause']:
+                    time.sleep(options['pause'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} bookings older than {days} days.'))
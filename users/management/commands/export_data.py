@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from users.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORTS, export_lines, export_rows
+from users.forms import ExportFilterForm
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream bookings (hot and archived) or earnings ledger entries as CSV or JSON Lines. '
+        'Memory use does not depend on the number of rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--from', dest='date_from', help='First day included (YYYY-MM-DD, by creation date).')
+        parser.add_argument('--to', dest='date_to', help='Last day included (YYYY-MM-DD).')
+        parser.add_argument('--status', help='Bookings only: one booking status.')
+        parser.add_argument('--kind', help='Earnings only: credit or refund.')
+        parser.add_argument('--profession', help='Only bookings/earnings for this service.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip.')
+        parser.add_argument('--output', help='File to write (default: stdout).')
+
+    def handle(self, *args, **options):
+        # Same validation as the admin export endpoints
+        form = ExportFilterForm({
+            key: options[key] or '' for key in ('date_from', 'date_to', 'status', 'kind', 'profession', 'format')
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        filters = form.cleaned_data
+
+        dataset = options['dataset']
+        headers, rows = export_rows(dataset, filters, options['chunk_size'])
+        lines = export_lines(headers, rows, filters['format'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+                handle.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f'Exported {dataset} to {options["output"]}.'))
+        else:
+            for chunk in lines:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand # type: ignore
+from users.geo import locate
+from users.models import Customer, ProviderService
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Fill latitude/longitude (and listing geohashes) from the offline gazetteer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-geocode rows that already have coordinates.')
+
+    def handle(self, *args, **options):
+        for model, fields in (
+            (ProviderService, ['latitude', 'longitude', 'geohash']),
+            (Customer, ['latitude', 'longitude']),
+        ):
+            queryset = model.objects.only('id', 'address', *fields).order_by('id')
+            if not options['all']:
+                queryset = queryset.filter(latitude__isnull=True)
+            located = missing = 0
+            batch = []
+            for row in queryset.iterator(chunk_size=BATCH_SIZE):
+                locate(row)
+                if row.latitude is None:
+                    missing += 1
+                    continue
+                located += 1
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    model.objects.bulk_update(batch, fields)
+                    batch = []
+            model.objects.bulk_update(batch, fields)
+            self.stdout.write(f'{model.__name__}: {located} located, {missing} without a gazetteer match')
+        self.stdout.write(self.style.SUCCESS('Geocoding done.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand # type: ignore
+from users.idempotency import PURGE_BATCH_SIZE, purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys in batches. Safe to run from cron while the site is up.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='Keys deleted per statement.')
+
+    def handle(self, *args, **options):
+        purged = purge_expired_keys(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired idempotency keys.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand # type: ignore
+from users.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Refill the provider full-text search index from the listing tables.'
+
+    def handle(self, *args, **options):
+        if search_backend() is None:
+            self.stdout.write(self.style.WARNING('This database has no full-text index; search scans the tables instead.'))
+            return
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} listings.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand # type: ignore
+from users.stats import rebuild_counters, rebuild_provider_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the admin dashboard counters and per-provider stats from the customer, provider, booking, review and earnings tables.'
+
+    def handle(self, *args, **options):
+        counters = rebuild_counters()
+        for name, value in sorted(counters.items()):
+            self.stdout.write(f'{name}: {value}')
+        providers = rebuild_provider_stats()
+        self.stdout.write(f'provider stats: {providers} providers')
+        self.stdout.write(self.style.SUCCESS('Dashboard counters and provider stats reconciled.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand # type: ignore
+from users.earnings import rollup_earnings
+
+
+class Command(BaseCommand):
+    help = "Rebuild every provider's total earnings from the append-only earnings ledger."
+
+    def handle(self, *args, **options):
+        drifted = rollup_earnings()
+        self.stdout.write(self.style.SUCCESS(f'Earnings rolled up. {drifted} provider total(s) corrected.'))
@@ -0,0 +1,201 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password # type: ignore
+from django.core.management.base import BaseCommand, CommandError # type: ignore
+from django.db import transaction # type: ignore
+from django.utils import timezone # type: ignore
+
+from main.cache import bump_version
+from main.models import Service
+from users.earnings import rollup_earnings
+from users.geo import geocode, geohash_encode
+from users.models import (
+    Booking, CustomUser, Customer, EarningEntry, ProviderService, Review, ServiceProvider,
+)
+from users.search import rebuild_search_index
+from users.stats import rebuild_counters, rebuild_provider_stats
+
+# Professions seeded by default, with the images already under media/services
+PROFESSIONS = {
+    'Plumbing': 'services/plumber.png',
+    'Electrical': 'services/electrical.webp',
+    'Painting': 'services/paintingimg.jpg',
+    'Cleaning': 'services/cleaning.avif',
+    'Flooring': 'services/flooringimg.webp',
+    'Appliance Repair': 'services/appliance_repair.jpg',
+}
+
+BOOKING_STATUS_WEIGHTS = {
+    'pending': 20, 'confirmed': 15, 'arriving': 5, 'arrived': 5, 'completed': 45, 'cancelled': 10,
+}
+CREDITED_STATUSES = {'confirmed', 'arriving', 'arrived', 'completed'}
+
+REVIEW_SNIPPETS = [
+    'Arrived on time and fixed everything quickly.',
+    'Very professional, would book again.',
+    'Good work but a little pricey.',
+    'Friendly and tidy, highly recommended!',
+    'Solved a problem two others could not.',
+]
+
+# Avatars reused from media/profile_pics (templates expect every user to have one)
+PROFILE_PICS = [
+    'profile_pics/ajay.jpg', 'profile_pics/amar.jpg', 'profile_pics/babu.jpg', 'profile_pics/hemanth.jpg',
+    'profile_pics/muni.jpg', 'profile_pics/salu.jpg', 'profile_pics/team-2.jpg', 'profile_pics/testimonial-1.jpg',
+]
+
+# Areas present in users/data/gazetteer.csv, so every address can be placed
+LOCALITIES = [
+    'MG Road', 'Indiranagar', 'Koramangala', 'Jayanagar', 'JP Nagar', 'Malleshwaram', 'Whitefield',
+    'HSR Layout', 'BTM Layout', 'Hebbal', 'Yelahanka', 'Marathahalli', 'Rajajinagar', 'Basavanagudi',
+]
+
+SEED_PASSWORD = 'Passw0rd!'
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Seed a realistic GoService dataset at a chosen scale using bulk inserts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--providers', type=int, default=200)
+        parser.add_argument('--listings', type=int, default=300, help='ProviderService listings per profession.')
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=2000)
+        parser.add_argument('--prefix', default='seed', help='Username prefix for the seeded accounts.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for a reproducible dataset.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        if CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users with prefix '{prefix}_' already exist; pass a different --prefix.")
+        if options['providers'] < 1 or options['customers'] < 1:
+            raise CommandError('Need at least one customer and one provider.')
+
+        # Hash once: every seeded account shares the same password
+        password = make_password(SEED_PASSWORD)
+
+        with transaction.atomic():
+            services = self.seed_services()
+            customers = self.seed_people(prefix, 'customer', options['customers'], password, Customer)
+            providers = self.seed_people(prefix, 'provider', options['providers'], password, ServiceProvider)
+            listings = self.seed_listings(rng, services, providers, options['listings'])
+            bookings = self.seed_bookings(rng, customers, listings, options['bookings'])
+            self.seed_earnings(bookings)
+            self.seed_reviews(rng, customers, bookings, options['reviews'])
+
+        # Bulk inserts bypass signals: rebuild derived data once at the end
+        rollup_earnings()
+        rebuild_counters()
+        rebuild_provider_stats()
+        rebuild_search_index()
+        for model in (Service, Review, CustomUser, ProviderService, Booking):
+            bump_version(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(customers)} customers, {len(providers)} providers, {len(listings)} listings, "
+            f"{len(bookings)} bookings and {options['reviews']} reviews. Password for all: {SEED_PASSWORD}"
+        ))
+
+    def seed_services(self):
+        services = []
+        for name, image in PROFESSIONS.items():
+            service = Service.objects.filter(profession_name=name).first()
+            if service is None:
+                service = Service.objects.bulk_create([Service(profession_name=name, image=image)])[0]
+            services.append(service)
+        return services
+
+    def seed_people(self, prefix, role, count, password, profile_model):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'{prefix}_{role}_{i}', email=f'{prefix}_{role}_{i}@example.com',
+                password=password, role=role, profile_pic=PROFILE_PICS[i % len(PROFILE_PICS)],
+            )
+            for i in range(count)
+        ], batch_size=BATCH_SIZE)
+        if profile_model is not Customer:
+            return profile_model.objects.bulk_create([profile_model(user=user) for user in users], batch_size=BATCH_SIZE)
+        customers = []
+        for i, user in enumerate(users):
+            address = f'{LOCALITIES[i % len(LOCALITIES)]}, Bengaluru'
+            latitude, longitude = geocode(address)
+            customers.append(Customer(
+                user=user, phone='9876543210', address=address, latitude=latitude, longitude=longitude,
+            ))
+        return Customer.objects.bulk_create(customers, batch_size=BATCH_SIZE)
+
+    def seed_listings(self, rng, services, providers, per_profession):
+        experiences = [value for value, _ in ProviderService.EXPERIENCE_CHOICES]
+        listings = []
+        for service in services:
+            for _ in range(per_profession):
+                locality = rng.choice(LOCALITIES)
+                # Spread listings around the locality centre (~1 km)
+                latitude, longitude = geocode(locality)
+                latitude += rng.uniform(-0.01, 0.01)
+                longitude += rng.uniform(-0.01, 0.01)
+                listings.append(ProviderService(
+                    provider=rng.choice(providers), service_type=service,
+                    address=f'{rng.randint(1, 999)} {locality}, Bengaluru', phone='9876543210',
+                    experience=rng.choice(experiences), price=Decimal(rng.randrange(200, 3000, 50)),
+                    latitude=latitude, longitude=longitude, geohash=geohash_encode(latitude, longitude),
+                ))
+        return ProviderService.objects.bulk_create(listings, batch_size=BATCH_SIZE)
+
+    def seed_bookings(self, rng, customers, listings, count):
+        today = timezone.localdate()
+        statuses = list(BOOKING_STATUS_WEIGHTS)
+        weights = list(BOOKING_STATUS_WEIGHTS.values())
+        slots = list(Booking.TIMING_SLOTS.items())
+        taken = set()
+        bookings = []
+        attempts = 0
+        while len(bookings) < count and attempts < count * 5:
+            attempts += 1
+            listing = rng.choice(listings)
+            schedule_date = today + timedelta(days=rng.randint(-120, 60))
+            timing, (start, end) = rng.choice(slots)
+            # Respect the one-live-booking-per-provider-slot constraint
+            key = (listing.provider_id, schedule_date, start)
+            if key in taken:
+                continue
+            taken.add(key)
+            bookings.append(Booking(
+                customer=rng.choice(customers), provider_id=listing.provider_id, service=listing,
+                schedule_date=schedule_date, timing=timing, slot_start=start, slot_end=end,
+                status=rng.choices(statuses, weights)[0],
+            ))
+        return Booking.objects.bulk_create(bookings, batch_size=BATCH_SIZE)
+
+    def seed_earnings(self, bookings):
+        EarningEntry.objects.bulk_create([
+            EarningEntry(provider_id=b.provider_id, booking=b, kind='credit', amount=b.service.price)
+            for b in bookings if b.status in CREDITED_STATUSES
+        ], batch_size=BATCH_SIZE)
+
+    def seed_reviews(self, rng, customers, bookings, count):
+        now = timezone.now()
+        # Rate most completed bookings (at most one review each); the rest is site feedback
+        completed = [b for b in bookings if b.status == 'completed']
+        rated = rng.sample(completed, min(len(completed), count * 3 // 4))
+        reviews = [
+            Review(
+                customer_id=b.customer_id, booking=b, provider_id=b.provider_id,
+                rating=rng.choices([1, 2, 3, 4, 5], [1, 1, 3, 6, 9])[0], content=rng.choice(REVIEW_SNIPPETS),
+                created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            )
+            for b in rated
+        ]
+        reviews += [
+            Review(
+                customer=rng.choice(customers), content=rng.choice(REVIEW_SNIPPETS),
+                created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            )
+            for _ in range(count - len(reviews))
+        ]
+        Review.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
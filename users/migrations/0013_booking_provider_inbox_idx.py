@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0012_review"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["provider", "-created_at", "-id"],
+                name="booking_provider_inbox_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0001_initial"),
+        ("users", "0013_booking_provider_inbox_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="providerservice",
+            index=models.Index(
+                fields=["service_type", "provider", "-created_at"],
+                name="listing_directory_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:33
+
+from datetime import time
+
+from django.db import migrations, models
+
+TIMING_SLOTS = {
+    "9AM-11AM": (time(9), time(11)),
+    "11AM-1PM": (time(11), time(13)),
+    "1PM-3PM": (time(13), time(15)),
+    "3PM-5PM": (time(15), time(17)),
+    "5PM-7PM": (time(17), time(19)),
+}
+
+
+def backfill_slots(apps, schema_editor):
+    # Parse existing free-text timings. Only the earliest live booking of a
+    # provider slot gets structured times so the unique constraint can be
+    # created over legacy double bookings.
+    Booking = apps.get_model("users", "Booking")
+    taken = set()
+    for booking in Booking.objects.order_by("id").iterator():
+        slot = TIMING_SLOTS.get(booking.timing)
+        if slot is None:
+            continue
+        key = (booking.provider_id, booking.schedule_date, slot[0])
+        live = booking.status not in ("cancelled", "rejected")
+        if live and key in taken:
+            continue
+        if live:
+            taken.add(key)
+        booking.slot_start, booking.slot_end = slot
+        booking.save(update_fields=["slot_start", "slot_end"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0015_earningentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="slot_end",
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="slot_start",
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("status__in", ["cancelled", "rejected"]), _negated=True
+                ),
+                fields=("provider", "schedule_date", "slot_start"),
+                name="unique_provider_slot",
+            ),
+        ),
+    ]
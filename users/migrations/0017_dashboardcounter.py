@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:37
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def seed_counters(apps, schema_editor):
+    # Start the counters from the current tables; signals keep them in step after this
+    Booking = apps.get_model("users", "Booking")
+    Customer = apps.get_model("users", "Customer")
+    DashboardCounter = apps.get_model("users", "DashboardCounter")
+    ProviderEarning = apps.get_model("users", "ProviderEarning")
+    ServiceProvider = apps.get_model("users", "ServiceProvider")
+
+    counters = {
+        "customers": Customer.objects.count(),
+        "providers": ServiceProvider.objects.count(),
+        "gross_earnings": ProviderEarning.objects.aggregate(
+            total=Sum("total_earnings")
+        )["total"] or 0,
+    }
+    for row in Booking.objects.values("status").annotate(total=Count("id")):
+        counters[f"bookings:{row['status']}"] = row["total"]
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, value=value) for name, value in counters.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0016_booking_slot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                (
+                    "value",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
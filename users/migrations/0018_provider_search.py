@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:12
+
+from django.db import migrations
+
+SOURCE_SQL = (
+    "FROM users_providerservice ps "
+    "JOIN users_serviceprovider sp ON sp.id = ps.provider_id "
+    "JOIN users_customuser u ON u.id = sp.user_id "
+    "JOIN main_service s ON s.id = ps.service_type_id"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # Full-text index over provider username, profession and listing address
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE users_providersearch USING fts5("
+            "username, profession, address, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO users_providersearch (rowid, username, profession, address) "
+            f"SELECT ps.id, u.username, s.profession_name, ps.address {SOURCE_SQL}"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE users_providersearch ("
+            "listing_id integer PRIMARY KEY, document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX users_providersearch_document "
+            "ON users_providersearch USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO users_providersearch (listing_id, document) "
+            "SELECT ps.id, setweight(to_tsvector('simple', u.username), 'A') "
+            "|| setweight(to_tsvector('simple', s.profession_name), 'A') "
+            f"|| setweight(to_tsvector('simple', ps.address), 'B') {SOURCE_SQL}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute("DROP TABLE IF EXISTS users_providersearch")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0001_initial"),
+        ("users", "0017_dashboardcounter"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0019_geo_location"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="earningentry",
+            name="booking",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                to="users.booking",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ArchivedBooking",
+            fields=[
+                ("schedule_date", models.DateField()),
+                ("timing", models.CharField(max_length=50)),
+                ("slot_start", models.TimeField(blank=True, null=True)),
+                ("slot_end", models.TimeField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("confirmed", "Confirmed"),
+                            ("arriving", "Arriving"),
+                            ("arrived", "Arrived"),
+                            ("completed", "Completed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="users.customer"
+                    ),
+                ),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="users.serviceprovider",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="users.providerservice",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["provider", "-created_at", "-id"],
+                        name="archive_provider_idx",
+                    ),
+                    models.Index(
+                        fields=["customer", "-schedule_date", "-id"],
+                        name="archive_customer_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
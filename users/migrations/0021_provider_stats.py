@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:02
+
+import django.core.validators
+import django.db.models.deletion
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def backfill_provider_stats(apps, schema_editor):
+    # One stats row per existing provider, counted from hot and archived bookings
+    ServiceProvider = apps.get_model("users", "ServiceProvider")
+    ProviderStats = apps.get_model("users", "ProviderStats")
+    stats = {pk: ProviderStats(provider_id=pk) for pk in ServiceProvider.objects.values_list("id", flat=True)}
+    for model_name in ("Booking", "ArchivedBooking"):
+        model = apps.get_model("users", model_name)
+        for row in model.objects.filter(
+            status__in=["completed", "cancelled", "rejected"]
+        ).values("provider_id", "status").annotate(total=models.Count("id")):
+            if row["provider_id"] not in stats:
+                continue
+            if row["status"] == "completed":
+                stats[row["provider_id"]].completed_count += row["total"]
+            else:
+                stats[row["provider_id"]].cancelled_count += row["total"]
+    ProviderStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0020_booking_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="booking",
+            field=models.OneToOneField(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="review",
+                to="users.booking",
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="provider",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="users.serviceprovider",
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="rating",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(5),
+                ],
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProviderStats",
+            fields=[
+                (
+                    "provider",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="users.serviceprovider",
+                    ),
+                ),
+                ("rating_sum", models.IntegerField(default=0)),
+                ("rating_count", models.IntegerField(default=0)),
+                ("completed_count", models.IntegerField(default=0)),
+                ("cancelled_count", models.IntegerField(default=0)),
+                (
+                    "rating_avg",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=django.db.models.expressions.CombinedExpression(
+                            django.db.models.functions.comparison.Cast(
+                                "rating_sum", models.FloatField()
+                            ),
+                            "/",
+                            django.db.models.functions.comparison.Greatest(
+                                "rating_count", 1
+                            ),
+                        ),
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                (
+                    "cancellation_rate",
+                    models.GeneratedField(
+                        db_persist=True,
+                        expression=django.db.models.expressions.CombinedExpression(
+                            django.db.models.functions.comparison.Cast(
+                                "cancelled_count", models.FloatField()
+                            ),
+                            "/",
+                            django.db.models.functions.comparison.Greatest(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("completed_count"),
+                                    "+",
+                                    models.F("cancelled_count"),
+                                ),
+                                1,
+                            ),
+                        ),
+                        output_field=models.FloatField(),
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-rating_avg", "-rating_count", "-provider"],
+                        name="provider_rating_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_provider_stats, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 from django.contrib.auth.models import AbstractUser # type: ignore
 from django.contrib.auth import get_user_model  # type: ignore
+from django.core.validators import MaxValueValidator, MinValueValidator # type: ignore
 from django.db import models # type: ignore
+from django.db.models.functions import Cast, Greatest, Lower # type: ignore
 from main.models import Service
 from django.utils import timezone # type: ignore
+from datetime import time
 
 
 # -------------------------------
@@ -17,6 +20,12 @@ class CustomUser(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     profile_pic = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Signup "email already registered" check, case-insensitive
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
 # -------------------------------
 # Customer Extra Fields
 # -------------------------------
@@ -24,6 +33,16 @@ class Customer(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
     address = models.TextField(blank=True, null=True)
     phone = models.CharField(max_length=15, blank=True, null=True)
+    # Filled from the offline gazetteer (users.geo) when the address is saved
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Admin customer list: customers who filled in a phone number
+            models.Index(fields=['phone'], name='customer_phone_idx'),
+        ]
+
     def __str__(self):
         return self.user.username
 
@@ -68,12 +87,28 @@ class ProviderService(models.Model):
     experience = models.CharField(max_length=10, choices=EXPERIENCE_CHOICES)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Filled from the offline gazetteer (users.geo) when the address is saved
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Directory: latest listing per provider within a profession
+            models.Index(fields=['service_type', 'provider', '-created_at'], name='listing_directory_idx'),
+            # Nearest first: geohash prefix ranges within a profession
+            models.Index(fields=['service_type', 'geohash'], name='listing_geohash_idx'),
+        ]
 
     def __str__(self):
         return f"{self.provider.user.username} - {self.service_type.name}"
 
 
-class Booking(models.Model):
+class BookingFields(models.Model):
+    """
+    Columns shared by the hot Booking table and ArchivedBooking, so rows can
+    move between them with a plain INSERT ... SELECT.
+    """
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
@@ -83,18 +118,78 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
     ]
 
+    # Bookable slots offered by the booking modal: label -> (start, end)
+    TIMING_SLOTS = {
+        '9AM-11AM': (time(9), time(11)),
+        '11AM-1PM': (time(11), time(13)),
+        '1PM-3PM': (time(13), time(15)),
+        '3PM-5PM': (time(15), time(17)),
+        '5PM-7PM': (time(17), time(19)),
+    }
+
+    # Statuses that no longer hold the provider's slot
+    RELEASED_STATUSES = ['cancelled', 'rejected']
+    # Statuses a booking never leaves; only these are archived
+    FINISHED_STATUSES = ['completed', 'cancelled', 'rejected']
+
     customer = models.ForeignKey('Customer', on_delete=models.CASCADE)
     provider = models.ForeignKey('ServiceProvider', on_delete=models.CASCADE)
     service = models.ForeignKey('ProviderService', on_delete=models.CASCADE)
     schedule_date = models.DateField()
     timing = models.CharField(max_length=50)
+    slot_start = models.TimeField(null=True, blank=True)
+    slot_end = models.TimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def slot_for(cls, timing):
+        # (start, end) for a timing label, or None if it is not a bookable slot
+        return cls.TIMING_SLOTS.get(timing)
+
     def __str__(self):
         return f"{self.customer.user.username} - {self.service.service_type.name} with {self.provider.user.username}"
 
 
+class Booking(BookingFields):
+    is_archived = False
+
+    class Meta:
+        indexes = [
+            # Provider inbox keyset pagination: (provider, created_at, id)
+            models.Index(fields=['provider', '-created_at', '-id'], name='booking_provider_inbox_idx'),
+            # Customer's current/past bookings and the live status stream
+            models.Index(fields=['customer', 'status', '-schedule_date'], name='booking_customer_status_idx'),
+        ]
+        constraints = [
+            # One live booking per provider slot; released bookings free it
+            models.UniqueConstraint(
+                fields=['provider', 'schedule_date', 'slot_start'],
+                condition=~models.Q(status__in=BookingFields.RELEASED_STATUSES),
+                name='unique_provider_slot',
+            ),
+        ]
+
+
+# -------------------------------
+# Archived Bookings (cold storage)
+# -------------------------------
+class ArchivedBooking(BookingFields):
+    # Keeps the id the row had in Booking, so links and ledger entries still match
+    id = models.BigIntegerField(primary_key=True)
+    is_archived = True
+
+    class Meta:
+        indexes = [
+            # Same history orderings as the hot table
+            models.Index(fields=['provider', '-created_at', '-id'], name='archive_provider_idx'),
+            models.Index(fields=['customer', '-schedule_date', '-id'], name='archive_customer_idx'),
+        ]
+
+
 class ProviderEarning(models.Model):
     provider = models.OneToOneField(ServiceProvider, on_delete=models.CASCADE)
     total_earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
@@ -103,10 +198,129 @@ class ProviderEarning(models.Model):
         return f"{self.provider.user.username} - ₹{self.total_earnings}"
 
 
+# -------------------------------
+# Provider Earnings Ledger (append-only)
+# -------------------------------
+class EarningEntry(models.Model):
+    KIND_CHOICES = [
+        ('credit', 'Credit'),
+        ('refund', 'Refund'),
+    ]
+
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE)
+    # No database constraint: the entry outlives the hot row when the booking
+    # is moved to ArchivedBooking (same id)
+    booking = models.ForeignKey(Booking, on_delete=models.DO_NOTHING, db_constraint=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Signed: credits are positive, refunds negative
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # A booking is credited (and refunded) at most once
+            models.UniqueConstraint(fields=['booking', 'kind'], name='unique_earning_per_booking'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider.user.username} - {self.kind} ₹{self.amount} (booking {self.booking_id})"
+
+
 class Review(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    # Set for a review of a completed booking; general site feedback has none.
+    # No database constraint on booking: it may have moved to ArchivedBooking
+    booking = models.OneToOneField(
+        Booking, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='review',
+    )
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE, null=True, blank=True)
+    rating = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(5)],
+    )
     content = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Home page carousel: latest reviews
+            models.Index(fields=['-created_at'], name='review_recent_idx'),
+            # A customer's reviews, keyset-paged newest first (JSON API)
+            models.Index(fields=['customer', '-created_at', '-id'], name='review_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.user.username} - {self.content[:30]}"
+
+
+# -------------------------------
+# Admin Dashboard Counters (materialized)
+# -------------------------------
+class DashboardCounter(models.Model):
+    # e.g. "customers", "providers", "bookings:pending", "gross_earnings"
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+# -------------------------------
+# Per-provider quality stats (materialized)
+# -------------------------------
+class ProviderStats(models.Model):
+    provider = models.OneToOneField(ServiceProvider, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    # Cancelled or rejected bookings
+    cancelled_count = models.IntegerField(default=0)
+    # Stored columns computed by the database, so the directory can index them
+    rating_avg = models.GeneratedField(
+        expression=Cast('rating_sum', models.FloatField()) / Greatest('rating_count', 1),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+    cancellation_rate = models.GeneratedField(
+        expression=Cast('cancelled_count', models.FloatField()) / Greatest(models.F('completed_count') + models.F('cancelled_count'), 1),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # Directory "Top rated": best average first, ties by review count
+            models.Index(fields=['-rating_avg', '-rating_count', '-provider'], name='provider_rating_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider.user.username} - {self.rating_avg:.1f} ({self.rating_count} reviews)"
+
+
+
+# -------------------------------
+# Idempotency keys (users/idempotency.py)
+# -------------------------------
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # Chosen by the client (Idempotency-Key header), unique per user
+    key = models.CharField(max_length=64)
+    # Hash of method, path and body: a key cannot be reused for another request
+    fingerprint = models.CharField(max_length=32)
+    # Null while the first request is still running
+    status_code = models.PositiveSmallIntegerField(null=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    body = models.BinaryField(blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            # Bulk purge of expired keys
+            models.Index(fields=['expires_at'], name='idempotency_expiry_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.customer.user.username} - {self.content[:30]}"
\ No newline at end of file
+        return f"{self.user.username} - {self.key}"
@@ -0,0 +1,57 @@
+from django.db.models import Q # type: ignore
+from django.utils.dateparse import parse_datetime # type: ignore
+
+
+# -------------------------------
+# Keyset (cursor) pagination
+# -------------------------------
+# Pages are ordered newest first on (created_at, id). The cursor is the
+# position of the last row on the current page, so fetching the next page is
+# a single indexed range scan no matter how deep the user has paged.
+
+def encode_cursor(created_at, pk):
+    return f"{created_at.isoformat()}_{pk}"
+
+
+def decode_cursor(cursor):
+    # Returns (created_at, id) or None for a missing / tampered cursor
+    if not cursor:
+        return None
+    created_at, _, pk = cursor.rpartition('_')
+    created_at = parse_datetime(created_at)
+    if created_at is None or not pk.isdigit():
+        return None
+    return created_at, int(pk)
+
+
+def row_value(row, field):
+    # Pages may hold model instances or .values() dicts
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def after_cursor(queryset, position, field='created_at', pk_field='id'):
+    # Rows strictly after a decoded cursor position in (-field, -pk) order
+    if position is None:
+        return queryset
+    value, pk = position
+    return queryset.filter(
+        Q(**{f'{field}__lt': value}) |
+        Q(**{field: value, f'{pk_field}__lt': pk})
+    )
+
+
+def keyset_page(queryset, cursor, page_size, field='created_at', pk_field='id'):
+    """
+    Return (rows, next_cursor) for one page of ``queryset`` ordered by
+    ``-field, -pk_field``. ``next_cursor`` is None on the last page.
+    """
+    queryset = after_cursor(queryset, decode_cursor(cursor), field, pk_field)
+
+    # Fetch one extra row to know whether another page exists
+    rows = list(queryset.order_by(f'-{field}', f'-{pk_field}')[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(row_value(last, field), row_value(last, pk_field))
+    return rows, next_cursor
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings # type: ignore
+from django.contrib.auth import user_login_failed # type: ignore
+from django.contrib.auth.hashers import make_password, verify_password # type: ignore
+from django.http import HttpResponse # type: ignore
+from .models import CustomUser
+
+
+# -------------------------------
+# Password hashing pool
+# -------------------------------
+# PBKDF2 takes a few hundred milliseconds of CPU per login or signup. The
+# async login/signup views hand every hash and verification to a small
+# thread pool (hashlib releases the GIL while hashing) instead of running it
+# on the event loop or the request thread, so a burst of logins queues up
+# behind PASSWORD_HASH_WORKERS threads while other requests keep being
+# served. At most PASSWORD_HASH_QUEUE_LIMIT hashes may be queued or running;
+# beyond that the views answer 503 and the client retries. stats() feeds
+# the admin cache-stats endpoint.
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+class HashPool:
+    def __init__(self, workers, queue_limit):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._lock = threading.Lock()
+        self.queued = self.running = self.peak_depth = 0
+        self.completed = self.rejected = 0
+        self.wait_seconds = self.run_seconds = self.max_wait_seconds = 0.0
+
+    @property
+    def depth(self):
+        return self.queued + self.running
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def _timed(self, submitted, func, args):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            waited = started - submitted
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_seconds += time.perf_counter() - started
+
+    async def run(self, func, *args):
+        """
+        Await ``func(*args)`` on the pool. Raises PasswordPoolBusy when the
+        queue is full.
+        """
+        with self._lock:
+            if self.depth >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordPoolBusy('Too many password checks in progress.')
+            self.queued += 1
+            self.peak_depth = max(self.peak_depth, self.depth)
+            executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._timed, time.perf_counter(), func, args)
+
+    def stats(self):
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'queued': self.queued,
+                'running': self.running,
+                'peak_depth': self.peak_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds / started * 1000, 2) if started else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 2),
+                'avg_run_ms': round(self.run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_pool = HashPool(
+    getattr(settings, 'PASSWORD_HASH_WORKERS', 2), getattr(settings, 'PASSWORD_HASH_QUEUE_LIMIT', 64),
+)
+
+
+async def offload(func, *args):
+    # settings.PASSWORD_HASH_OFFLOAD = False runs the hash inline (benchmark baseline)
+    if not getattr(settings, 'PASSWORD_HASH_OFFLOAD', True):
+        return func(*args)
+    return await password_pool.run(func, *args)
+
+
+def password_pool_guard(view):
+    # A full pool answers 503 with Retry-After instead of queueing without bound
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except PasswordPoolBusy:
+            response = HttpResponse('Too many sign-ins right now, please try again in a moment.', status=503)
+            response['Retry-After'] = '1'
+            return response
+    return wrapper
+
+
+async def hash_password(raw_password):
+    return await offload(make_password, raw_password)
+
+
+async def authenticate_offloaded(request, username, password):
+    """
+    Async counterpart of authenticate() for CachedModelBackend: the user is
+    read with the async ORM and only PBKDF2 goes to the pool. Unknown
+    usernames still hash once, so response time does not reveal which
+    accounts exist. Returns the active user or None.
+    """
+    user = None
+    if username and password:
+        try:
+            user = await CustomUser._default_manager.aget_by_natural_key(username)
+        except CustomUser.DoesNotExist:
+            await offload(make_password, password)
+        else:
+            is_correct, must_update = await offload(verify_password, password, user.password)
+            if is_correct and must_update:
+                # Stored with an older hasher or iteration count: upgrade it
+                user.password = await hash_password(password)
+                await user.asave(update_fields=['password'])
+            if not (is_correct and user.is_active):
+                user = None
+
+    if user is None:
+        await user_login_failed.asend(sender=__name__, credentials={'username': username}, request=request)
+        return None
+    user.backend = settings.AUTHENTICATION_BACKENDS[0]
+    return user
@@ -0,0 +1,162 @@
+import re
+from django.db import connection, connections, router, transaction # type: ignore
+from django.db.models import Q # type: ignore
+from .models import ProviderService
+
+SEARCH_TABLE = 'users_providersearch'
+SEARCH_PAGE_SIZE = 20
+# Longer queries add nothing but cost
+MAX_TERMS = 8
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+# -------------------------------
+# Provider search index
+# -------------------------------
+# One row per ProviderService listing holding the provider's username, the
+# profession name and the listing address. On SQLite it is an FTS5 virtual
+# table keyed by rowid = listing id and ranked with bm25(); on PostgreSQL a
+# tsvector column with a GIN index ranked with ts_rank(). The table is
+# created by migration 0018 and kept in step by the signals in signals.py;
+# other backends fall back to an unranked icontains scan.
+
+# Username and profession outrank a street name match
+SQLITE_WEIGHTS = (10.0, 5.0, 1.0)
+
+_SOURCE_SQL = (
+    'FROM users_providerservice ps '
+    'JOIN users_serviceprovider sp ON sp.id = ps.provider_id '
+    'JOIN users_customuser u ON u.id = sp.user_id '
+    'JOIN main_service s ON s.id = ps.service_type_id '
+)
+
+_INSERT_SQL = {
+    'sqlite': (
+        f'INSERT INTO {SEARCH_TABLE} (rowid, username, profession, address) '
+        f'SELECT ps.id, u.username, s.profession_name, ps.address {_SOURCE_SQL}'
+    ),
+    'postgresql': (
+        f'INSERT INTO {SEARCH_TABLE} (listing_id, document) '
+        "SELECT ps.id, setweight(to_tsvector('simple', u.username), 'A') "
+        "|| setweight(to_tsvector('simple', s.profession_name), 'A') "
+        "|| setweight(to_tsvector('simple', ps.address), 'B') "
+        f'{_SOURCE_SQL}'
+    ),
+}
+_KEY = {'sqlite': 'rowid', 'postgresql': 'listing_id'}
+
+
+def search_backend(conn=connection):
+    # None when the database has no native full-text index
+    return conn.vendor if conn.vendor in _INSERT_SQL else None
+
+
+def _read_connection():
+    # The replica inside @replica_reads views, like the ORM queries
+    return connections[router.db_for_read(ProviderService)]
+
+
+def _reindex(where, params):
+    backend = search_backend()
+    if backend is None:
+        return
+    key = _KEY[backend]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE {key} IN (SELECT ps.id {_SOURCE_SQL} WHERE {where})', params)
+        cursor.execute(f'{_INSERT_SQL[backend]} WHERE {where}', params)
+
+
+def index_listing(listing_id):
+    _reindex('ps.id = %s', [listing_id])
+
+
+def index_provider_user(user_id):
+    # Username changed: every listing of that provider
+    _reindex('sp.user_id = %s', [user_id])
+
+
+def index_service(service_id):
+    # Profession renamed: every listing under it
+    _reindex('ps.service_type_id = %s', [service_id])
+
+
+def unindex_listing(listing_id):
+    backend = search_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE {_KEY[backend]} = %s', [listing_id])
+
+
+def rebuild_search_index():
+    """
+    Refill the index from the listing tables (after bulk inserts, which skip
+    signals). Returns the number of indexed listings.
+    """
+    backend = search_backend()
+    if backend is None:
+        return 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(_INSERT_SQL[backend])
+        cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def search_terms(query):
+    return _TERM.findall((query or '').lower())[:MAX_TERMS]
+
+
+def _ranked_ids(terms, limit, offset):
+    conn = _read_connection()
+    backend = search_backend(conn)
+    # Every match is scored; the id tiebreak keeps pages stable
+    with conn.cursor() as cursor:
+        if backend == 'sqlite':
+            # Every term must match, each as a prefix; \w+ terms need no escaping
+            match = ' '.join(f'"{term}"*' for term in terms)
+            weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+                f'ORDER BY bm25({SEARCH_TABLE}, {weights}), rowid DESC LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+        else:
+            tsquery = ' & '.join(f'{term}:*' for term in terms)
+            cursor.execute(
+                f"SELECT listing_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s) "
+                "ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC, listing_id DESC LIMIT %s OFFSET %s",
+                [tsquery, tsquery, limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(terms, limit, offset):
+    queryset = ProviderService.objects.all()
+    for term in terms:
+        queryset = queryset.filter(
+            Q(provider__user__username__icontains=term)
+            | Q(service_type__profession_name__icontains=term)
+            | Q(address__icontains=term)
+        )
+    return list(queryset.order_by('-created_at', '-id').values_list('id', flat=True)[offset:offset + limit])
+
+
+def search_listings(query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Return (listings, has_next): one page of ProviderService rows matching
+    every term of ``query``, best match first (newest first without a
+    full-text index).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+    offset = (max(page, 1) - 1) * page_size
+    find = _ranked_ids if search_backend(_read_connection()) else _fallback_ids
+    # One extra id tells whether another page exists
+    ids = find(terms, page_size + 1, offset)
+    has_next = len(ids) > page_size
+    ids = ids[:page_size]
+    rows = ProviderService.objects.select_related('provider__user', 'provider__stats', 'service_type').in_bulk(ids)
+    return [rows[i] for i in ids if i in rows], has_next
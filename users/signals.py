@@ -0,0 +1,222 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save # type: ignore
+from django.dispatch import receiver # type: ignore
+from django.db import transaction # type: ignore
+from django.db.models.fields.files import FieldFile # type: ignore
+from main.cache import bump_version
+from main.images import delete_derivatives
+from main.jobs import enqueue
+from main.tasks import build_derivatives
+from main.models import Service
+from .models import (
+    ArchivedBooking, Booking, Customer, CustomUser, ProviderService, ProviderStats, Review, ServiceProvider,
+)
+from .actor import forget_actor
+from .geo import locate
+from .search import index_listing, index_provider_user, index_service, unindex_listing
+from .stats import booking_counter, bump, move_provider_stats, status_deltas
+
+
+# -------------------------------
+# Profile picture thumbnails
+# -------------------------------
+@receiver(post_save, sender=CustomUser)
+def profile_pic_derivatives(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; skip those without touching storage
+    if update_fields and 'profile_pic' not in update_fields:
+        return
+    if instance.profile_pic:
+        enqueue(build_derivatives, 'users.CustomUser', instance.pk, 'profile_pic')
+
+
+@receiver(pre_save, sender=CustomUser)
+def profile_pic_replaced(sender, instance, update_fields=None, **kwargs):
+    # A new picture orphans the old one's thumbnails: remove them once saved
+    if instance.pk is None or (update_fields and 'profile_pic' not in update_fields):
+        return
+    old_name = CustomUser.objects.filter(pk=instance.pk).values_list('profile_pic', flat=True).first()
+    if old_name and old_name != instance.profile_pic.name:
+        old = FieldFile(instance, instance.profile_pic.field, old_name)
+        transaction.on_commit(lambda: delete_derivatives(old))
+
+
+@receiver(post_delete, sender=CustomUser)
+def profile_pic_cleanup(sender, instance, **kwargs):
+    if instance.profile_pic:
+        delete_derivatives(instance.profile_pic)
+
+
+# -------------------------------
+# Catalog cache invalidation
+# -------------------------------
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_catalog_changed(sender, using, **kwargs):
+    bump_version(Review, using=using)
+
+
+# Version stamps behind the JSON API's ETags (users/api.py); bulk update()s
+# of these tables bump them by hand
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=ArchivedBooking)
+@receiver(post_save, sender=ProviderService)
+@receiver(post_delete, sender=ProviderService)
+def table_version_changed(sender, using, **kwargs):
+    bump_version(sender, using=using)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_version_changed(sender, using, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the API never shows
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_version(CustomUser, using=using)
+
+
+# -------------------------------
+# Admin dashboard counters
+# -------------------------------
+@receiver(post_save, sender=Customer)
+def customer_counted(sender, created, **kwargs):
+    if created:
+        bump('customers')
+
+
+@receiver(post_delete, sender=Customer)
+def customer_uncounted(sender, **kwargs):
+    bump('customers', -1)
+
+
+@receiver(post_save, sender=ServiceProvider)
+def provider_counted(sender, created, **kwargs):
+    if created:
+        bump('providers')
+
+
+@receiver(post_delete, sender=ServiceProvider)
+def provider_uncounted(sender, **kwargs):
+    bump('providers', -1)
+
+
+@receiver(post_init, sender=Booking)
+def booking_remember_status(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred status field is not loaded
+    instance._counted_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Booking)
+def booking_counted(sender, instance, created, **kwargs):
+    if created:
+        bump(booking_counter(instance.status))
+        move_provider_stats(instance.provider_id, **status_deltas(None, instance.status))
+    elif instance._counted_status is not None and instance.status != instance._counted_status:
+        bump(booking_counter(instance._counted_status), -1)
+        bump(booking_counter(instance.status))
+        move_provider_stats(instance.provider_id, **status_deltas(instance._counted_status, instance.status))
+    instance._counted_status = instance.status
+
+
+@receiver(post_delete, sender=Booking)
+def booking_uncounted(sender, instance, **kwargs):
+    status = instance._counted_status or instance.status
+    bump(booking_counter(status), -1)
+    move_provider_stats(instance.provider_id, **status_deltas(status, None))
+
+
+@receiver(post_delete, sender=ArchivedBooking)
+def archived_booking_uncounted(sender, instance, **kwargs):
+    # Archiving itself skips signals; this is a cascade from a deleted account
+    bump(booking_counter(instance.status), -1)
+    move_provider_stats(instance.provider_id, **status_deltas(instance.status, None))
+
+
+# -------------------------------
+# Provider quality stats
+# -------------------------------
+@receiver(post_save, sender=ServiceProvider)
+def provider_stats_created(sender, instance, created, **kwargs):
+    if created:
+        ProviderStats.objects.get_or_create(provider=instance)
+
+
+@receiver(post_save, sender=Review)
+def review_rated(sender, instance, created, **kwargs):
+    # Reviews are not edited in the app; only new ratings move the sums
+    if created and instance.provider_id and instance.rating:
+        move_provider_stats(instance.provider_id, rating_sum=instance.rating, rating_count=1)
+
+
+@receiver(post_delete, sender=Review)
+def review_unrated(sender, instance, **kwargs):
+    if instance.provider_id and instance.rating:
+        move_provider_stats(instance.provider_id, rating_sum=-instance.rating, rating_count=-1)
+
+
+# -------------------------------
+# Provider search index
+# -------------------------------
+@receiver(post_save, sender=ProviderService)
+def listing_indexed(sender, instance, **kwargs):
+    index_listing(instance.id)
+
+
+@receiver(post_delete, sender=ProviderService)
+def listing_unindexed(sender, instance, **kwargs):
+    unindex_listing(instance.id)
+
+
+@receiver(post_save, sender=CustomUser)
+def provider_name_indexed(sender, instance, created, update_fields=None, **kwargs):
+    # A new user has no listings yet; logins only touch last_login
+    if created or instance.role != 'provider' or (update_fields and 'username' not in update_fields):
+        return
+    index_provider_user(instance.id)
+
+
+@receiver(post_save, sender=Service)
+def profession_indexed(sender, instance, created, **kwargs):
+    if not created:
+        index_service(instance.id)
+
+
+# -------------------------------
+# Geocoding (offline gazetteer)
+# -------------------------------
+@receiver(post_init, sender=ProviderService)
+@receiver(post_init, sender=Customer)
+def remember_address(sender, instance, **kwargs):
+    instance._geocoded_address = instance.__dict__.get('address')
+
+
+@receiver(pre_save, sender=ProviderService)
+@receiver(pre_save, sender=Customer)
+def address_located(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'address' not in update_fields:
+        return
+    if instance.latitude is None or instance.address != instance._geocoded_address:
+        locate(instance)
+        instance._geocoded_address = instance.address
+
+
+# -------------------------------
+# Request actor cache
+# -------------------------------
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_actor_changed(sender, instance, **kwargs):
+    forget_actor(instance.id)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=ServiceProvider)
+def profile_actor_created(sender, instance, created, **kwargs):
+    # Edits keep the same row id; only creation changes the actor
+    if created:
+        forget_actor(instance.user_id)
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=ServiceProvider)
+def profile_actor_deleted(sender, instance, **kwargs):
+    forget_actor(instance.user_id)
@@ -0,0 +1,14 @@
+// Flip the card before following a login <-> signup link; the direction
+// comes from the script tag's data-flip (e.g. -180deg or 180deg)
+const flipTo = document.currentScript.dataset.flip || '-180deg';
+const flipLinks = document.querySelectorAll('.flip-link');
+flipLinks.forEach(link => {
+    link.addEventListener('click', e => {
+        const card = document.querySelector('.auth-card');
+        card.style.transform = `rotateY(${flipTo})`;
+        setTimeout(() => {
+            window.location.href = e.target.href;
+        }, 500);
+        e.preventDefault();
+    });
+});
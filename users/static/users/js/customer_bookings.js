@@ -0,0 +1,45 @@
+// URLs and the CSRF token come from this script tag's data- attributes
+const bookingsConfig = document.currentScript.dataset;
+
+$(document).ready(function(){
+    $('.cancel-btn').on('click', function(){
+        const bookingId = $(this).data('id');
+        if(confirm('Are you sure you want to cancel this booking?')){
+            $.post(bookingsConfig.cancelUrl, {
+                booking_id: bookingId,
+                csrfmiddlewaretoken: bookingsConfig.csrf
+            }, function(response){
+                if(response.success){
+                    alert('Booking cancelled successfully!');
+                    location.reload();
+                } else {
+                    alert(response.message || 'Failed to cancel booking.');
+                }
+            });
+        }
+    });
+
+    // Live status updates (server-sent events)
+    const STEPS = ['pending', 'confirmed', 'arriving', 'arrived', 'completed'];
+    if (window.EventSource && $('.status-bar').length) {
+        const events = new EventSource(bookingsConfig.eventsUrl);
+        events.addEventListener('booking', function(e){
+            const data = JSON.parse(e.data);
+            const bar = $('.status-bar[data-booking-id="' + data.booking_id + '"]');
+            if (!bar.length) return;
+            if (data.status === 'cancelled' || data.status === 'rejected') {
+                // Moved to past bookings
+                location.reload();
+                return;
+            }
+            const current = STEPS.indexOf(data.status);
+            bar.find('.status-step').each(function(i){
+                $(this).toggleClass('active', i === current)
+                       .toggleClass('completed', i < current || data.status === 'completed');
+            });
+            if (['arrived', 'completed'].includes(data.status)) {
+                bar.siblings('.cancel-btn').remove();
+            }
+        });
+    }
+});
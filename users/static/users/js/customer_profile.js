@@ -0,0 +1,11 @@
+(function () {
+    'use strict';
+    const form = document.getElementById('profileForm');
+    form.addEventListener('submit', function (event) {
+        if (!form.checkValidity()) {
+            event.preventDefault();
+            event.stopPropagation();
+        }
+        form.classList.add('was-validated');
+    }, false);
+})();
@@ -0,0 +1,74 @@
+// URLs and the CSRF token come from this script tag's data- attributes
+const bookingConfig = document.currentScript.dataset;
+
+var bookModal = document.getElementById('bookModal');
+
+// One key per booking attempt: a double click or a retry after a dropped
+// connection replays the first response instead of booking twice
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+// Set min-date to today
+document.getElementById('schedule_date').setAttribute('min', new Date().toISOString().split('T')[0]);
+
+// Populate modal when opening
+bookModal.addEventListener('show.bs.modal', function(event) {
+    var button = event.relatedTarget;
+    var providerName = button.getAttribute('data-provider');
+    var serviceName = button.getAttribute('data-service');
+    var serviceId = button.getAttribute('data-service-id');
+    var providerId = button.getAttribute('data-provider-id');
+
+    var modalTitle = bookModal.querySelector('.modal-title');
+    modalTitle.textContent = 'Book ' + serviceName + ' with ' + providerName;
+
+    var proceedBtn = document.getElementById('proceedBtn');
+    proceedBtn.dataset.serviceId = serviceId;
+    proceedBtn.dataset.providerId = providerId;
+    proceedBtn.dataset.idempotencyKey = newIdempotencyKey();
+});
+
+// Clear button
+document.getElementById('clearBtn').addEventListener('click', function() {
+    document.getElementById('timing').value = '';
+    document.getElementById('schedule_date').value = '';
+});
+
+// Proceed button: create booking and redirect to payment
+document.getElementById('proceedBtn').addEventListener('click', function() {
+    var serviceId = this.dataset.serviceId;
+    var providerId = this.dataset.providerId;
+    var proceedBtn = this;
+    var schedule_date = document.getElementById('schedule_date').value;
+    var timing = document.getElementById('timing').value;
+
+    if (!schedule_date || !timing) {
+        alert('Please select both date and timing.');
+        return;
+    }
+
+    fetch(bookingConfig.createUrl, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': bookingConfig.csrf,
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Idempotency-Key': proceedBtn.dataset.idempotencyKey
+        },
+        body: `service_id=${serviceId}&provider_id=${providerId}&schedule_date=${schedule_date}&timing=${timing}`
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+         window.location.href = `/users/payment/${data.booking_id}/`;
+        } else {
+            // A changed date or timing is a new request
+            proceedBtn.dataset.idempotencyKey = newIdempotencyKey();
+            alert(data.message);
+        }
+    });
+});
@@ -0,0 +1,13 @@
+// Slight success animation before submitting
+const form = document.getElementById('reviewForm');
+const successMsg = document.getElementById('successMsg');
+
+form.addEventListener('submit', function (e) {
+    e.preventDefault(); // stop immediate redirect
+    successMsg.style.display = 'block';
+
+    // delay a bit so user sees the message, then submit to Django
+    setTimeout(() => {
+        form.submit();
+    }, 800);
+});
@@ -0,0 +1,53 @@
+const paymentSelect = document.getElementById('payment_method');
+const upiFields = document.getElementById('upiFields');
+const cardFields = document.getElementById('cardFields');
+const codFields = document.getElementById('codFields');
+const form = document.getElementById('paymentForm');
+
+// URLs (from this script tag's data- attributes)
+const codURL = document.currentScript.dataset.codUrl;
+const successURL = document.currentScript.dataset.successUrl;
+
+paymentSelect.addEventListener('change', function() {
+    upiFields.style.display = 'none';
+    cardFields.style.display = 'none';
+    codFields.style.display = 'none';
+
+    if (this.value === 'upi') upiFields.style.display = 'block';
+    else if (this.value === 'card') cardFields.style.display = 'block';
+    else if (this.value === 'cod') codFields.style.display = 'block';
+});
+
+// Clear buttons
+document.getElementById('upiClear').addEventListener('click', function() {
+    document.getElementById('upi_id').value = '';
+});
+document.getElementById('cardClear').addEventListener('click', function() {
+    document.getElementById('card_number').value = '';
+    document.getElementById('expiry_year').value = '';
+    document.getElementById('cvv').value = '';
+});
+
+// Validation + dynamic redirect
+form.addEventListener('submit', function(e) {
+    const method = paymentSelect.value;
+    if (!method) { alert('Please select payment method'); e.preventDefault(); return; }
+
+    if (method === 'upi') {
+        const upi = document.getElementById('upi_id').value;
+        if (!upi.includes('@')) { alert('Enter valid UPI ID'); e.preventDefault(); return; }
+        form.action = successURL;  // redirect to success after UPI payment
+    }
+    else if (method === 'card') {
+        const card = document.getElementById('card_number').value;
+        const year = parseInt(document.getElementById('expiry_year').value);
+        const cvv = document.getElementById('cvv').value;
+        if (card.length !== 10) { alert('Card number must be 10 digits'); e.preventDefault(); return; }
+        if (year < 2025) { alert('Expiry year must be 2025 or later'); e.preventDefault(); return; }
+        if (cvv.length !== 3) { alert('CVV must be 3 digits'); e.preventDefault(); return; }
+        form.action = successURL;  // handled by payment_view -> success
+    }
+    else if (method === 'cod') {
+        form.action = codURL; // send to COD view
+    }
+});
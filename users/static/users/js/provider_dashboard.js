@@ -0,0 +1,7 @@
+// Scroll to alert if exists
+window.onload = function() {
+    const alertBox = document.querySelector('.alert');
+    if(alertBox) {
+        alertBox.scrollIntoView({ behavior: 'smooth' });
+    }
+};
@@ -0,0 +1,75 @@
+// URLs and the CSRF token come from this script tag's data- attributes
+const inboxConfig = document.currentScript.dataset;
+
+function showStatus(bookingId, newStatus, html) {
+    const statusEl = document.getElementById(`status-${bookingId}`);
+    statusEl.textContent = newStatus;
+    statusEl.classList.remove('text-primary', 'text-danger');
+    statusEl.classList.add('text-success', 'text-capitalize');
+    document.getElementById(`action-${bookingId}`).innerHTML = html;
+}
+
+function updateBatchCount() {
+    const count = document.querySelectorAll('.batch-select:checked').length;
+    document.getElementById('batch-count').textContent = `${count} selected`;
+}
+
+// Apply one status to every selected booking in a single request
+function applyBatch() {
+    const status = document.getElementById('batch-status').value;
+    const selected = Array.from(document.querySelectorAll('.batch-select:checked'));
+    if (!status || !selected.length) return;
+
+    fetch(inboxConfig.batchUrl, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': inboxConfig.csrf,
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            updates: selected.map(box => ({ booking_id: Number(box.value), status: status })),
+        }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            alert(data.message || 'Failed to update bookings.');
+            return;
+        }
+        const failed = [];
+        data.results.forEach(item => {
+            if (item.result === 'updated') {
+                showStatus(item.booking_id, item.new_status, item.updated_html);
+            } else if (item.result !== 'unchanged') {
+                const label = item.booking_id !== undefined ? `#${item.booking_id}` : `item ${item.index + 1}`;
+                failed.push(`${label}: ${item.result}`);
+            }
+        });
+        selected.forEach(box => { box.checked = false; });
+        updateBatchCount();
+        if (failed.length) alert('Some bookings were not updated:\n' + failed.join('\n'));
+    })
+    .catch(error => console.error('Error:', error));
+}
+
+function updateStatus(bookingId, status) {
+    if (!status) return;
+
+    fetch(`/users/dashboard/provider/bookings/update/${bookingId}/`, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': inboxConfig.csrf,
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ status: status }),
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showStatus(bookingId, data.new_status, data.updated_html);
+        } else {
+            alert(data.message || 'Failed to update booking status.');
+        }
+    })
+    .catch(error => console.error('Error:', error));
+}
@@ -0,0 +1,123 @@
+from decimal import Decimal
+from main.cache import bump_version
+from django.db import IntegrityError, transaction # type: ignore
+from django.db.models import Count, F, Sum # type: ignore
+from .models import (
+    ArchivedBooking, Booking, Customer, DashboardCounter, ProviderEarning, ProviderStats, Review, ServiceProvider,
+)
+
+
+# -------------------------------
+# Admin Dashboard Counters
+# -------------------------------
+# Headline numbers are kept in DashboardCounter rows and moved with atomic
+# F() increments as customers/providers/bookings/earnings change, so the
+# dashboard reads them in one query. rebuild_counters() recomputes them from
+# scratch for anything that bypassed the signals (bulk inserts, raw SQL).
+
+def booking_counter(status):
+    return f'bookings:{status}'
+
+
+def bump(name, delta=1):
+    if not delta:
+        return
+    updated = DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.create(name=name, value=delta)
+    except IntegrityError:
+        # Another worker created the row first
+        DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def read_counters():
+    return dict(DashboardCounter.objects.values_list('name', 'value'))
+
+
+def rebuild_counters():
+    counters = {
+        'customers': Customer.objects.count(),
+        'providers': ServiceProvider.objects.count(),
+        # ProviderEarning also holds totals credited before the ledger existed
+        'gross_earnings': ProviderEarning.objects.aggregate(total=Sum('total_earnings'))['total'] or Decimal('0.00'),
+    }
+    # Archived bookings still count towards the totals
+    for model in (Booking, ArchivedBooking):
+        for row in model.objects.values('status').annotate(total=Count('id')):
+            name = booking_counter(row['status'])
+            counters[name] = counters.get(name, 0) + row['total']
+
+    with transaction.atomic():
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create([
+            DashboardCounter(name=name, value=value) for name, value in counters.items()
+        ])
+    return counters
+
+
+# -------------------------------
+# Per-provider quality stats
+# -------------------------------
+# ProviderStats holds each provider's rating sum/count and completed /
+# cancelled booking counts, moved with F() increments when a review is added
+# or a booking changes status. rating_avg and cancellation_rate are stored
+# generated columns, so the directory sorts and filters them via an index.
+
+def status_deltas(old, new, count=1):
+    # Counter moves for ``count`` bookings going from ``old`` to ``new`` status
+    deltas = {'completed_count': 0, 'cancelled_count': 0}
+    for status, sign in ((old, -1), (new, 1)):
+        if status == 'completed':
+            deltas['completed_count'] += sign * count
+        elif status in Booking.RELEASED_STATUSES:
+            deltas['cancelled_count'] += sign * count
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def move_provider_stats(provider_id, **deltas):
+    if not deltas:
+        return
+    changes = {name: F(name) + delta for name, delta in deltas.items()}
+    bump_version(ProviderStats)
+    if ProviderStats.objects.filter(provider_id=provider_id).update(**changes):
+        return
+    if min(deltas.values()) < 0:
+        # No row to take from (e.g. the provider is being deleted); a missing
+        # row is recreated by rebuild_provider_stats()
+        return
+    try:
+        with transaction.atomic():
+            ProviderStats.objects.create(provider_id=provider_id, **deltas)
+    except IntegrityError:
+        ProviderStats.objects.filter(provider_id=provider_id).update(**changes)
+
+
+def rebuild_provider_stats():
+    """
+    Recompute every provider's stats from reviews and bookings (hot and
+    archived). Returns the number of providers.
+    """
+    stats = {pk: ProviderStats(provider_id=pk) for pk in ServiceProvider.objects.values_list('id', flat=True)}
+    for model in (Booking, ArchivedBooking):
+        rows = model.objects.values('provider_id', 'status').annotate(total=Count('id'))
+        for row in rows:
+            if row['provider_id'] in stats:
+                for name, delta in status_deltas(None, row['status'], row['total']).items():
+                    setattr(stats[row['provider_id']], name, getattr(stats[row['provider_id']], name) + delta)
+    reviews = Review.objects.filter(provider__isnull=False, rating__isnull=False).values('provider_id').annotate(
+        total=Sum('rating'), count=Count('id'),
+    )
+    for row in reviews:
+        if row['provider_id'] in stats:
+            stats[row['provider_id']].rating_sum = row['total']
+            stats[row['provider_id']].rating_count = row['count']
+
+    with transaction.atomic():
+        ProviderStats.objects.all().delete()
+        ProviderStats.objects.bulk_create(stats.values(), batch_size=1000)
+    bump_version(ProviderStats)
+    return len(stats)
+
@@ -0,0 +1,14 @@
+from main.jobs import job
+from .models import CustomUser
+
+
+# -------------------------------
+# Background tasks (run by `python manage.py runworker`)
+# -------------------------------
+@job(max_attempts=5, timeout=600)
+def delete_user(user_id):
+    # Cascades through the profile, listings, bookings and ledger rows,
+    # firing their delete signals (counters, search index, thumbnails)
+    user = CustomUser.objects.filter(id=user_id).first()
+    if user is not None:
+        user.delete()
@@ -1,3 +1,1661 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import logging
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password # type: ignore
+from django.core.files.uploadedfile import SimpleUploadedFile # type: ignore
+from django.core.management import call_command, CommandError # type: ignore
+from django.db import OperationalError, connection, transaction # type: ignore
+from django.db.models.functions import Lower # type: ignore
+from asgiref.sync import ThreadSensitiveContext, sync_to_async # type: ignore
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from django.urls import reverse # type: ignore
+from django.utils import timezone # type: ignore
+
+from main.models import Service
+from main.sqlite import retry_stats, retry_write
+from PIL import Image # type: ignore
+from .actor import resolve_actor
+from .archive import archive_bookings
+from .export import booking_rows
+from .directory import latest_listings, nearby_listings, nearest_page, rated_listing_ids, rated_page
+from .events import broker
+from .forms import email_registered
+from .idempotency import purge_expired_keys
+from .passwords import password_pool
+from .geo import covering_cells, distance_km, geocode, geohash_encode
+from .search import rebuild_search_index, search_listings
+from .earnings import credit_booking, refund_booking, rollup_earnings
+from .models import (
+    CustomUser, Customer, ServiceProvider, ProviderService, Booking, ProviderEarning, EarningEntry,
+    DashboardCounter, ArchivedBooking, ProviderStats, Review, IdempotencyKey,
+)
+from .views import LIVE_STATUSES
+from .stats import read_counters, rebuild_counters, rebuild_provider_stats
+
+logger = logging.getLogger(__name__)
+
+
+def make_service(profession_name):
+    # No image file: keeps tests from writing thumbnails into the real media dir
+    return Service.objects.create(profession_name=profession_name, image='')
+
+
+def make_customer(username, **extra):
+    user = CustomUser.objects.create(username=username, role='customer')
+    return Customer.objects.create(user=user, phone='9876543210', address='Bengaluru', **extra)
+
+
+def make_provider(username):
+    user = CustomUser.objects.create(username=username, role='provider')
+    return ServiceProvider.objects.create(user=user)
+
+
+def make_listing(provider, service_type, price='500.00'):
+    return ProviderService.objects.create(
+        provider=provider, service_type=service_type, address='Bengaluru',
+        phone='9876543210', experience='2-3', price=price,
+    )
+
+
+# -------------------------------
+# Provider booking inbox
+# -------------------------------
+class ProviderInboxBenchmark(TestCase):
+    BOOKINGS = 10_000
+    # Session, user and provider id come from the cache: one joined page query
+    QUERY_BUDGET = 1
+    RENDER_BUDGET_SECONDS = 0.5
+
+    @classmethod
+    def setUpTestData(cls):
+        plumbing = make_service('Plumbing')
+        cls.provider = make_provider('busy_provider')
+        listing = make_listing(cls.provider, plumbing)
+        customers = [make_customer(f'customer{i}') for i in range(50)]
+        statuses = ['pending', 'confirmed', 'completed', 'cancelled']
+        Booking.objects.bulk_create([
+            Booking(
+                customer=customers[i % len(customers)], provider=cls.provider, service=listing,
+                schedule_date=date(2025, 11, 1), timing='9AM-11AM', status=statuses[i % len(statuses)],
+            )
+            for i in range(cls.BOOKINGS)
+        ], batch_size=1000)
+
+    def setUp(self):
+        self.client.force_login(self.provider.user)
+        self.url = reverse('provider_view_bookings')
+
+    def test_first_page_query_budget_and_render_time(self):
+        self.client.get(self.url)  # warm the session/actor cache
+        start = time.perf_counter()
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(self.url)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['bookings']), 20)
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertLess(elapsed, self.RENDER_BUDGET_SECONDS)
+
+    def test_deep_page_costs_the_same(self):
+        cursor = None
+        for _ in range(5):
+            response = self.client.get(self.url, {'cursor': cursor} if cursor else {})
+            cursor = response.context['next_cursor']
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(len(response.context['bookings']), 20)
+
+    def test_pages_do_not_overlap(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, {'cursor': first.context['next_cursor']})
+        first_ids = {b.id for b in first.context['bookings']}
+        second_ids = {b.id for b in second.context['bookings']}
+        self.assertFalse(first_ids & second_ids)
+        self.assertLess(max(second_ids), min(first_ids))
+
+    def test_status_tab_filters(self):
+        response = self.client.get(self.url, {'status': 'pending'})
+        self.assertTrue(all(b.status == 'pending' for b in response.context['bookings']))
+
+
+# -------------------------------
+# Customer provider directory
+# -------------------------------
+class ProviderDirectoryTests(TestCase):
+    # One directory query + the booking modal's customer row (session and user are cached)
+    QUERY_BUDGET = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plumbing = make_service('Plumbing')
+        painting = make_service('Painting')
+        cls.providers = [make_provider(f'plumber{i}') for i in range(45)]
+        for provider in cls.providers:
+            make_listing(provider, cls.plumbing, price='100.00')
+            make_listing(provider, painting, price='300.00')
+            make_listing(provider, cls.plumbing, price='200.00')
+        cls.customer = make_customer('browsing_customer')
+        cls.url = reverse('customer_providers_by_service', args=['Plumbing'])
+
+    def setUp(self):
+        self.client.force_login(self.customer.user)
+
+    def test_one_latest_listing_per_provider(self):
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(self.url, {'cursor': cursor} if cursor else {})
+            for entry in response.context['providers']:
+                seen.append(entry['provider'].id)
+                self.assertEqual(entry['price'], Decimal('200.00'))
+                self.assertEqual(entry['service_type'], 'Plumbing')
+            cursor = response.context['next_cursor']
+            if not cursor:
+                break
+        self.assertCountEqual(seen, [p.id for p in self.providers])
+
+    def test_constant_queries_per_page(self):
+        self.client.get(self.url)  # warm the session/actor cache
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['providers']), 20)
+
+        for i in range(45, 90):
+            make_listing(make_provider(f'plumber{i}'), self.plumbing)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            self.client.get(self.url)
+
+
+# -------------------------------
+# Provider earnings ledger
+# -------------------------------
+class EarningsLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        plumbing = make_service('Plumbing')
+        cls.provider = make_provider('earning_provider')
+        cls.customer = make_customer('paying_customer')
+        listing = make_listing(cls.provider, plumbing, price='250.00')
+        cls.booking = Booking.objects.create(
+            customer=cls.customer, provider=cls.provider, service=listing,
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM',
+        )
+
+    def total(self):
+        return ProviderEarning.objects.get(provider=self.provider).total_earnings
+
+    def test_booking_is_credited_once(self):
+        self.assertTrue(credit_booking(self.booking))
+        self.assertFalse(credit_booking(self.booking))
+        self.assertEqual(self.total(), Decimal('250.00'))
+        self.assertEqual(EarningEntry.objects.filter(booking=self.booking).count(), 1)
+
+    def test_payment_success_reload_does_not_double_credit(self):
+        self.client.force_login(self.customer.user)
+        url = reverse('payment_success', args=[self.booking.id])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.total(), Decimal('250.00'))
+
+    def test_confirm_after_payment_does_not_double_credit(self):
+        credit_booking(self.booking)
+        self.client.force_login(self.provider.user)
+        self.client.post(
+            reverse('update_booking_status', args=[self.booking.id]),
+            data=json.dumps({'status': 'confirmed'}), content_type='application/json',
+        )
+        self.assertEqual(self.total(), Decimal('250.00'))
+
+    def test_refund_reverses_credit_once(self):
+        credit_booking(self.booking)
+        self.assertTrue(refund_booking(self.booking))
+        self.assertFalse(refund_booking(self.booking))
+        self.assertEqual(self.total(), Decimal('0.00'))
+
+    def test_rollup_repairs_drift(self):
+        credit_booking(self.booking)
+        ProviderEarning.objects.filter(provider=self.provider).update(total_earnings=Decimal('999.00'))
+        self.assertEqual(rollup_earnings(), 1)
+        self.assertEqual(self.total(), Decimal('250.00'))
+
+
+class EarningsLedgerConcurrencyTests(TransactionTestCase):
+    WORKERS = 8
+
+    def test_parallel_credits_are_not_lost(self):
+        plumbing = make_service('Plumbing')
+        provider = make_provider('parallel_provider')
+        customer = make_customer('parallel_customer')
+        listing = make_listing(provider, plumbing, price='10.00')
+        bookings = [
+            Booking.objects.create(
+                customer=customer, provider=provider, service=listing,
+                schedule_date=date(2025, 11, 1), timing='9AM-11AM',
+            )
+            for _ in range(40)
+        ]
+
+        def credit(booking):
+            try:
+                return credit_booking(booking)
+            finally:
+                connection.close()
+
+        # Every booking is submitted twice, from different workers
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(credit, bookings + bookings))
+
+        self.assertEqual(results.count(True), len(bookings))
+        self.assertEqual(
+            ProviderEarning.objects.get(provider=provider).total_earnings,
+            Decimal('10.00') * len(bookings),
+        )
+
+
+# -------------------------------
+# Booking slot conflicts
+# -------------------------------
+class BookingSlotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        plumbing = make_service('Plumbing')
+        cls.provider = make_provider('slot_provider')
+        cls.listing = make_listing(cls.provider, plumbing)
+        cls.first = make_customer('first_customer')
+        cls.second = make_customer('second_customer')
+
+    def book(self, customer, timing='9AM-11AM'):
+        self.client.force_login(customer.user)
+        return self.client.post(reverse('create_booking'), {
+            'service_id': self.listing.id, 'provider_id': self.provider.id,
+            'schedule_date': '2025-11-01', 'timing': timing,
+        }, headers={'x-requested-with': 'XMLHttpRequest'}).json()
+
+    def test_slot_is_stored_structured(self):
+        self.assertEqual(self.book(self.first)['status'], 'success')
+        booking = Booking.objects.get()
+        self.assertEqual((booking.slot_start, booking.slot_end), (dt_time(9), dt_time(11)))
+
+    def test_second_customer_cannot_take_same_slot(self):
+        self.assertEqual(self.book(self.first)['status'], 'success')
+        self.assertEqual(self.book(self.second)['status'], 'error')
+        self.assertEqual(self.book(self.second, timing='11AM-1PM')['status'], 'success')
+
+    def test_cancelled_booking_frees_slot(self):
+        self.book(self.first)
+        Booking.objects.update(status='cancelled')
+        self.assertEqual(self.book(self.second)['status'], 'success')
+
+    def test_unknown_timing_is_rejected(self):
+        self.assertEqual(self.book(self.first, timing='midnight')['status'], 'error')
+
+    def test_reopening_a_retaken_slot_is_a_conflict(self):
+        self.book(self.first)
+        cancelled = Booking.objects.get()
+        Booking.objects.update(status='cancelled')
+        self.book(self.second)
+
+        self.client.force_login(self.provider.user)
+        response = self.client.post(
+            reverse('update_booking_status', args=[cancelled.id]),
+            json.dumps({'status': 'confirmed'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(response.json()['success'])
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+
+
+class BookingSlotConcurrencyTests(TransactionTestCase):
+    ATTEMPTS = 200
+    WORKERS = 16
+
+    def test_exactly_one_of_many_simultaneous_bookings_wins(self):
+        plumbing = make_service('Plumbing')
+        provider = make_provider('contended_provider')
+        listing = make_listing(provider, plumbing)
+        sessions = []
+        for i in range(self.ATTEMPTS):
+            client = Client()
+            client.force_login(make_customer(f'racer{i}').user)
+            sessions.append(client.cookies)
+
+        def attempt(cookies):
+            client = Client()
+            client.cookies = cookies
+            try:
+                return client.post(reverse('create_booking'), {
+                    'service_id': listing.id, 'provider_id': provider.id,
+                    'schedule_date': '2025-11-01', 'timing': '9AM-11AM',
+                }, headers={'x-requested-with': 'XMLHttpRequest'}).json()['status']
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(attempt, sessions))
+
+        self.assertEqual(results.count('success'), 1)
+        self.assertEqual(Booking.objects.filter(provider=provider).count(), 1)
+
+
+# -------------------------------
+# Admin dashboard counters
+# -------------------------------
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        plumbing = make_service('Plumbing')
+        self.provider = make_provider('counted_provider')
+        self.customer = make_customer('counted_customer')
+        self.listing = make_listing(self.provider, plumbing, price='300.00')
+
+    def book(self):
+        return Booking.objects.create(
+            customer=self.customer, provider=self.provider, service=self.listing,
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM',
+        )
+
+    def test_counters_follow_signups_bookings_and_earnings(self):
+        booking = self.book()
+        booking.status = 'confirmed'
+        booking.save()
+        credit_booking(booking)
+
+        counters = read_counters()
+        self.assertEqual(counters['customers'], 1)
+        self.assertEqual(counters['providers'], 1)
+        self.assertEqual(counters['bookings:pending'], 0)
+        self.assertEqual(counters['bookings:confirmed'], 1)
+        self.assertEqual(counters['gross_earnings'], Decimal('300.00'))
+
+    def test_deleting_provider_user_cascades_counters(self):
+        self.book()
+        self.provider.user.delete()
+        counters = read_counters()
+        self.assertEqual(counters['providers'], 0)
+        self.assertEqual(counters['bookings:pending'], 0)
+
+    def test_rebuild_matches_incremental(self):
+        self.book()
+        incremental = {k: v for k, v in read_counters().items() if v}
+        DashboardCounter.objects.all().delete()
+        rebuild_counters()
+        self.assertEqual({k: v for k, v in read_counters().items() if v}, incremental)
+
+    def test_dashboard_is_constant_queries(self):
+        admin = CustomUser.objects.create(username='dash_admin', role='admin')
+        self.client.force_login(admin)
+        for i in range(20):
+            make_customer(f'extra{i}')
+        # user (cache cold after login) + counters; the session is cached
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.context['customers_count'], 21)
+
+
+# -------------------------------
+# Batch booking status update
+# -------------------------------
+class BatchBookingStatusTests(TestCase):
+    def setUp(self):
+        plumbing = make_service('Plumbing')
+        self.provider = make_provider('batch_provider')
+        self.customer = make_customer('batch_customer')
+        listing = make_listing(self.provider, plumbing, price='100.00')
+        self.bookings = [
+            Booking.objects.create(
+                customer=self.customer, provider=self.provider, service=listing,
+                schedule_date=date(2025, 11, day), timing='9AM-11AM',
+            )
+            for day in range(1, 11)
+        ]
+        other = make_provider('other_provider')
+        self.foreign = Booking.objects.create(
+            customer=self.customer, provider=other, service=make_listing(other, plumbing),
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM',
+        )
+        self.client.force_login(self.provider.user)
+
+    def post(self, updates):
+        return self.client.post(
+            reverse('batch_update_booking_status'), json.dumps({'updates': updates}),
+            content_type='application/json',
+        ).json()
+
+    def test_confirms_many_and_credits_in_aggregate(self):
+        ids = [b.id for b in self.bookings]
+        with CaptureQueriesContext(connection) as small:
+            self.post([{'booking_id': i, 'status': 'confirmed'} for i in ids[:2]])
+        with CaptureQueriesContext(connection) as large:
+            data = self.post([{'booking_id': i, 'status': 'confirmed'} for i in ids[2:]])
+        # Query count does not grow with the batch size
+        self.assertLessEqual(len(large), len(small))
+        self.assertEqual(data['updated'], 8)
+        self.assertEqual(Booking.objects.filter(id__in=ids, status='confirmed').count(), 10)
+        self.assertEqual(ProviderEarning.objects.get(provider=self.provider).total_earnings, Decimal('1000.00'))
+        self.assertEqual(read_counters()['bookings:confirmed'], 10)
+
+        # Re-confirming is a no-op and never double credits
+        data = self.post([{'booking_id': i, 'status': 'confirmed'} for i in ids])
+        self.assertEqual({r['result'] for r in data['results']}, {'unchanged'})
+        self.assertEqual(ProviderEarning.objects.get(provider=self.provider).total_earnings, Decimal('1000.00'))
+
+    def test_per_item_results(self):
+        data = self.post([
+            {'booking_id': self.bookings[0].id, 'status': 'confirmed'},
+            {'booking_id': self.bookings[1].id, 'status': 'teleported'},
+            {'booking_id': self.foreign.id, 'status': 'confirmed'},
+            {'booking_id': self.bookings[2].id, 'status': []},
+            {'booking_id': 'abc', 'status': 'confirmed'},
+            'not an object',
+        ])
+        results = {r['booking_id']: r['result'] for r in data['results'] if 'booking_id' in r}
+        self.assertEqual(results, {
+            self.bookings[0].id: 'updated',
+            self.bookings[1].id: 'invalid_status',
+            self.bookings[2].id: 'invalid_status',
+            self.foreign.id: 'not_found',
+        })
+        invalid = [r for r in data['results'] if 'index' in r]
+        self.assertEqual(invalid, [{'index': 4, 'result': 'invalid'}, {'index': 5, 'result': 'invalid'}])
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.status, 'pending')
+
+    def test_single_update_rejects_unknown_status(self):
+        url = reverse('update_booking_status', args=[self.bookings[0].id])
+        for body in (json.dumps({'status': None}), json.dumps({'status': 'teleported'}), json.dumps([]), 'not json'):
+            response = self.client.post(url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        self.bookings[0].refresh_from_db()
+        self.assertEqual(self.bookings[0].status, 'pending')
+        self.assertNotIn('bookings:teleported', read_counters())
+
+    def test_cancel_refunds_credited_bookings(self):
+        ids = [b.id for b in self.bookings[:3]]
+        self.post([{'booking_id': i, 'status': 'confirmed'} for i in ids])
+        self.post([{'booking_id': i, 'status': 'cancelled'} for i in ids])
+        self.assertEqual(ProviderEarning.objects.get(provider=self.provider).total_earnings, Decimal('0.00'))
+        self.assertEqual(EarningEntry.objects.filter(kind='refund').count(), 3)
+
+
+# -------------------------------
+# Live booking status stream
+# -------------------------------
+class BookingEventsTests(TestCase):
+    def setUp(self):
+        plumbing = make_service('Plumbing')
+        self.provider = make_provider('sse_provider')
+        self.customer = make_customer('sse_customer')
+        listing = make_listing(self.provider, plumbing)
+        self.booking = Booking.objects.create(
+            customer=self.customer, provider=self.provider, service=listing,
+            schedule_date=date(2031, 1, 1), timing='9AM-11AM',
+        )
+        self.url = reverse('booking_events')
+
+    async def open_stream(self):
+        client = AsyncClient()
+        await client.aforce_login(self.customer.user)
+        response = await client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        return response, stream
+
+    async def disconnect(self, stream):
+        # Client disconnect: the ASGI handler cancels the pending read
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+    @staticmethod
+    def payload(chunk):
+        return json.loads(chunk.decode().split('data: ', 1)[1])
+
+    @override_settings(BOOKING_EVENTS_POLL_SECONDS=0)
+    async def test_snapshot_then_published_status(self):
+        response, stream = await self.open_stream()
+        self.assertEqual(self.payload(await anext(stream)), {'booking_id': self.booking.id, 'status': 'pending'})
+
+        # Subscription happens on the next read
+        next_chunk = asyncio.ensure_future(anext(stream))
+        while not broker.subscriber_count(self.customer.id):
+            await asyncio.sleep(0.01)
+        broker.publish(self.customer.id, {'booking_id': self.booking.id, 'status': 'confirmed'})
+        chunk = await asyncio.wait_for(next_chunk, timeout=2)
+        self.assertEqual(self.payload(chunk)['status'], 'confirmed')
+
+        await self.disconnect(stream)
+        self.assertEqual(broker.subscriber_count(self.customer.id), 0)
+
+    @override_settings(BOOKING_EVENTS_POLL_SECONDS=0.05)
+    async def test_polling_picks_up_changes_from_other_processes(self):
+        response, stream = await self.open_stream()
+        await anext(stream)  # pending snapshot
+
+        # Written without publishing, as another worker process would
+        await sync_to_async(Booking.objects.filter(id=self.booking.id).update)(status='arriving')
+        chunk = await asyncio.wait_for(anext(stream), timeout=2)
+        self.assertEqual(self.payload(chunk), {'booking_id': self.booking.id, 'status': 'arriving'})
+        await self.disconnect(stream)
+
+    def test_status_update_publishes_after_commit(self):
+        received = []
+        self.client.force_login(self.provider.user)
+        original = broker.publish
+        broker.publish = lambda customer_id, event: received.append((customer_id, event))
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse('update_booking_status', args=[self.booking.id]),
+                    json.dumps({'status': 'confirmed'}), content_type='application/json',
+                )
+        finally:
+            broker.publish = original
+        self.assertEqual(received, [(self.customer.id, {'booking_id': self.booking.id, 'status': 'confirmed'})])
+
+    def test_wsgi_stream_sends_snapshot_and_closes(self):
+        self.client.force_login(self.customer.user)
+        response = self.client.get(self.url)
+        body = response.content.decode()
+        self.assertIn(f'"booking_id": {self.booking.id}', body)
+        self.assertEqual(body.count('event: booking'), 1)
+
+    def test_requires_customer(self):
+        self.client.force_login(self.provider.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+# -------------------------------
+# Provider search
+# -------------------------------
+class ProviderSearchTests(TestCase):
+    def setUp(self):
+        self.plumbing = make_service('Plumbing')
+        self.painting = make_service('Painting')
+        self.ravi = make_provider('ravi')
+        self.asha = make_provider('asha')
+        self.ravi_plumbing = make_listing(self.ravi, self.plumbing)
+        self.asha_painting = make_listing(self.asha, self.painting)
+        self.asha_plumbing = make_listing(self.asha, self.plumbing)
+        self.asha_plumbing.address = '12 Plumbing Street'
+        self.asha_plumbing.save()
+
+    def ids(self, query, **kwargs):
+        return [listing.id for listing in search_listings(query, **kwargs)[0]]
+
+    def test_matches_username_profession_and_address_by_prefix(self):
+        self.assertEqual(self.ids('rav'), [self.ravi_plumbing.id])
+        self.assertEqual(self.ids('paint asha'), [self.asha_painting.id])
+        self.assertEqual(set(self.ids('bengaluru')), {self.ravi_plumbing.id, self.asha_painting.id})
+        self.assertEqual(self.ids(''), [])
+        self.assertEqual(self.ids('"*) OR ('), [])
+
+    def test_profession_match_outranks_address_match(self):
+        self.assertEqual(self.ids('plumbing')[-1], self.asha_plumbing.id)
+
+    def test_signals_keep_index_in_sync(self):
+        self.ravi.user.username = 'ravikumar'
+        self.ravi.user.save()
+        self.plumbing.profession_name = 'Pipework'
+        self.plumbing.save()
+        self.asha_painting.address = 'Mysuru'
+        self.asha_painting.save()
+
+        self.assertEqual(self.ids('ravikumar pipework'), [self.ravi_plumbing.id])
+        self.assertEqual(self.ids('mysuru'), [self.asha_painting.id])
+        self.asha_painting.delete()
+        self.assertEqual(self.ids('mysuru'), [])
+
+    def test_pages(self):
+        listings, has_next = search_listings('asha', page=1, page_size=1)
+        self.assertTrue(has_next)
+        second, has_next = search_listings('asha', page=2, page_size=1)
+        self.assertFalse(has_next)
+        self.assertNotEqual(listings[0].id, second[0].id)
+
+    def test_ranks_every_match_not_just_the_newest(self):
+        zoltan = make_listing(make_provider('zoltan'), self.painting)
+        for i in range(10):
+            listing = make_listing(make_provider(f'street{i}'), self.plumbing)
+            listing.address = f'{i} Zoltan Street'
+            listing.save()
+        seen = []
+        for page in range(1, 10):
+            listings, has_next = search_listings('zoltan', page=page, page_size=3)
+            seen += [listing.id for listing in listings]
+            if not has_next:
+                break
+        # The oldest match is the only username hit, so it still ranks first
+        self.assertEqual(seen[0], zoltan.id)
+        self.assertEqual((page, len(seen), len(set(seen))), (4, 11, 11))
+
+    def test_view(self):
+        customer = make_customer('searcher')
+        self.client.force_login(customer.user)
+        response = self.client.get(reverse('provider_search'), {'q': 'ravi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['service'].id for entry in response.context['providers']], [self.ravi_plumbing.id])
+        self.assertContains(response, 'Plumbing')
+
+
+class ProviderSearchBenchmark(TestCase):
+    LISTINGS = 100_000
+    QUERY_BUDGET_SECONDS = 0.010
+    QUERIES = ['bench_provider4242', 'plumb 77', 'electrical bench_provider99']
+    # Matches a sixth of the listings, and every match is scored (~30 ms here)
+    BROAD_QUERY = 'gandhi nagar'
+    BROAD_QUERY_BUDGET_SECONDS = 0.100
+
+    @classmethod
+    def setUpTestData(cls):
+        services = [make_service(name) for name in ('Plumbing', 'Electrical', 'Painting', 'Cleaning', 'Flooring')]
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'bench_provider{i}', role='provider') for i in range(5000)
+        ], batch_size=1000)
+        providers = ServiceProvider.objects.bulk_create([ServiceProvider(user=user) for user in users], batch_size=1000)
+        streets = ['MG Road', 'Brigade Road', 'Gandhi Nagar', 'Indiranagar', 'Jayanagar', 'Koramangala']
+        ProviderService.objects.bulk_create([
+            ProviderService(
+                provider=providers[i % len(providers)], service_type=services[i % len(services)],
+                address=f'{i % 997} {streets[i % len(streets)]}, Bengaluru', phone='9876543210',
+                experience='2-3', price='500.00',
+            )
+            for i in range(cls.LISTINGS)
+        ], batch_size=5000)
+        rebuild_search_index()
+
+    def median_search_seconds(self, query):
+        search_listings(query)  # warm the page cache
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            listings, _ = search_listings(query)
+            timings.append(time.perf_counter() - start)
+        self.assertTrue(listings, query)
+        return sorted(timings)[2]
+
+    def test_ranked_page_under_budget(self):
+        for query in self.QUERIES:
+            self.assertLess(self.median_search_seconds(query), self.QUERY_BUDGET_SECONDS, query)
+
+    def test_broad_query_under_budget(self):
+        self.assertLess(self.median_search_seconds(self.BROAD_QUERY), self.BROAD_QUERY_BUDGET_SECONDS)
+
+
+# -------------------------------
+# Nearest providers (geohash)
+# -------------------------------
+class NearestProviderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plumbing = make_service('Plumbing')
+        painting = make_service('Painting')
+        cls.near = make_provider('koramangala_plumber')
+        cls.mid = make_provider('indiranagar_plumber')
+        cls.far = make_provider('mysuru_plumber')
+        cls.near_listing = make_listing(cls.near, cls.plumbing)
+        cls.near_listing.address = '4th Block, Koramangala, Bengaluru'
+        cls.near_listing.save()
+        for provider, address in ((cls.mid, '100 Feet Road, Indiranagar'), (cls.far, 'Mysuru')):
+            listing = make_listing(provider, cls.plumbing)
+            listing.address = address
+            listing.save()
+        # Other professions never show up
+        make_listing(make_provider('koramangala_painter'), painting).save()
+
+        cls.customer = make_customer('hsr_customer')
+        cls.customer.address = 'Sector 2, HSR Layout, Bengaluru'
+        cls.customer.save()
+
+    def test_geohash_and_gazetteer(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        # Most specific name wins over the city
+        self.assertEqual(geocode('12 Koramangala, Bangalore'), (12.9352, 77.6245))
+        self.assertIsNone(geocode('Somewhere unknown'))
+        self.assertAlmostEqual(distance_km(12.9716, 77.5946, 13.0827, 80.2707), 290, delta=5)
+
+    def test_save_fills_coordinates(self):
+        self.near_listing.refresh_from_db()
+        self.assertEqual((self.near_listing.latitude, self.near_listing.longitude), (12.9352, 77.6245))
+        self.assertEqual(self.near_listing.geohash, geohash_encode(12.9352, 77.6245))
+        self.customer.refresh_from_db()
+        self.assertIsNotNone(self.customer.latitude)
+
+        self.near_listing.address = 'Whitefield'
+        self.near_listing.save()
+        self.assertEqual(self.near_listing.latitude, 12.9698)
+
+    def test_nearest_first_within_radius(self):
+        lat, lon = self.customer.latitude, self.customer.longitude
+        entries, has_next = nearest_page('Plumbing', lat, lon, radius_km=10)
+        self.assertEqual([e['provider'].id for e in entries], [self.near.id, self.mid.id])
+        self.assertLess(entries[0]['distance_km'], entries[1]['distance_km'])
+        self.assertFalse(has_next)
+
+        entries, _ = nearest_page('Plumbing', lat, lon, radius_km=200)
+        self.assertEqual(entries[-1]['provider'].id, self.far.id)
+
+    def test_covering_cells_reach_the_whole_radius(self):
+        # A point just inside the radius in each direction lands in a covering cell
+        lat, lon, radius = 12.9716, 77.5946, 5
+        cells = covering_cells(lat, lon, radius)
+        step = (radius - 0.1) / 111.32
+        for d_lat, d_lon in ((step, 0), (-step, 0), (0, step), (0, -step)):
+            point = geohash_encode(lat + d_lat, lon + d_lon)
+            self.assertTrue(any(point.startswith(cell) for cell in cells), (d_lat, d_lon))
+
+    def test_lookup_uses_geohash_index(self):
+        plan = nearby_listings(self.plumbing.id, 12.91, 77.64, 10).explain()
+        self.assertIn('listing_geohash_idx', plan)
+        self.assertNotIn('SCAN users_providerservice', plan)
+
+    def test_directory_nearest_mode(self):
+        self.client.force_login(self.customer.user)
+        url = reverse('customer_providers_by_service', args=['Plumbing'])
+        response = self.client.get(url, {'sort': 'nearest', 'radius': '10'})
+        self.assertEqual(response.context['sort'], 'nearest')
+        self.assertEqual([e['provider'].id for e in response.context['providers']], [self.near.id, self.mid.id])
+        self.assertContains(response, ' km</td>')
+
+        # No coordinates: stays on the latest-first listing
+        nowhere = make_customer('nowhere_customer')
+        Customer.objects.filter(id=nowhere.id).update(latitude=None, longitude=None)
+        self.client.force_login(nowhere.user)
+        self.assertEqual(self.client.get(url, {'sort': 'nearest'}).context['sort'], 'latest')
+
+
+# -------------------------------
+# Request actor / auth fast path
+# -------------------------------
+class ActorTests(TestCase):
+    def setUp(self):
+        self.provider = make_provider('actor_provider')
+        self.customer = make_customer('actor_customer')
+
+    def test_resolves_profile_ids_once(self):
+        with self.assertNumQueries(1):
+            actor = resolve_actor(self.provider.user)
+        self.assertEqual((actor.provider_id, actor.customer_id), (self.provider.id, None))
+        self.assertTrue(actor.is_provider)
+        with self.assertNumQueries(0):
+            provider = resolve_actor(self.provider.user).provider()
+        self.assertEqual(provider.pk, self.provider.id)
+        self.assertEqual(provider.user.username, 'actor_provider')
+
+    def test_warm_provider_page_skips_session_user_and_profile(self):
+        self.client.force_login(self.provider.user)
+        url = reverse('provider_profile')
+        self.client.get(url)
+        # Only the latest listing for the profile card
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.context['provider'].id, self.provider.id)
+
+    def test_profile_and_user_changes_invalidate(self):
+        user = self.customer.user
+        self.assertEqual(resolve_actor(user).customer_id, self.customer.id)
+
+        self.customer.delete()
+        self.assertIsNone(resolve_actor(user).customer_id)
+        replacement = Customer.objects.create(user=user, phone='1', address='x')
+        self.assertEqual(resolve_actor(user).customer_id, replacement.id)
+
+        # Cached user row follows saves
+        self.client.force_login(user)
+        self.client.get(reverse('customer_dashboard'))
+        user.username = 'renamed_customer'
+        user.save()
+        response = self.client.get(reverse('customer_dashboard'))
+        self.assertEqual(response.context['user'].username, 'renamed_customer')
+
+    def test_customer_pages_check_the_actor(self):
+        self.client.force_login(self.provider.user)
+        for name in ('customer_dashboard', 'customer_profile', 'customer_review'):
+            self.assertRedirects(self.client.get(reverse(name)), reverse('login_customer'), fetch_redirect_response=False)
+
+        self.client.force_login(self.customer.user)
+        self.client.get(reverse('customer_dashboard'))
+        # Session, user and role all come from the actor cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('customer_dashboard')).status_code, 200)
+
+    def test_provider_cannot_update_another_providers_booking(self):
+        other = make_provider('other_provider')
+        listing = make_listing(other, make_service('Plumbing'))
+        booking = Booking.objects.create(
+            customer=self.customer, provider=other, service=listing,
+            schedule_date=date(2031, 2, 1), timing='9AM-11AM',
+        )
+        self.client.force_login(self.provider.user)
+        response = self.client.post(
+            reverse('update_booking_status', args=[booking.id]),
+            json.dumps({'status': 'cancelled'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'pending')
+
+
+# -------------------------------
+# Hot/cold booking archive
+# -------------------------------
+@override_settings(BOOKING_ARCHIVE_DAYS=90)
+class BookingArchiveTests(TestCase):
+    def setUp(self):
+        plumbing = make_service('Plumbing')
+        self.provider = make_provider('archive_provider')
+        self.customer = make_customer('archive_customer')
+        self.listing = make_listing(self.provider, plumbing)
+
+    def book(self, status='completed', days_ago=0):
+        booking = Booking.objects.create(
+            customer=self.customer, provider=self.provider, service=self.listing,
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM', status=status,
+        )
+        # auto_now_add: backdate both orderings after the insert
+        when = timezone.now() - timedelta(days=days_ago)
+        Booking.objects.filter(id=booking.id).update(created_at=when, schedule_date=timezone.localdate(when))
+        booking.refresh_from_db()
+        return booking
+
+    def test_moves_only_old_finished_bookings(self):
+        old = self.book('completed', days_ago=200)
+        credit_booking(old)
+        stuck = self.book('pending', days_ago=200)
+        recent = self.book('cancelled', days_ago=10)
+        counters = read_counters()
+
+        moved = [i for ids in archive_bookings() for i in ids]
+
+        self.assertEqual(moved, [old.id])
+        self.assertEqual(set(Booking.objects.values_list('id', flat=True)), {stuck.id, recent.id})
+        archived = ArchivedBooking.objects.get(id=old.id)
+        self.assertEqual((archived.created_at, archived.status), (old.created_at, 'completed'))
+        # The ledger entry and dashboard totals are untouched
+        self.assertTrue(EarningEntry.objects.filter(booking_id=old.id, kind='credit').exists())
+        self.assertEqual(read_counters(), counters)
+
+    def test_chunks_commit_separately_and_resume(self):
+        for _ in range(5):
+            self.book('completed', days_ago=120)
+        first = list(archive_bookings(chunk_size=2, max_chunks=1))
+        self.assertEqual([len(ids) for ids in first], [2])
+        self.assertEqual(Booking.objects.count(), 3)
+
+        call_command('archive_bookings', chunk_size=2, stdout=io.StringIO())
+        self.assertEqual(Booking.objects.count(), 0)
+        self.assertEqual(ArchivedBooking.objects.count(), 5)
+
+    def test_refuses_cutoff_newer_than_setting(self):
+        self.book('completed', days_ago=30)
+        with self.assertRaises(CommandError):
+            call_command('archive_bookings', days=10)
+        self.assertEqual(ArchivedBooking.objects.count(), 0)
+
+    def archived_history(self, count):
+        for i in range(count):
+            self.book('completed', days_ago=100 + i)
+        list(archive_bookings())
+
+    def test_inbox_reads_archive_only_when_paging_past_cutoff(self):
+        recent = [self.book('completed', days_ago=i) for i in range(25)]
+        self.archived_history(5)
+        self.client.force_login(self.provider.user)
+        url = reverse('provider_view_bookings')
+
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(url)
+        self.assertFalse(any('archivedbooking' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual([b.id for b in first.context['bookings']], [b.id for b in recent[:20]])
+
+        second = self.client.get(url, {'cursor': first.context['next_cursor']})
+        rows = second.context['bookings']
+        self.assertEqual(len(rows), 10)
+        self.assertEqual([b.is_archived for b in rows], [False] * 5 + [True] * 5)
+        self.assertIsNone(second.context['next_cursor'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'status': 'pending'})
+        self.assertFalse(any('archivedbooking' in q['sql'] for q in queries.captured_queries))
+
+    def test_customer_past_bookings_merge_archive_by_service_date(self):
+        recent = [self.book('cancelled', days_ago=i) for i in range(21)]
+        self.archived_history(3)
+        self.client.force_login(self.customer.user)
+        url = reverse('customer_bookings')
+
+        first = self.client.get(url)
+        self.assertEqual([b.id for b in first.context['past_bookings']], [b.id for b in recent[:20]])
+        second = self.client.get(url, {'cursor': first.context['next_cursor']})
+        dates = [b.schedule_date for b in second.context['past_bookings']]
+        self.assertEqual(len(dates), 4)
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(sum(b.is_archived for b in second.context['past_bookings']), 3)
+
+
+# -------------------------------
+# Provider quality stats
+# -------------------------------
+class ProviderStatsTests(TestCase):
+    def setUp(self):
+        self.plumbing = make_service('Plumbing')
+        self.customer = make_customer('rating_customer')
+        self.providers = [make_provider(f'rated{i}') for i in range(3)]
+        self.listings = [make_listing(p, self.plumbing) for p in self.providers]
+
+    def book(self, index, status='completed'):
+        return Booking.objects.create(
+            customer=self.customer, provider=self.providers[index], service=self.listings[index],
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM', status=status,
+        )
+
+    def review(self, booking, rating):
+        return Review.objects.create(
+            customer=self.customer, booking=booking, provider_id=booking.provider_id, rating=rating, content='ok',
+        )
+
+    def stats(self, index):
+        return ProviderStats.objects.get(provider=self.providers[index])
+
+    def test_status_changes_and_reviews_move_stats(self):
+        booking = self.book(0, status='pending')
+        booking.status = 'completed'
+        booking.save()
+        self.review(booking, 4)
+        self.review(self.book(0), 2)
+        cancelled = self.book(0, status='confirmed')
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        stats = self.stats(0)
+        self.assertEqual((stats.rating_sum, stats.rating_count), (6, 2))
+        self.assertEqual((stats.completed_count, stats.cancelled_count), (2, 1))
+        self.assertAlmostEqual(stats.rating_avg, 3.0)
+        self.assertAlmostEqual(stats.cancellation_rate, 1 / 3)
+
+    def test_batch_update_moves_stats(self):
+        bookings = [self.book(0, status='confirmed') for _ in range(3)]
+        self.client.force_login(self.providers[0].user)
+        self.client.post(
+            reverse('batch_update_booking_status'),
+            json.dumps({'updates': [{'booking_id': b.id, 'status': 'completed'} for b in bookings]}),
+            content_type='application/json',
+        )
+        self.assertEqual(self.stats(0).completed_count, 3)
+
+    def test_rebuild_matches_incremental(self):
+        self.review(self.book(1), 5)
+        self.book(1, status='rejected')
+        self.book(2, status='cancelled')
+        before = list(ProviderStats.objects.order_by('provider').values())
+        ProviderStats.objects.all().delete()
+        rebuild_provider_stats()
+        self.assertEqual(list(ProviderStats.objects.order_by('provider').values()), before)
+
+    def test_directory_sorts_and_filters_by_rating(self):
+        self.review(self.book(0), 3)
+        self.review(self.book(1), 5)
+        self.book(1, status='cancelled')
+        self.review(self.book(2), 4)
+
+        entries, has_next = rated_page('Plumbing')
+        self.assertEqual([e['provider'].id for e in entries], [self.providers[i].id for i in (1, 2, 0)])
+        self.assertEqual(entries[0]['rating'], 5.0)
+        self.assertFalse(has_next)
+
+        entries, _ = rated_page('Plumbing', min_rating=4, max_cancellation=0.1)
+        self.assertEqual([e['provider'].id for e in entries], [self.providers[2].id])
+
+        self.client.force_login(self.customer.user)
+        response = self.client.get(reverse('customer_providers_by_service', args=['Plumbing']), {'sort': 'rated'})
+        self.assertEqual(response.context['sort'], 'rated')
+        self.assertContains(response, '5.0★')
+
+    def test_rating_order_walks_the_index(self):
+        plan = rated_listing_ids(self.plumbing.id, min_rating=3).explain()
+        self.assertIn('provider_rating_idx', plan)
+        # No sort of the providers (the per-provider listing probe may tie-break ids)
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+        self.assertNotIn('SCAN users_providerstats', plan)
+
+    def test_customer_reviews_a_completed_booking_once(self):
+        booking = self.book(0)
+        self.client.force_login(self.customer.user)
+        url = reverse('customer_review')
+        self.assertEqual(list(self.client.get(url).context['reviewable']), [booking])
+
+        for _ in range(2):
+            self.client.post(url, {'booking': booking.id, 'rating': '4', 'review': 'Quick fix'})
+        review = Review.objects.get()
+        self.assertEqual((review.booking_id, review.provider_id, review.rating), (booking.id, booking.provider_id, 4))
+        self.assertEqual(self.stats(0).rating_count, 1)
+        self.assertEqual(list(self.client.get(url).context['reviewable']), [])
+
+
+# -------------------------------
+# Read-only JSON API
+# -------------------------------
+class JsonApiTests(TestCase):
+    def setUp(self):
+        self.plumbing = make_service('Plumbing')
+        self.customer = make_customer('api_customer')
+        self.provider = make_provider('api_provider')
+        self.listing = make_listing(self.provider, self.plumbing, price='450.00')
+        self.booking = Booking.objects.create(
+            customer=self.customer, provider=self.provider, service=self.listing,
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM', status='completed',
+        )
+        Review.objects.create(
+            customer=self.customer, booking=self.booking, provider=self.provider, rating=5, content='Great',
+        )
+
+    def test_services_and_directory_are_values_json(self):
+        services = self.client.get(reverse('api_services')).json()['results']
+        self.assertEqual(services, [{'id': self.plumbing.id, 'profession_name': 'Plumbing', 'image': None}])
+
+        for params in ({}, {'sort': 'rated'}):
+            body = self.client.get(reverse('api_providers', args=['Plumbing']), params).json()
+            row = body['results'][0]
+            self.assertEqual((row['id'], row['provider_name'], row['price']), (self.listing.id, 'api_provider', '450.00'))
+            self.assertEqual((row['rating'], row['rating_count']), (5.0, 1))
+            self.assertIsNone(body['next_cursor'])
+        self.assertEqual(self.client.get(reverse('api_providers', args=['Nope'])).status_code, 404)
+
+    def test_unchanged_resource_is_304_without_queries(self):
+        url = reverse('api_providers', args=['Plumbing'])
+        first = self.client.get(url)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))  # strong
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # A new listing bumps the ProviderService stamp
+        with self.captureOnCommitCallbacks(execute=True):
+            make_listing(make_provider('api_provider2'), self.plumbing)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_customer_bookings_and_reviews(self):
+        self.assertEqual(self.client.get(reverse('api_bookings')).status_code, 401)
+        self.client.force_login(self.customer.user)
+
+        bookings = self.client.get(reverse('api_bookings'))
+        self.assertEqual(bookings['Cache-Control'], 'no-cache, private')
+        row = bookings.json()['results'][0]
+        self.assertEqual((row['id'], row['status'], row['profession'], row['price']), (self.booking.id, 'completed', 'Plumbing', '450.00'))
+
+        reviews = self.client.get(reverse('api_reviews')).json()['results']
+        self.assertEqual([(r['booking_id'], r['rating'], r['provider_name']) for r in reviews], [(self.booking.id, 5, 'api_provider')])
+
+        etag = bookings['ETag']
+        self.client.get(reverse('api_bookings'))  # warm the session/actor cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('api_bookings'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.booking.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.save()
+        self.assertEqual(self.client.get(reverse('api_bookings'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_private_etag_differs_per_customer(self):
+        other = make_customer('api_other')
+        self.client.force_login(self.customer.user)
+        mine = self.client.get(reverse('api_bookings'))['ETag']
+        self.client.force_login(other.user)
+        response = self.client.get(reverse('api_bookings'), HTTP_IF_NONE_MATCH=mine)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+
+class JsonApiCommitTests(TransactionTestCase):
+    def test_reader_during_write_keeps_the_old_etag(self):
+        plumbing = make_service('Plumbing')
+        make_listing(make_provider('commit_provider'), plumbing)
+        url = reverse('api_providers', args=['Plumbing'])
+        etag = self.client.get(url)['ETag']
+
+        def read():
+            # A second connection, reading while the write is uncommitted
+            try:
+                response = Client().get(url)
+                return response['ETag'], len(response.json()['results'])
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            make_listing(make_provider('commit_provider2'), plumbing)
+            with ThreadPoolExecutor(1) as reader:
+                self.assertEqual(reader.submit(read).result(), (etag, 1))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+
+# -------------------------------
+# Streaming exports
+# -------------------------------
+class BookingExportTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create(username='export_admin', role='admin')
+        plumbing, cleaning = make_service('Plumbing'), make_service('Cleaning')
+        self.customer = make_customer('export_customer')
+        provider = make_provider('export_provider')
+        self.plumbing = make_listing(provider, plumbing, price='450.00')
+        self.cleaning = make_listing(provider, cleaning, price='300.00')
+
+    def book(self, listing, status='completed', days_ago=0):
+        booking = Booking.objects.create(
+            customer=self.customer, provider=listing.provider, service=listing,
+            schedule_date=date(2025, 11, 1), timing='9AM-11AM', status=status,
+        )
+        when = timezone.now() - timedelta(days=days_ago)
+        Booking.objects.filter(id=booking.id).update(created_at=when, schedule_date=timezone.localdate(when))
+        booking.refresh_from_db()
+        return booking
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_bookings_csv_includes_archived_rows_in_id_order(self):
+        old = self.book(self.plumbing, days_ago=200)
+        list(archive_bookings())
+        recent = self.book(self.cleaning, 'pending')
+        self.client.force_login(self.admin)
+
+        response, body = self.export('admin_export_bookings')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="bookings-all.csv"', response['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'id,created_at,schedule_date,timing,status,customer,customer_phone,provider,profession,price,archived')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], [str(old.id), str(recent.id)])
+        self.assertTrue(lines[1].endswith(',export_customer,9876543210,export_provider,Plumbing,450.00,True'))
+        self.assertTrue(lines[2].endswith(',Cleaning,300.00,False'))
+
+    def test_filters_and_jsonl(self):
+        self.book(self.plumbing, 'completed', days_ago=40)
+        wanted = self.book(self.plumbing, 'completed', days_ago=5)
+        self.book(self.plumbing, 'cancelled', days_ago=5)
+        self.book(self.cleaning, 'completed', days_ago=5)
+        self.client.force_login(self.admin)
+
+        start = timezone.localdate() - timedelta(days=10)
+        response, body = self.export(
+            'admin_export_bookings', date_from=start, status='completed', profession='Plumbing', format='jsonl',
+        )
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(row['id'], row['price'], row['archived']) for row in rows], [(wanted.id, '450.00', False)])
+
+        bad = self.client.get(reverse('admin_export_bookings'), {'date_from': '2025-02-01', 'date_to': '2025-01-01'})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_earnings_export_by_profession_covers_archived_bookings(self):
+        archived = self.book(self.plumbing, days_ago=200)
+        credit_booking(archived)
+        list(archive_bookings())
+        other = self.book(self.cleaning)
+        credit_booking(other)
+        self.client.force_login(self.admin)
+
+        _, body = self.export('admin_export_earnings', profession='Plumbing')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'id,created_at,kind,amount,booking_id,provider')
+        self.assertEqual(len(lines), 2)
+        self.assertIn(f',credit,450.00,{archived.id},export_provider', lines[1])
+
+    def test_admin_only_and_constant_query_count(self):
+        for _ in range(30):
+            self.book(self.plumbing)
+        self.client.force_login(self.customer.user)
+        self.assertEqual(self.client.get(reverse('admin_export_bookings')).status_code, 302)
+
+        # One streaming query per table, however many rows and chunks
+        with self.assertNumQueries(2):
+            rows = list(booking_rows(chunk_size=7))
+        self.assertEqual(len(rows), 30)
+
+    def test_command_writes_file(self):
+        self.book(self.plumbing, 'completed')
+        self.book(self.cleaning, 'cancelled')
+        out = io.StringIO()
+        call_command('export_data', 'bookings', status='cancelled', format='jsonl', stdout=out)
+        self.assertEqual([json.loads(line)['profession'] for line in out.getvalue().splitlines()], ['Cleaning'])
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'bookings', date_from='yesterday', stdout=io.StringIO())
+
+
+# -------------------------------
+# Password hashing pool
+# -------------------------------
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class PasswordOffloadTests(TestCase):
+    def setUp(self):
+        self.customer = make_customer('pool_customer')
+        self.customer.user.set_password('Passw0rd!')
+        self.customer.user.save()
+
+    def completed(self):
+        return password_pool.stats()['completed']
+
+    def test_login_verifies_on_pool(self):
+        before = self.completed()
+        response = self.client.post(reverse('login_customer'), {'username': 'pool_customer', 'password': 'Passw0rd!'})
+        self.assertRedirects(response, reverse('customer_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.customer.user.id)
+
+        self.client.logout()
+        wrong = self.client.post(reverse('login_customer'), {'username': 'pool_customer', 'password': 'nope'})
+        self.assertContains(wrong, 'Invalid credentials')
+        # Unknown usernames cost one hash too
+        self.client.post(reverse('login_provider'), {'username': 'nobody', 'password': 'Passw0rd!'})
+        self.assertEqual(self.completed() - before, 3)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    @override_settings(PASSWORD_HASHERS=[*FAST_HASHERS, 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'])
+    def test_outdated_hash_is_upgraded(self):
+        user = self.customer.user
+        user.password = make_password('Passw0rd!', hasher='pbkdf2_sha1')
+        user.save()
+        self.client.post(reverse('login_customer'), {'username': 'pool_customer', 'password': 'Passw0rd!'})
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('md5$'))
+
+    def test_signup_hashes_on_pool(self):
+        image = io.BytesIO()
+        Image.new('RGB', (10, 10), 'orange').save(image, 'PNG')
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        before = self.completed()
+        with override_settings(MEDIA_ROOT=media_root):
+            response = self.client.post(reverse('signup_provider'), {
+                'username': 'pool_provider', 'email': 'pool@example.com', 'password1': 'Str0ng!pass',
+                'password2': 'Str0ng!pass',
+                'profile_pic': SimpleUploadedFile('me.png', image.getvalue(), content_type='image/png'),
+            })
+        self.assertRedirects(response, reverse('login_provider'), fetch_redirect_response=False)
+        user = CustomUser.objects.get(username='pool_provider')
+        self.assertTrue(user.check_password('Str0ng!pass'))
+        self.assertTrue(ServiceProvider.objects.filter(user=user).exists())
+        self.assertEqual(self.completed() - before, 1)
+
+    def test_full_pool_answers_503(self):
+        limit = password_pool.queue_limit
+        password_pool.queue_limit = 0
+        self.addCleanup(setattr, password_pool, 'queue_limit', limit)
+        rejected = password_pool.stats()['rejected']
+
+        response = self.client.post(reverse('login_admin'), {'username': 'pool_customer', 'password': 'Passw0rd!'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(password_pool.stats()['rejected'], rejected + 1)
+
+
+class LoginStormBenchmark(TransactionTestCase):
+    """
+    A burst of real (PBKDF2) logins alongside page views through the ASGI
+    request path, once hashing inline on the event loop and once on the
+    pool. The numbers are logged to the users.tests logger (INFO).
+    """
+    LOGINS = 4
+
+    def setUp(self):
+        customer = make_customer('storm_customer')
+        customer.user.set_password('Passw0rd!')
+        customer.user.save()
+
+    @staticmethod
+    async def request(method, path, data=None):
+        # Like the ASGI handler: each request's sync parts get their own thread
+        async with ThreadSensitiveContext():
+            return await getattr(AsyncClient(), method)(path, data)
+
+    async def storm(self):
+        page_ms = []
+        logins_done = asyncio.Event()
+
+        async def log_in():
+            response = await self.request(
+                'post', reverse('login_customer'), {'username': 'storm_customer', 'password': 'Passw0rd!'},
+            )
+            self.assertEqual(response.status_code, 302)
+
+        async def logins():
+            await asyncio.gather(*(log_in() for _ in range(self.LOGINS)))
+            logins_done.set()
+
+        async def browse():
+            await asyncio.sleep(0.01)  # let the logins start first
+            while not logins_done.is_set():
+                start = time.perf_counter()
+                response = await self.request('get', reverse('api_services'))
+                page_ms.append((time.perf_counter() - start) * 1000)
+                self.assertEqual(response.status_code, 200)
+
+        await asyncio.gather(browse(), logins())
+        page_ms.sort()
+        return len(page_ms), page_ms[int(len(page_ms) * 0.95) - 1 if len(page_ms) > 1 else 0], page_ms[-1]
+
+    def run_storm(self):
+        # A fresh thread and event loop, as under an ASGI server (an async
+        # test method would run every request's sync code on the test thread)
+        with ThreadPoolExecutor(1) as runner:
+            return runner.submit(asyncio.run, self.storm()).result()
+
+    def test_offload_keeps_pages_flowing_during_login_storm(self):
+        with override_settings(PASSWORD_HASH_OFFLOAD=False):
+            inline_pages, inline_p95, inline_max = self.run_storm()
+        before = password_pool.stats()
+        offloaded_pages, offloaded_p95, offloaded_max = self.run_storm()
+        pool = password_pool.stats()
+        logger.info(
+            'Page views during %d logins: inline %d served, p95 %.1f ms, max %.1f ms; '
+            'offloaded %d served, p95 %.1f ms, max %.1f ms; pool %s',
+            self.LOGINS, inline_pages, inline_p95, inline_max, offloaded_pages, offloaded_p95, offloaded_max, pool,
+        )
+        self.assertGreater(offloaded_pages, inline_pages)
+        self.assertLess(offloaded_max, inline_max)
+        # Every offloaded login got a worker; none was turned away
+        self.assertEqual(pool['completed'] - before['completed'], self.LOGINS)
+        self.assertEqual(pool['rejected'], before['rejected'])
+
+
+# -------------------------------
+# Query plans of hot paths
+# -------------------------------
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN for the querysets behind the busiest pages. A plan
+    line "SCAN <table>" without an index means the query reads the whole
+    table; an index walk ("SCAN t USING INDEX i" under a LIMIT) is fine.
+    """
+
+    def setUp(self):
+        self.plumbing = make_service('Plumbing')
+        self.customer = make_customer('plan_customer')
+        self.provider = make_provider('plan_provider')
+        make_listing(self.provider, self.plumbing)
+
+    def assertNoFullScan(self, queryset, uses_index=None):
+        plan = queryset.explain()
+        scans = [line for line in plan.splitlines() if re.search(r'\bSCAN \w+$', line.strip())]
+        self.assertEqual(scans, [], plan)
+        if uses_index:
+            self.assertIn(uses_index, plan)
+        return plan
+
+    def test_booking_lists(self):
+        # Provider inbox (every tab) and JSON API history
+        inbox = Booking.objects.filter(provider=self.provider).order_by('-created_at', '-id')
+        plan = self.assertNoFullScan(inbox[:21], 'booking_provider_inbox_idx')
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNoFullScan(inbox.filter(status__in=['pending'])[:21], 'booking_provider_inbox_idx')
+        # Customer's current and past bookings, live status snapshot
+        mine = Booking.objects.filter(customer=self.customer)
+        self.assertNoFullScan(mine.filter(status__in=['pending', 'confirmed']).order_by('-schedule_date'),
+                              'booking_customer_status_idx')
+        self.assertNoFullScan(mine.filter(status__in=['completed', 'cancelled']).order_by('-schedule_date', '-id')[:21],
+                              'booking_customer_status_idx')
+        self.assertNoFullScan(mine.filter(status__in=LIVE_STATUSES).values_list('id', 'status'),
+                              'booking_customer_status_idx')
+        self.assertNoFullScan(ArchivedBooking.objects.filter(customer=self.customer).order_by('-schedule_date', '-id')[:21],
+                              'archive_customer_idx')
+
+    def test_directory_and_search(self):
+        directory = latest_listings('Plumbing').order_by('-created_at', '-id')[:21]
+        self.assertNoFullScan(directory, 'service_profession_idx')
+        self.assertNoFullScan(rated_listing_ids(self.plumbing.id), 'provider_rating_idx')
+        self.assertNoFullScan(nearby_listings(self.plumbing.id, 12.91, 77.64, 10), 'listing_geohash_idx')
+
+    def test_admin_and_signup_lookups(self):
+        self.assertNoFullScan(Customer.objects.filter(phone__gt='', user__is_active=True), 'customer_phone_idx')
+        email_check = CustomUser.objects.alias(email_lower=Lower('email')).filter(email_lower='a@example.com')
+        self.assertNoFullScan(email_check, 'user_email_lower_idx')
+
+    def test_reviews(self):
+        self.assertNoFullScan(Review.objects.order_by('-created_at')[:10], 'review_recent_idx')
+        plan = self.assertNoFullScan(
+            Review.objects.filter(customer=self.customer).order_by('-created_at', '-id')[:21], 'review_customer_idx',
+        )
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_email_check_is_case_insensitive(self):
+        CustomUser.objects.create(username='someone', email='Someone@Example.com')
+        self.assertTrue(email_registered('someone@example.COM'))
+        self.assertFalse(email_registered('other@example.com'))
+
+
+# -------------------------------
+# SQLite production mode
+# -------------------------------
+class SqliteModeTests(TransactionTestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            values = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'busy_timeout', 'synchronous')
+            }
+        self.assertEqual(values, {'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1})
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_locked_write_is_retried(self):
+        calls = []
+
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return make_service('Plumbing')
+
+        before = retry_stats()
+        with override_settings(SQLITE_RETRY_BASE_DELAY=0):
+            service = retry_write(write)
+        self.assertEqual(calls, [True, True, True])
+        self.assertEqual(Service.objects.get().pk, service.pk)
+        self.assertEqual(retry_stats()['retries'] - before['retries'], 2)
+
+    def test_other_errors_and_outer_transactions_are_not_retried(self):
+        calls = []
+
+        def write(error):
+            calls.append(error)
+            raise error
+
+        with self.assertRaises(OperationalError):
+            retry_write(write, OperationalError('no such table: nowhere'))
+        self.assertEqual(len(calls), 1)
+
+        with self.assertRaises(OperationalError), override_settings(SQLITE_RETRY_BASE_DELAY=0):
+            with transaction.atomic():
+                retry_write(write, OperationalError('database is locked'))
+        self.assertEqual(len(calls), 2)
+
+
+class SqliteContentionBenchmark(TransactionTestCase):
+    """
+    Providers updating booking statuses from many threads at once, with the
+    old rollback-journal setup (deferred transactions, no retry) and with
+    SQLite production mode. The numbers are logged to the users.tests logger
+    (INFO).
+    """
+    WORKERS = 8
+    UPDATES = 15
+
+    def setUp(self):
+        plumbing = make_service('Plumbing')
+        self.clients = []
+        for i in range(self.WORKERS):
+            provider = make_provider(f'busy_provider{i}')
+            listing = make_listing(provider, plumbing)
+            booking = Booking.objects.create(
+                customer=make_customer(f'busy_customer{i}'), provider=provider, service=listing,
+                schedule_date=date(2025, 11, 1), timing='9AM-11AM', slot_start=dt_time(9), slot_end=dt_time(11),
+            )
+            client = Client()
+            client.force_login(provider.user)
+            self.clients.append((client, booking.id))
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.database = connection.settings_dict['NAME']
+
+    def tearDown(self):
+        connection.close()
+        connection.settings_dict['NAME'] = self.database
+        connection.settings_dict['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def use_copy(self, journal_mode, transaction_mode):
+        # Each run gets its own copy of the data: the journal mode is stored in
+        # the file and cannot change while other threads hold it open
+        path = f'{self.tmp_dir}/{journal_mode}.sqlite3'
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.execute(f'PRAGMA journal_mode = {journal_mode}')
+        target.close()
+        connection.close()
+        # Shared with the connections the worker threads open
+        connection.settings_dict['NAME'] = path
+        connection.settings_dict['OPTIONS']['transaction_mode'] = transaction_mode
+
+    def contend(self):
+        def worker(client, booking_id):
+            done = failed = 0
+            try:
+                for i in range(self.UPDATES):
+                    status = 'confirmed' if i % 2 == 0 else 'cancelled'
+                    try:
+                        client.post(
+                            reverse('update_booking_status', args=[booking_id]), json.dumps({'status': status}),
+                            content_type='application/json',
+                        )
+                        done += 1
+                    except OperationalError:
+                        failed += 1
+            finally:
+                connection.close()
+            return done, failed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(lambda args: worker(*args), self.clients))
+        elapsed = time.perf_counter() - start
+        done = sum(ok for ok, _ in results)
+        return done, sum(failed for _, failed in results), done / elapsed
+
+    def test_production_mode_completes_every_write(self):
+        self.use_copy('delete', None)
+        with override_settings(SQLITE_PRAGMAS={}, SQLITE_WRITE_ATTEMPTS=1):
+            old_done, old_failed, old_rate = self.contend()
+        self.use_copy('wal', 'IMMEDIATE')
+        before = retry_stats()
+        done, failed, rate = self.contend()
+        after = retry_stats()
+        logger.info(
+            '%d writers x %d status updates: rollback journal %d ok, %d locked, %.0f/s; '
+            'production mode %d ok, %d locked, %.0f/s, %d retries',
+            self.WORKERS, self.UPDATES, old_done, old_failed, old_rate, done, failed, rate,
+            after['retries'] - before['retries'],
+        )
+        self.assertEqual((done, failed), (self.WORKERS * self.UPDATES, 0))
+        self.assertGreaterEqual(done, old_done)
+        # Every status update ran in retry_write(), and none of them gave up
+        self.assertEqual(after['transactions'] - before['transactions'], self.WORKERS * self.UPDATES)
+        self.assertEqual(after['gave_up'], before['gave_up'])
+
+
+# -------------------------------
+# Idempotency keys
+# -------------------------------
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = make_provider('retry_provider')
+        cls.listing = make_listing(cls.provider, make_service('Plumbing'))
+        cls.customer = make_customer('retry_customer')
+
+    def setUp(self):
+        self.client.force_login(self.customer.user)
+
+    def book(self, key, timing='9AM-11AM'):
+        return self.client.post(reverse('create_booking'), {
+            'service_id': self.listing.id, 'provider_id': self.provider.id,
+            'schedule_date': '2025-11-01', 'timing': timing,
+        }, headers={'x-requested-with': 'XMLHttpRequest', 'Idempotency-Key': key})
+
+    def test_retried_booking_replays_first_response(self):
+        first = self.book('attempt-1')
+        retry = self.book('attempt-1')
+        self.assertEqual(first.json()['status'], 'success')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+        # A new key is a new booking attempt (here: the slot is now taken)
+        self.assertEqual(self.book('attempt-2').json()['status'], 'error')
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.book('attempt-1')
+        self.assertEqual(self.book('attempt-1', timing='11AM-1PM').status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_retry_while_first_request_runs_conflicts(self):
+        self.book('attempt-1')
+        IdempotencyKey.objects.update(status_code=None)
+        response = self.book('attempt-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_abandoned_claim_expires(self):
+        self.book('attempt-1')
+        Booking.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.book('attempt-1').json()['status'], 'success')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_payment_success_reload_skips_writes(self):
+        booking_id = self.book('attempt-1').json()['booking_id']
+        url = reverse('payment_success', args=[booking_id])
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            reload = self.client.get(url)
+        self.assertEqual(reload['Idempotent-Replayed'], 'true')
+        self.assertEqual(reload.content, first.content)
+        self.assertFalse([q for q in queries if 'users_booking' in q['sql'] or 'users_earningentry' in q['sql']])
+        self.assertEqual(EarningEntry.objects.filter(booking_id=booking_id).count(), 1)
+
+    def test_expired_keys_are_purged_in_batches(self):
+        user = self.customer.user
+        past, future = timezone.now() - timedelta(hours=1), timezone.now() + timedelta(hours=1)
+        IdempotencyKey.objects.bulk_create(
+            [IdempotencyKey(user=user, key=f'old-{i}', fingerprint='x', expires_at=past) for i in range(5)]
+            + [IdempotencyKey(user=user, key='live', fingerprint='x', expires_at=future)]
+        )
+        self.assertEqual(purge_expired_keys(batch_size=2), 5)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['live'])
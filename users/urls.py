@@ -1,6 +1,6 @@
 from django.urls import path, include # type: ignore
 from django.contrib import admin # type: ignore
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Customer
@@ -9,6 +9,7 @@ urlpatterns = [
     path('dashboard/customer/', views.customer_dashboard_view, name='customer_dashboard'),
     path('dashboard/customer/profile/', views.customer_profile_view, name='customer_profile'),
     path('dashboard/customer/services/', views.customer_services_view, name='customer_services'),
+    path('dashboard/customer/search/', views.provider_search_view, name='provider_search'),
     path('dashboard/customer/services/<str:profession_name>/', views.customer_providers_by_service_view, name='customer_providers_by_service'),
     # Add this path
     path('booking/create/', views.create_booking_view, name='create_booking'),
@@ -17,6 +18,7 @@ urlpatterns = [
     path('payment/success/<int:booking_id>/', views.payment_success_view, name='payment_success'),
     path('dashboard/customer/bookings/', views.customer_bookings_view, name='customer_bookings'),
     path('booking/cancel/', views.cancel_booking_view, name='cancel_booking'),
+    path('dashboard/customer/bookings/events/', views.booking_events_view, name='booking_events'),
     path('payment/cod/<int:booking_id>/', views.cod_confirmation_view, name='cod_confirmation'),
     path('review/', views.customer_review_view, name='customer_review'),
     
@@ -25,6 +27,7 @@ urlpatterns = [
     path('login/provider/', views.provider_login_view, name='login_provider'),
     path('dashboard/provider/bookings/', views.provider_view_bookings_view, name='provider_view_bookings'),
     path('dashboard/provider/bookings/update/<int:booking_id>/', views.update_booking_status, name='update_booking_status'),
+    path('dashboard/provider/bookings/update/batch/', views.batch_update_booking_status, name='batch_update_booking_status'),
 
     # Admin
     path('login/admin/', views.admin_login_view, name='login_admin'),
@@ -35,6 +38,14 @@ urlpatterns = [
     # Admin: View Customers
     path('dashboard/admin/customers/', views.admin_view_customers, name='admin_view_customers'),
     path('dashboard/admin/customers/delete/<int:customer_id>/', views.admin_delete_customer, name='admin_delete_customer'),
+    path('dashboard/admin/export/bookings/', views.admin_export_view, {'dataset': 'bookings'}, name='admin_export_bookings'),
+    path('dashboard/admin/export/earnings/', views.admin_export_view, {'dataset': 'earnings'}, name='admin_export_earnings'),
+
+    # Read-only JSON API (conditional GET with ETag / Last-Modified)
+    path('api/v1/services/', api.services_api, name='api_services'),
+    path('api/v1/services/<str:profession_name>/providers/', api.providers_api, name='api_providers'),
+    path('api/v1/bookings/', api.bookings_api, name='api_bookings'),
+    path('api/v1/reviews/', api.reviews_api, name='api_reviews'),
 
     # Logout
     path('logout/', views.logout_view, name='logout'),
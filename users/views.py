@@ -1,49 +1,85 @@
 from django.shortcuts import render, redirect, get_object_or_404 # type: ignore
-from django.contrib.auth import authenticate, login, logout # type: ignore
+from django.contrib.auth import alogin, logout # type: ignore
+from asgiref.sync import sync_to_async # type: ignore
 from django.contrib import messages # type: ignore
 from django.contrib.auth.decorators import login_required, user_passes_test # type: ignore
-from .forms import CustomerSignupForm, ProviderSignupForm, AdminLoginForm, ProviderServiceForm
+from .forms import CustomerSignupForm, ProviderSignupForm, AdminLoginForm, ProviderServiceForm, ExportFilterForm
 from .models import Customer, ServiceProvider, ProviderService, ProviderEarning
 from main.models import Service
-from django.db.models import Sum # type: ignore
+from django.db import IntegrityError, transaction # type: ignore
 from django.http import JsonResponse # type: ignore
-from .models import Booking, Review
+from .models import ArchivedBooking, Booking, Review
 from django.views.decorators.csrf import csrf_exempt # type: ignore
 from django.views.decorators.http import require_POST # type: ignore
+from .archive import history_page
+from .directory import (
+    MAX_RADIUS_KM, NEAREST_RADIUS_KM, RELIABLE_CANCELLATION_RATE, directory_entry, directory_page, nearest_page,
+    rated_page,
+)
+from .idempotency import idempotent
+from .export import EXPORT_CONTENT_TYPES, export_filename, export_lines, export_rows
+from .earnings import credit_booking, credit_bookings, refund_booking, refund_bookings
+from .stats import booking_counter, bump, move_provider_stats, read_counters, status_deltas
+from .search import search_listings
+from .events import broker, format_event, publish_status
+from .tasks import delete_user
+from .passwords import authenticate_offloaded, hash_password, password_pool_guard
+from main.cache import bump_version
+from main.db_router import replica_reads
+from main.jobs import enqueue
+from main.sqlite import retry_write
+from django.conf import settings # type: ignore
+from django.core.handlers.asgi import ASGIRequest # type: ignore
+from django.http import HttpResponse, StreamingHttpResponse # type: ignore
+import asyncio
 import json
 from decimal import Decimal
 
 # -------------------------
 # Customer Views
 # -------------------------
-def customer_signup_view(request):
+async def arender(request, template_name, context, status=200):
+    # Templates read the session (messages, request.user): render off the event loop
+    return await sync_to_async(render)(request, template_name, context, status=status)
+
+
+async def save_signup(form):
+    # PBKDF2 runs on the password pool; validation and the inserts stay sync
+    if not await sync_to_async(form.is_valid)():
+        return None
+    form.password_hash = await hash_password(form.cleaned_data['password1'])
+    return await sync_to_async(form.save)()
+
+
+@password_pool_guard
+async def customer_signup_view(request):
     if request.method == 'POST':
         form = CustomerSignupForm(request.POST, request.FILES)
-        if form.is_valid():
-            form.save()
+        if await save_signup(form):
             messages.success(request, 'Customer account created successfully!')
             return redirect('login_customer')  
     else:
         form = CustomerSignupForm()
-    return render(request, 'users/signup.html', {'form': form, 'role': 'Customer'})
+    return await arender(request, 'users/signup.html', {'form': form, 'role': 'Customer'})
 
 
 
 
-def customer_login_view(request):
+@password_pool_guard
+async def customer_login_view(request):
     # Clear old session messages (from previous users)
-    list(messages.get_messages(request))
+    await sync_to_async(list)(messages.get_messages(request))
 
     if request.method == 'POST':
-        username = request.POST['username']
-        password = request.POST['password']
-        user = authenticate(request, username=username, password=password)
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+        user = await authenticate_offloaded(request, username, password)
         if user is not None and user.role == 'customer':
-            login(request, user)
+            await alogin(request, user)
             return redirect('customer_dashboard')  
         else:
             messages.error(request, 'Invalid credentials or not a customer account.')
-    return render(request, 'users/login.html', {'role': 'Customer'})
+    return await arender(request, 'users/login.html', {'role': 'Customer'})
 
 
 
@@ -51,16 +87,16 @@ def customer_login_view(request):
 # -------------------------
 # Service Provider Views
 # -------------------------
-def provider_signup_view(request):
+@password_pool_guard
+async def provider_signup_view(request):
     if request.method == 'POST':
         form = ProviderSignupForm(request.POST, request.FILES)  
-        if form.is_valid():
-            form.save()
+        if await save_signup(form):
             messages.success(request, 'Service Provider account created successfully!')
             return redirect('login_provider')  
         else:
             # debug form errors temporarily to console
-            print("Form errors:", form.errors)
+            logger.info(f'Signup form errors: {form.errors.as_json()}')
             messages.error(request, 'Please correct the errors below.')
     else:
         form = ProviderSignupForm()
@@ -69,37 +105,70 @@ def provider_signup_view(request):
         'form': form,
         'role': 'Service Provider'
     }
-    return render(request, 'users/signup.html', context)
+    return await arender(request, 'users/signup.html', context)
 
 # Helper: check if user is provider
 def is_provider(user):
     return user.is_authenticated and user.role == 'provider'
 
-def provider_login_view(request):
+@password_pool_guard
+async def provider_login_view(request):
     if request.method == 'POST':
-        username = request.POST['username']
-        password = request.POST['password']
-        user = authenticate(request, username=username, password=password)
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+        user = await authenticate_offloaded(request, username, password)
         if user is not None and user.role == 'provider':
-            login(request, user)
+            await alogin(request, user)
             return redirect('provider_dashboard')  
         else:
             messages.error(request, 'Invalid credentials or not a provider account.')
-    return render(request, 'users/login.html', {'role': 'Service Provider'})
+    return await arender(request, 'users/login.html', {'role': 'Service Provider'})
 
 # -------------------------
 # Provider - View Bookings
 # -------------------------
+INBOX_PAGE_SIZE = 20
+
+# Inbox tab -> statuses shown (None = all)
+INBOX_TABS = {
+    'all': None,
+    'pending': ['pending'],
+    'active': ['accepted', 'confirmed', 'arriving', 'arrived'],
+    'completed': ['completed'],
+    'cancelled': ['cancelled', 'rejected'],
+}
+
 @login_required(login_url='login_provider')
 def provider_view_bookings_view(request):
-    if request.user.role != 'provider':
+    if not request.actor.is_provider:
         return redirect('login_provider')
 
-    provider = get_object_or_404(ServiceProvider, user=request.user)
-    bookings = Booking.objects.filter(provider=provider).order_by('-created_at')
+    provider = request.actor.provider()
+
+    status_tab = request.GET.get('status', 'all')
+    if status_tab not in INBOX_TABS:
+        status_tab = 'all'
+
+    # Join everything the booking cards read so a page costs one query
+    related = ('customer__user', 'service__service_type')
+    bookings = Booking.objects.filter(provider=provider).select_related(*related)
+    archived = ArchivedBooking.objects.filter(provider=provider).select_related(*related)
+    statuses = INBOX_TABS[status_tab]
+    if statuses:
+        bookings = bookings.filter(status__in=statuses)
+        archived = archived.filter(status__in=statuses)
+        if not set(statuses) & set(Booking.FINISHED_STATUSES):
+            # Only finished bookings are ever archived
+            archived = None
+
+    bookings, next_cursor = history_page(bookings, archived, request.GET.get('cursor'), INBOX_PAGE_SIZE)
 
     context = {
         'bookings': bookings,
+        'status_tab': status_tab,
+        'status_tabs': INBOX_TABS.keys(),
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
     }
     return render(request, 'users/provider_view_bookings.html', context)
 
@@ -107,35 +176,61 @@ def provider_view_bookings_view(request):
 # -------------------------
 # Provider - Update Booking Status (Accept/Reject/Dropdown)
 # -------------------------
+# Statuses a provider may set (the card buttons also send accepted/rejected)
+PROVIDER_STATUSES = {status for status, _ in Booking.STATUS_CHOICES} | {'accepted', 'rejected'}
+
+
 @csrf_exempt
 @login_required(login_url='login_provider')
 def update_booking_status(request, booking_id):
     if request.method == 'POST':
-        data = json.loads(request.body)
-        new_status = data.get('status')
-        booking = get_object_or_404(Booking, id=booking_id)
+        try:
+            new_status = json.loads(request.body).get('status')
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False, 'message': 'Invalid JSON body.'}, status=400)
+        if not isinstance(new_status, str) or new_status not in PROVIDER_STATUSES:
+            return JsonResponse({'success': False, 'message': 'Unknown booking status.'}, status=400)
+        # One transaction for the status and the ledger, retried if the database is locked
+        try:
+            booking = retry_write(set_booking_status, booking_id, request.actor.provider_id, new_status)
+        except IntegrityError:
+            # Re-opening a released booking whose slot has been taken again
+            return JsonResponse({
+                'success': False,
+                'message': 'This slot has been booked by another customer.',
+            }, status=409)
 
-        booking.status = new_status
-        booking.save()
+        # Generate dynamic updated HTML
+        html = status_action_html(booking.id, new_status)
+
+        return JsonResponse({'success': True, 'new_status': new_status, 'updated_html': html})
 
-        # If provider confirms the booking — credit earnings
-        if new_status == 'confirmed':
-            provider = booking.provider
-            amount = booking.service.price or Decimal('0.00')
+    return JsonResponse({'success': False})
 
-            provider_earning, created = ProviderEarning.objects.get_or_create(provider=provider)
-            provider_earning.total_earnings += amount
-            provider_earning.save()
 
-        # If provider cancels or rejects — do not add earnings
-        if new_status in ['cancelled', 'rejected']:
-            # (optional) You can handle refund logic here if needed
-            pass
+def set_booking_status(booking_id, provider_id, new_status):
+    # Re-reads the booking so a retried attempt starts from the committed row
+    booking = get_object_or_404(Booking, id=booking_id, provider_id=provider_id)
 
-        # Generate dynamic updated HTML
-        if new_status in ['accepted', 'confirmed', 'arriving', 'arrived']:
-            html = f"""
-                <select class='form-select form-select-sm' onchange="updateStatus({booking.id}, this.value)">
+    booking.status = new_status
+    booking.save()
+    publish_status(booking.id, booking.customer_id, new_status)
+
+    # If provider confirms the booking — credit earnings (once per booking)
+    if new_status == 'confirmed':
+        credit_booking(booking)
+
+    # If provider cancels or rejects — reverse any earlier credit
+    if new_status in ['cancelled', 'rejected']:
+        refund_booking(booking)
+    return booking
+
+
+def status_action_html(booking_id, status):
+    # Action area shown on a provider's booking card after a status change
+    if status in ['accepted', 'confirmed', 'arriving', 'arrived']:
+        return f"""
+                <select class='form-select form-select-sm' onchange="updateStatus({booking_id}, this.value)">
                     <option value=''>Select Status</option>
                     <option value='confirmed'>Confirmed</option>
                     <option value='arriving'>Arriving</option>
@@ -143,38 +238,134 @@ def update_booking_status(request, booking_id):
                     <option value='completed'>Completed</option>
                 </select>
             """
-        elif new_status in ['cancelled', 'rejected']:
-            html = "<span class='badge bg-danger'>Cancelled</span>"
-        elif new_status == 'completed':
-            html = "<span class='badge bg-success'>Completed</span>"
-        else:
-            html = ""
+    elif status in ['cancelled', 'rejected']:
+        return "<span class='badge bg-danger'>Cancelled</span>"
+    elif status == 'completed':
+        return "<span class='badge bg-success'>Completed</span>"
+    return ""
 
-        return JsonResponse({'success': True, 'new_status': new_status, 'updated_html': html})
 
-    return JsonResponse({'success': False})
+# -------------------------
+# Provider - Batch Update Booking Status
+# -------------------------
+BATCH_LIMIT = 200
+
+
+@login_required(login_url='login_provider')
+@user_passes_test(is_provider, login_url='login_provider')
+@require_POST
+def batch_update_booking_status(request):
+    """
+    Apply many {booking_id, status} pairs in one transaction. Rows are moved
+    with one conditional UPDATE per (old status -> new status) transition and
+    earnings are credited/refunded in aggregate. Returns a result per item.
+    """
+    try:
+        updates = json.loads(request.body).get('updates', [])
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'message': 'Invalid JSON body.'}, status=400)
+    if not isinstance(updates, list) or len(updates) > BATCH_LIMIT:
+        return JsonResponse({'success': False, 'message': f'Send a list of at most {BATCH_LIMIT} updates.'}, status=400)
+
+    provider = request.actor.provider()
+    results = {}
+    # Items without a usable booking id, reported by their position in the list
+    invalid = []
+    wanted = {}
+    for index, item in enumerate(updates):
+        try:
+            booking_id, status = int(item.get('booking_id')), item.get('status')
+        except (AttributeError, TypeError, ValueError):
+            invalid.append({'index': index, 'result': 'invalid'})
+            continue
+        if not isinstance(status, str) or status not in PROVIDER_STATUSES:
+            results[booking_id] = {'booking_id': booking_id, 'result': 'invalid_status'}
+        else:
+            wanted[booking_id] = status  # last one wins
+
+    with transaction.atomic():
+        current = {
+            row['id']: row
+            for row in Booking.objects.filter(provider=provider, id__in=wanted).values('id', 'status', 'customer_id', 'service__price')
+        }
+
+        # Group by transition so each one is a single UPDATE ... WHERE status = old
+        transitions = {}
+        for booking_id, status in wanted.items():
+            row = current.get(booking_id)
+            if row is None:
+                results[booking_id] = {'booking_id': booking_id, 'result': 'not_found'}
+            elif row['status'] == status:
+                results[booking_id] = {'booking_id': booking_id, 'result': 'unchanged', 'new_status': status}
+            else:
+                transitions.setdefault((row['status'], status), []).append(booking_id)
+
+        moved = {}
+        for (old, new), ids in transitions.items():
+            try:
+                with transaction.atomic():
+                    count = Booking.objects.filter(id__in=ids, status=old).update(status=new)
+            except IntegrityError:
+                # Re-opening a booking whose slot has been taken again
+                count = 0
+            if count != len(ids):
+                # Changed under us (or slot conflict): keep only rows that really moved
+                done = set(Booking.objects.filter(id__in=ids, status=new).values_list('id', flat=True)) if count else set()
+            else:
+                done = set(ids)
+            for booking_id in ids:
+                if booking_id in done:
+                    moved[booking_id] = new
+                else:
+                    results[booking_id] = {'booking_id': booking_id, 'result': 'conflict'}
+            # update() skips the post_save counters, so move them here
+            bump(booking_counter(old), -len(done))
+            bump(booking_counter(new), len(done))
+            move_provider_stats(provider.id, **status_deltas(old, new, len(done)))
+        if moved:
+            bump_version(Booking)
+
+        confirmed = {i: current[i]['service__price'] for i, status in moved.items() if status == 'confirmed'}
+        cancelled = [i for i, status in moved.items() if status in ['cancelled', 'rejected']]
+        credit_bookings(provider.id, confirmed)
+        refund_bookings(provider.id, cancelled)
+        for booking_id, status in moved.items():
+            publish_status(booking_id, current[booking_id]['customer_id'], status)
+
+    for booking_id, status in moved.items():
+        results[booking_id] = {
+            'booking_id': booking_id, 'result': 'updated', 'new_status': status,
+            'updated_html': status_action_html(booking_id, status),
+        }
+
+    return JsonResponse({
+        'success': True,
+        'updated': len(moved),
+        'results': list(results.values()) + invalid,
+    })
 
 
 # -------------------------
 # Admin Login View
 # -------------------------
-def admin_login_view(request):
+@password_pool_guard
+async def admin_login_view(request):
     if request.method == 'POST':
         form = AdminLoginForm(request.POST)
         if form.is_valid():
             username = form.cleaned_data['username']
             password = form.cleaned_data['password']
-            user = authenticate(request, username=username, password=password)
+            user = await authenticate_offloaded(request, username, password)
 
             # Check if user exists and is admin or superuser
             if user is not None and (user.role == 'admin' or user.is_superuser):
-                login(request, user)
+                await alogin(request, user)
                 return redirect('admin_dashboard')
             else:
                 messages.error(request, 'Invalid admin credentials.')
     else:
         form = AdminLoginForm()
-    return render(request, 'users/admin_login.html', {'form': form})
+    return await arender(request, 'users/admin_login.html', {'form': form})
 
 
 
@@ -188,26 +379,51 @@ def is_admin(user):
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
 def admin_dashboard_view(request):
-    customers = Customer.objects.all()
-    providers = ServiceProvider.objects.all()
+    # Headline numbers come from the materialized counters (one query)
+    counters = read_counters()
 
-    # total earnings across all providers
-    total_earnings = ProviderEarning.objects.aggregate(total=Sum('total_earnings'))['total'] or 0.0
+    bookings_by_status = [
+        (label, int(counters.get(booking_counter(status), 0)))
+        for status, label in Booking.STATUS_CHOICES
+    ]
 
     context = {
-        'customers': customers,
-        'providers': providers,
-        'total_earnings': total_earnings,
+        'customers_count': int(counters.get('customers', 0)),
+        'providers_count': int(counters.get('providers', 0)),
+        'bookings_by_status': bookings_by_status,
+        'total_earnings': counters.get('gross_earnings', 0),
+        'export_form': ExportFilterForm(),
     }
     return render(request, 'users/admin_dashboard.html', context)
 
 
+@replica_reads
+@login_required(login_url='login_admin')
+@user_passes_test(is_admin, login_url='login_admin')
+def admin_export_view(request, dataset):
+    # Streams the whole export; see users/export.py
+    form = ExportFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponse(form.errors.as_text(), status=400, content_type='text/plain')
+    filters = form.cleaned_data
+    headers, rows = export_rows(dataset, filters)
+    export_format = filters['format']
+    response = StreamingHttpResponse(
+        export_lines(headers, rows, export_format),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    filename = export_filename(dataset, export_format, filters['date_from'], filters['date_to'])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@replica_reads
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
 def admin_view_service_providers(request):
     # Fetch only providers who have at least one service listed
     providers_with_services = ServiceProvider.objects.filter(
-        providerservice__isnull=False
+        providerservice__isnull=False, user__is_active=True
     ).distinct()
 
     # Prepare data: latest service for each provider
@@ -225,21 +441,32 @@ def admin_view_service_providers(request):
     return render(request, 'users/admin_providers.html', context)
 
 
+def retire_user(user):
+    # Deactivated users cannot log in and drop out of the admin lists at once.
+    # Callers are POST-only, so the admin's session then reads from the
+    # primary (main/db_router.py) and the list does not come from a stale replica
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    enqueue(delete_user, user.id)
+
+
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
+@require_POST
 def admin_delete_provider(request, provider_id):
     provider = get_object_or_404(ServiceProvider, id=provider_id)
-    provider.user.delete()  # Delete the associated user also
-    messages.success(request, f'Provider {provider.user.username} deleted successfully!')
+    # Lock the account now; the cascading delete runs in the worker
+    retire_user(provider.user)
+    messages.success(request, f'Provider {provider.user.username} deactivated; deletion scheduled.')
     return redirect('admin_view_providers')
 
+@replica_reads
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
 def admin_view_customers(request):
     # Fetch only customers who have filled profile (phone or address)
-    customers = Customer.objects.filter(
-        phone__isnull=False
-    ).exclude(phone='')  # ensure phone is not empty
+    # phone > '' skips NULL and empty phones in one range on customer_phone_idx
+    customers = Customer.objects.filter(phone__gt='', user__is_active=True)
 
     context = {
         'customers': customers
@@ -249,10 +476,12 @@ def admin_view_customers(request):
 
 @login_required(login_url='login_admin')
 @user_passes_test(is_admin, login_url='login_admin')
+@require_POST
 def admin_delete_customer(request, customer_id):
     customer = get_object_or_404(Customer, id=customer_id)
-    customer.user.delete()  # delete associated user as well
-    messages.success(request, f'Customer {customer.user.username} deleted successfully!')
+    # Lock the account now; the cascading delete runs in the worker
+    retire_user(customer.user)
+    messages.success(request, f'Customer {customer.user.username} deactivated; deletion scheduled.')
     return redirect('admin_view_customers')
 
 # -------------------------
@@ -276,17 +505,16 @@ def logout_view(request):
 @login_required(login_url='login_provider')
 @user_passes_test(is_provider)
 def provider_dashboard_view(request):
-    provider = get_object_or_404(ServiceProvider, user=request.user)
+    provider = request.actor.provider()
     services = ProviderService.objects.filter(provider=provider)
 
-    # Ensure a ProviderEarning exists for this provider and read fresh
-    provider_earning, _ = ProviderEarning.objects.get_or_create(provider=provider)
+    # Precomputed total maintained by the earnings ledger
+    total_earnings = ProviderEarning.objects.filter(provider=provider).values_list(
+        'total_earnings', flat=True
+    ).first()
 
     # Convert Decimal to float for template display
-    try:
-        total_earnings = float(provider_earning.total_earnings)
-    except Exception:
-        total_earnings = 0.0
+    total_earnings = float(total_earnings or 0)
 
     context = {
         'provider': provider,
@@ -299,10 +527,10 @@ def provider_dashboard_view(request):
 
 @login_required(login_url='login_provider')
 def list_service_view(request):
-    if request.user.role != 'provider':
+    if not request.actor.is_provider:
         return redirect('login_provider')
 
-    provider = ServiceProvider.objects.get(user=request.user)
+    provider = request.actor.provider()
 
     # Get the last listed service if exists
     last_service = ProviderService.objects.filter(provider=provider).last()
@@ -317,7 +545,7 @@ def list_service_view(request):
             return redirect('provider_dashboard')
         else:
             # Print form errors for debugging
-            print("Form invalid! Errors:", form.errors)
+            logger.info(f'List service form errors: {form.errors.as_json()}')
             messages.error(request, 'Please correct the errors below.')
     else:
         # Pull phone from last service if exists
@@ -341,7 +569,7 @@ def list_service_view(request):
 
 @login_required(login_url='login_provider')
 def provider_profile_view(request):
-    provider = ServiceProvider.objects.get(user=request.user)
+    provider = request.actor.provider()
     service = ProviderService.objects.filter(provider=provider).last()
     
     context = {
@@ -354,7 +582,7 @@ def provider_profile_view(request):
 
 @login_required(login_url='login_customer')
 def customer_dashboard_view(request):
-    if request.user.role != 'customer':
+    if not request.actor.is_customer:
         return redirect('login_customer')  # extra safety
 
     context = {
@@ -365,10 +593,10 @@ def customer_dashboard_view(request):
 
 @login_required(login_url='login_customer')
 def customer_profile_view(request):
-    if request.user.role != 'customer':
+    if not request.actor.is_customer:
         return redirect('login_customer')
 
-    customer = Customer.objects.get(user=request.user)
+    customer = request.actor.customer()
 
     if request.method == 'POST':
         phone = request.POST.get('phone')
@@ -386,39 +614,88 @@ def customer_profile_view(request):
     return render(request, 'users/customer_profile.html', context)
 
 
+@replica_reads
 @login_required(login_url='login_customer')
 def customer_services_view(request):
+    # Lazy: only evaluated when the cached services grid is stale
     services = Service.objects.all()
     context = {'services': services}
     return render(request, 'users/customer_services.html', context)
 
 
+@replica_reads
 @login_required(login_url='login_customer')
 def customer_providers_by_service_view(request, profession_name):
-    # Get all ProviderService objects for this service type
-    services = ProviderService.objects.filter(service_type__profession_name=profession_name)
-
-    # Keep only one ProviderService per provider
-    unique_providers = {}  
-    for service in services:
-        provider = service.provider
-        if provider.id not in unique_providers:
-            unique_providers[provider.id] = {
-                'provider': provider,
-                'service': service,
-                'service_type': service.service_type.profession_name,      
-                'experience': service.experience,
-                'price': service.price,
-                'address': service.address,
-                'phone': service.phone,
-            }
-
     customer = request.user
+    # Cached on the user, so the booking modal reuses this row
+    profile = getattr(customer, 'customer', None)
+    can_sort_nearest = profile is not None and profile.latitude is not None
+    sort = request.GET.get('sort')
+    if sort not in ('nearest', 'rated') or (sort == 'nearest' and not can_sort_nearest):
+        sort = 'latest'
+
+    try:
+        radius_km = min(max(float(request.GET.get('radius') or NEAREST_RADIUS_KM), 1), MAX_RADIUS_KM)
+    except ValueError:
+        radius_km = NEAREST_RADIUS_KM
+    try:
+        min_rating = min(max(int(request.GET.get('min_rating') or 0), 0), 5)
+    except ValueError:
+        min_rating = 0
+    reliable = request.GET.get('reliable') == '1'
+
+    if sort in ('nearest', 'rated'):
+        # Ranked sorts page by number; the cursor is the next page
+        try:
+            page = max(int(request.GET.get('cursor') or 1), 1)
+        except ValueError:
+            page = 1
+        if sort == 'nearest':
+            # Providers within radius_km of the customer's address, closest first
+            providers, has_next = nearest_page(profession_name, profile.latitude, profile.longitude, radius_km, page)
+        else:
+            # Best rated first, from the materialized provider stats
+            max_cancellation = RELIABLE_CANCELLATION_RATE if reliable else None
+            providers, has_next = rated_page(profession_name, min_rating, max_cancellation, page)
+        next_cursor = str(page + 1) if has_next else None
+    else:
+        # Latest listing per provider, picked in SQL and paged by keyset cursor
+        providers, next_cursor = directory_page(profession_name, request.GET.get('cursor'))
 
     context = {
         'service_name': profession_name,
-        'providers': unique_providers.values(),
+        'providers': providers,
         'customer': customer,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'sort': sort,
+        'radius_km': radius_km,
+        'can_sort_nearest': can_sort_nearest,
+        'min_rating': min_rating,
+        'reliable': reliable,
+    }
+    return render(request, 'users/customer_providers_by_service.html', context)
+
+
+@replica_reads
+@login_required(login_url='login_customer')
+def provider_search_view(request):
+    # Ranked full-text search over provider name, profession and address
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('cursor') or 1), 1)
+    except ValueError:
+        page = 1
+    listings, has_next = search_listings(query, page)
+
+    context = {
+        'service_name': 'Search',
+        'query': query,
+        'providers': [directory_entry(service) for service in listings],
+        'customer': request.user,
+        # Opaque to the template: here the cursor is the next page number
+        'next_cursor': str(page + 1) if has_next else None,
+        'is_first_page': page == 1,
     }
     return render(request, 'users/customer_providers_by_service.html', context)
 
@@ -426,6 +703,7 @@ def customer_providers_by_service_view(request, profession_name):
 
 @login_required(login_url='login_customer')
 @require_POST
+@idempotent()
 def create_booking_view(request):
     # Ensure it's an AJAX request
     if request.headers.get('x-requested-with') != 'XMLHttpRequest':
@@ -441,7 +719,7 @@ def create_booking_view(request):
         return JsonResponse({'status': 'error', 'message': 'Missing required data!'})
 
     try:
-        customer = Customer.objects.get(user=request.user)
+        customer = request.actor.customer()
 
         #  Check if customer profile is complete
         if not customer.phone or not customer.address:
@@ -450,34 +728,35 @@ def create_booking_view(request):
                 'message': 'Please complete your profile (phone and address) before booking a service.'
             })
 
+        slot = Booking.slot_for(timing)
+        if slot is None:
+            return JsonResponse({'status': 'error', 'message': 'Invalid timing slot!'})
+
         provider = ServiceProvider.objects.get(id=provider_id)
         service = ProviderService.objects.get(id=service_id, provider=provider)
 
-        # Prevent duplicate bookings for same service, provider, date, and time
-        existing = Booking.objects.filter(
-            customer=customer,
-            provider=provider,
-            service=service,
-            schedule_date=schedule_date,
-            timing=timing
-        ).first()
-
-        if existing:
+        #  Create the booking only if profile is complete. The unique
+        #  (provider, schedule_date, slot_start) constraint rejects a slot
+        #  that is already taken, atomically, without a lookup first.
+        #  A locked database is retried; a taken slot is not.
+        try:
+            booking = retry_write(
+                Booking.objects.create,
+                customer=customer,
+                provider=provider,
+                service=service,
+                schedule_date=schedule_date,
+                timing=timing,
+                slot_start=slot[0],
+                slot_end=slot[1],
+                status='pending'  # initial status
+            )
+        except IntegrityError:
             return JsonResponse({
                 'status': 'error',
-                'message': 'You have already booked this service for the selected date and time.'
+                'message': 'This provider is already booked for the selected date and time.'
             })
 
-        #  Create the booking only if profile is complete
-        booking = Booking.objects.create(
-            customer=customer,
-            provider=provider,
-            service=service,
-            schedule_date=schedule_date,
-            timing=timing,
-            status='pending'  # initial status
-        )
-
         return JsonResponse({
             'status': 'success',
             'message': 'Booking created successfully!',
@@ -544,14 +823,9 @@ def cod_confirmation_view(request, booking_id):
 import logging
 logger = logging.getLogger(__name__)
 
-@login_required(login_url='login_customer')
-def payment_success_view(request, booking_id):
-    if not booking_id:
-        return render(request, 'users/payment_success.html', {'error': 'Invalid booking ID.'})
-
-    # Fetch the booking
-    booking = get_object_or_404(Booking, id=booking_id, customer__user=request.user)
-    provider = booking.provider
+def record_payment(booking_id, user):
+    # Fetch the booking (again on a retry)
+    booking = get_object_or_404(Booking, id=booking_id, customer__user=user)
 
     # Get amount and ensure Decimal
     amount = booking.service.price if booking.service and booking.service.price is not None else Decimal('0.00')
@@ -562,18 +836,23 @@ def payment_success_view(request, booking_id):
     booking.status = 'pending'
     booking.save()
 
-    # 2) Update provider earnings (Decimal-safe)
-    provider_earning, created = ProviderEarning.objects.get_or_create(provider=provider)
-    # ensure provider_earning.total_earnings is Decimal
-    if not isinstance(provider_earning.total_earnings, Decimal):
-        provider_earning.total_earnings = Decimal(str(provider_earning.total_earnings or '0.00'))
+    # 2) Credit provider earnings through the ledger (no-op on page reloads)
+    credited = credit_booking(booking, amount)
+    return booking, amount, credited
+
 
-    provider_earning.total_earnings = provider_earning.total_earnings + amount
-    provider_earning.save()
+@login_required(login_url='login_customer')
+@idempotent(default_key=lambda request, booking_id: f'payment-success-{booking_id}')
+def payment_success_view(request, booking_id):
+    if not booking_id:
+        return render(request, 'users/payment_success.html', {'error': 'Invalid booking ID.'})
+
+    # 1-2) Status and ledger in one transaction, retried if the database is locked
+    booking, amount, credited = retry_write(record_payment, booking_id, request.user)
+    provider = booking.provider
 
     # 3) Logging / console info for debugging
-    logger.info(f'Payment success: booking_id={booking.id}, provider={provider.user.username}, amount={amount}, new_total={provider_earning.total_earnings}')
-    print(f' Payment success: booking {booking.id} — credited {provider.user.username} with {amount}. New total: {provider_earning.total_earnings}')
+    logger.info(f'Payment success: booking_id={booking.id}, provider={provider.user.username}, amount={amount}, credited={credited}')
 
     messages.success(request, f'Payment successful! ₹{amount} added to {provider.user.username} earnings.')
 
@@ -586,28 +865,129 @@ def payment_success_view(request, booking_id):
 
 
 
+PAST_BOOKINGS_PAGE_SIZE = 20
+
 @login_required(login_url='login_customer')
 def customer_bookings_view(request):
-    customer = Customer.objects.get(user=request.user)
+    customer_id = request.actor.customer_id
     
     # Current bookings: pending, confirmed, arriving
     current_bookings = Booking.objects.filter(
-        customer=customer,
+        customer_id=customer_id,
         status__in=['pending','confirmed','arriving','arrived']
     ).order_by('-schedule_date')
     
-    # Past bookings: completed, cancelled
-    past_bookings = Booking.objects.filter(
-        customer=customer,
-        status__in=['completed','cancelled']
-    ).order_by('-schedule_date')
+    # Past bookings: completed, cancelled. Paged newest first; older pages
+    # pull in archived bookings once they reach back past the archive cutoff
+    past_statuses = ['completed', 'cancelled']
+    related = ('provider__user', 'service__service_type')
+    past_bookings, next_cursor = history_page(
+        Booking.objects.filter(customer_id=customer_id, status__in=past_statuses).select_related(*related),
+        ArchivedBooking.objects.filter(customer_id=customer_id, status__in=past_statuses).select_related(*related),
+        request.GET.get('cursor'), PAST_BOOKINGS_PAGE_SIZE, field='schedule_date',
+    )
     
     context = {
         'current_bookings': current_bookings,
         'past_bookings': past_bookings,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
     }
     return render(request, 'users/customer_bookings.html', context)
 
+# -------------------------
+# Customer - Live Booking Status (Server-Sent Events)
+# -------------------------
+LIVE_STATUSES = ['pending', 'accepted', 'confirmed', 'arriving', 'arrived']
+SSE_HEARTBEAT_SECONDS = 15
+
+
+async def _booking_snapshot(customer_id):
+    # {booking_id: status} for the customer's live bookings
+    snapshot = {}
+    async for booking_id, status in Booking.objects.filter(
+        customer_id=customer_id, status__in=LIVE_STATUSES
+    ).values_list('id', 'status'):
+        snapshot[booking_id] = status
+    return snapshot
+
+
+@login_required(login_url='login_customer')
+async def booking_events_view(request):
+    """
+    Stream the customer's booking status changes as server-sent events.
+    Events come from the in-process broker; every BOOKING_EVENTS_POLL_SECONDS
+    the live bookings are also re-read so changes made by other worker
+    processes still arrive. Under WSGI the stream sends the current state and
+    closes, and the browser's EventSource reconnects after ``retry``.
+    """
+    user = await request.auser()
+    customer_id = await Customer.objects.filter(user=user).values_list('id', flat=True).afirst()
+    if customer_id is None:
+        return JsonResponse({'success': False, 'message': 'Customer not found.'}, status=403)
+
+    poll_seconds = getattr(settings, 'BOOKING_EVENTS_POLL_SECONDS', 10)
+    retry = f"retry: {int((poll_seconds or SSE_HEARTBEAT_SECONDS) * 1000)}\n\n"
+
+    if not isinstance(request, ASGIRequest):
+        # WSGI worker: never hold it open, the client reconnects after ``retry``
+        known = await _booking_snapshot(customer_id)
+        body = retry + ''.join(
+            format_event({'booking_id': booking_id, 'status': status}) for booking_id, status in known.items()
+        )
+        response = HttpResponse(body, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def stream():
+        known = await _booking_snapshot(customer_id)
+        yield retry
+        for booking_id, status in known.items():
+            yield format_event({'booking_id': booking_id, 'status': status})
+
+        queue = broker.subscribe(customer_id)
+        loop = asyncio.get_running_loop()
+        last_poll = last_sent = loop.time()
+        try:
+            while True:
+                wait = min(poll_seconds or SSE_HEARTBEAT_SECONDS, SSE_HEARTBEAT_SECONDS)
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    event = None
+
+                if event is not None and known.get(event['booking_id']) != event['status']:
+                    known[event['booking_id']] = event['status']
+                    last_sent = loop.time()
+                    yield format_event(event)
+
+                # Database fallback for changes published by other processes
+                if poll_seconds and loop.time() - last_poll >= poll_seconds:
+                    last_poll = loop.time()
+                    fresh = await _booking_snapshot(customer_id)
+                    for booking_id in known.keys() - fresh.keys():
+                        # Left the live set: completed or cancelled
+                        status = await Booking.objects.filter(id=booking_id).values_list('status', flat=True).afirst()
+                        fresh_event = {'booking_id': booking_id, 'status': status or 'cancelled'}
+                        last_sent = loop.time()
+                        yield format_event(fresh_event)
+                    for booking_id, status in fresh.items():
+                        if known.get(booking_id) != status:
+                            last_sent = loop.time()
+                            yield format_event({'booking_id': booking_id, 'status': status})
+                    known = fresh
+
+                if loop.time() - last_sent >= SSE_HEARTBEAT_SECONDS:
+                    last_sent = loop.time()
+                    yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(customer_id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # -------------------------
 # Customer - Cancel Booking
 # -------------------------
@@ -617,13 +997,17 @@ def cancel_booking_view(request):
     booking_id = request.POST.get('booking_id')
 
     try:
-        customer = Customer.objects.get(user=request.user)
-        booking = Booking.objects.get(id=booking_id, customer=customer)
+        if not request.actor.is_customer:
+            raise Customer.DoesNotExist
+        customer_id = request.actor.customer_id
+        booking = Booking.objects.get(id=booking_id, customer_id=customer_id)
 
         # Only allow cancellation if status is pending, confirmed, or arriving
         if booking.status.lower() in ['pending', 'confirmed', 'arriving']:
             booking.status = 'cancelled'
             booking.save()
+            refund_booking(booking)
+            publish_status(booking.id, customer_id, 'cancelled')
             return JsonResponse({'success': True})
         else:
             return JsonResponse({'success': False, 'message': 'Cannot cancel completed or already cancelled bookings.'})
@@ -635,14 +1019,41 @@ def cancel_booking_view(request):
 
 @login_required(login_url='login_customer')
 def customer_review_view(request):
-    if request.user.role != 'customer':
+    if not request.actor.is_customer:
         return redirect('login_customer')
 
-    customer = Customer.objects.get(user=request.user)
+    customer = request.actor.customer()
+    # Completed bookings not reviewed yet; each booking takes one rated review
+    reviewable = Booking.objects.filter(
+        customer_id=customer.id, status='completed', review__isnull=True,
+    ).select_related('provider__user', 'service__service_type').order_by('-schedule_date')
 
     if request.method == 'POST':
-        content = request.POST.get('review')
-        if content.strip():
+        content = request.POST.get('review', '')
+        booking_id = request.POST.get('booking')
+        if booking_id:
+            booking = reviewable.filter(id=booking_id).first()
+            try:
+                rating = int(request.POST.get('rating', ''))
+            except ValueError:
+                rating = 0
+            if booking is None:
+                messages.error(request, "That booking cannot be reviewed.")
+            elif not 1 <= rating <= 5:
+                messages.error(request, "Please rate the service from 1 to 5 stars.")
+            elif content.strip():
+                try:
+                    with transaction.atomic():
+                        Review.objects.create(
+                            customer=customer, booking=booking, provider_id=booking.provider_id,
+                            rating=rating, content=content,
+                        )
+                except IntegrityError:
+                    messages.error(request, "This booking has already been reviewed.")
+                else:
+                    messages.success(request, "Review submitted successfully!")
+                return redirect('customer_review')
+        elif content.strip():
             Review.objects.create(customer=customer, content=content)
             messages.success(request, "Review submitted successfully!")
             return redirect('customer_review')
@@ -650,5 +1061,6 @@ def customer_review_view(request):
     reviews = Review.objects.filter(customer=customer).order_by('-created_at')
     return render(request, 'users/customer_review.html', {
         'customer': customer,
-        'reviews': reviews
+        'reviews': reviews,
+        'reviewable': reviewable,
     })